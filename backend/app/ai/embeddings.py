@@ -0,0 +1,61 @@
+"""
+Shared sentence-transformers model for the AI features
+"""
+from typing import Optional, Sequence
+import logging
+import threading
+
+from ..core.config import settings
+from ..core.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+
+class Embedder:
+    """
+    Lazily loaded sentence-transformers model, loaded once per process.
+
+    ``encode`` returns L2-normalized float32 rows (so dot product is the
+    cosine similarity), or None when the model cannot be loaded; callers
+    then run without their semantic features. CPU bound: call it from a
+    worker thread.
+    """
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self._model = None
+        self._failed = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return not self._failed
+
+    def _load(self):
+        with self._lock:
+            if self._model is None and not self._failed:
+                try:
+                    from sentence_transformers import SentenceTransformer
+
+                    self._model = SentenceTransformer(self.model_name)
+                except Exception as e:
+                    logger.warning("Embeddings disabled, cannot load %s: %s", self.model_name, e)
+                    self._failed = True
+        return self._model
+
+    def encode(self, texts: Sequence[str]) -> Optional["np.ndarray"]:
+        model = self._model or self._load()
+        if model is None:
+            return None
+        vectors = model.encode(
+            list(texts),
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+embedder = Embedder()
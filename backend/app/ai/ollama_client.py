@@ -0,0 +1,68 @@
+"""
+Async client for the Ollama HTTP API
+"""
+from typing import Any, Dict, Optional
+import asyncio
+import time
+
+from ..core.config import settings
+from ..core.metrics import ALL_SCANNERS, time_stage
+from ..core.resources import httpx, resources
+
+
+class OllamaError(Exception):
+    """Ollama could not be reached or returned an error"""
+
+
+class OllamaClient:
+    """
+    Thin wrapper over ``POST /api/generate`` with bounded concurrency,
+    sent through the shared HTTP pool.
+
+    Ollama serializes generations per model, so firing more requests than
+    OLLAMA_MAX_CONCURRENCY only queues them on the server; the semaphore
+    keeps them queued here instead, where they can still be cancelled.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        model: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.base_url = base_url or settings.OLLAMA_URL
+        self.model = model or settings.OLLAMA_MODEL
+        self.timeout = timeout or settings.OLLAMA_TIMEOUT_SECONDS
+        self._limit = asyncio.Semaphore(max_concurrency or settings.OLLAMA_MAX_CONCURRENCY)
+
+    async def generate(self, prompt: str, json_format: bool = True) -> Dict[str, Any]:
+        """
+        Returns:
+            {"response": text, "tokens": prompt + completion tokens,
+             "processing_time_ms": wall time including queueing}
+        """
+        started = time.monotonic()
+        payload: Dict[str, Any] = {"model": self.model, "prompt": prompt, "stream": False}
+        if json_format:
+            payload["format"] = "json"
+
+        async with self._limit:
+            try:
+                with time_stage(ALL_SCANNERS, "llm"):
+                    response = await resources.http().post(
+                        f"{self.base_url}/api/generate", json=payload, timeout=self.timeout
+                    )
+                response.raise_for_status()
+                body = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                raise OllamaError(f"Ollama request failed: {e}") from e
+
+        return {
+            "response": body.get("response", ""),
+            "tokens": (body.get("prompt_eval_count") or 0) + (body.get("eval_count") or 0),
+            "processing_time_ms": int((time.monotonic() - started) * 1000),
+        }
+
+
+ollama_client = OllamaClient()
@@ -0,0 +1,73 @@
+"""
+Minimal stand-in for the Ollama API, for local runs and benchmarks
+
+    uvicorn app.ai.ollama_stub:app --port 11434
+
+Answers ``/api/generate`` with canned remediation JSON for every
+``FINDING {...}`` line of the prompt (see remediation_generator), after
+OLLAMA_STUB_LATENCY_MS plus OLLAMA_STUB_MS_PER_ITEM per finding, which
+roughly mimics a model generating one answer after another.
+"""
+from typing import Any, Dict
+import asyncio
+import json
+import os
+
+from fastapi import FastAPI
+
+LATENCY_MS = int(os.getenv("OLLAMA_STUB_LATENCY_MS", "200"))
+MS_PER_ITEM = int(os.getenv("OLLAMA_STUB_MS_PER_ITEM", "50"))
+
+app = FastAPI(title="Ollama stub")
+
+
+def _remediation(item: Dict[str, Any]) -> Dict[str, Any]:
+    steps = [f"1. Review {item.get('resource_type') or 'the affected resource'}"]
+    if item.get("scanner_remediation"):
+        steps.append(f"2. {item['scanner_remediation']}")
+    return {
+        "id": item.get("id"),
+        "automated": {
+            "available": False,
+            "type": "none",
+            "code": "",
+            "description": f"No automated fix for {item.get('check_id')}",
+        },
+        "manual": {"steps": steps},
+        "risk_if_ignored": f"{item.get('title')} remains exploitable",
+        "estimated_fix_time": "15 minutes",
+        "confidence": 0.5,
+    }
+
+
+@app.get("/")
+async def root():
+    return "Ollama is running"
+
+
+@app.get("/api/tags")
+async def tags():
+    return {"models": [{"name": os.getenv("OLLAMA_MODEL", "llama3.1:8b")}]}
+
+
+@app.post("/api/generate")
+async def generate(body: Dict[str, Any]):
+    prompt = body.get("prompt", "")
+    items = [
+        json.loads(line[len("FINDING "):])
+        for line in prompt.splitlines()
+        if line.startswith("FINDING ")
+    ]
+    await asyncio.sleep((LATENCY_MS + MS_PER_ITEM * len(items)) / 1000)
+
+    if items:
+        response = json.dumps({"items": [_remediation(item) for item in items]})
+    else:
+        response = json.dumps({"response": "stub"}) if body.get("format") == "json" else "stub"
+    return {
+        "model": body.get("model"),
+        "response": response,
+        "done": True,
+        "prompt_eval_count": len(prompt) // 4,
+        "eval_count": len(response) // 4,
+    }
@@ -0,0 +1,336 @@
+"""
+Retrieval index for the compliance chat (chromadb + sentence-transformers)
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.lazy import lazy_import
+from ..models.models import Audit, Finding, SeverityEnum
+from ..services.mapping_engine import mapping_engine
+from .embeddings import Embedder, embedder as shared_embedder
+from .ollama_client import OllamaClient, ollama_client
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# id -> (text, metadata)
+Documents = Dict[str, Tuple[str, Dict[str, Any]]]
+
+UPSERT_BATCH_SIZE = 256
+QUERY_CACHE_SIZE = 1024
+
+CHECKS_SQL = text("""
+    SELECT DISTINCT ON (scanner, check_id) scanner, check_id, title, description, remediation
+    FROM findings
+    WHERE audit_id = :audit_id AND check_id NOT IN ('ERROR', 'TIMEOUT')
+    ORDER BY scanner, check_id, id
+""")
+
+CHAT_PROMPT = """You are a compliance assistant for EU regulations (NIS2, DORA, GDPR, ...)
+and cloud/Kubernetes security. Answer the question using the context below;
+cite regulation articles and check ids from it. If the context is not
+enough, say so.
+
+Context:
+{context}
+
+Question: {question}
+"""
+
+
+def _content_hash(document: str) -> str:
+    return hashlib.sha256(document.encode()).hexdigest()[:16]
+
+
+def _severity(value: Any) -> str:
+    return value.value if isinstance(value, SeverityEnum) else str(value)
+
+
+def control_documents() -> Documents:
+    documents: Documents = {}
+    for (code, control_id), control in mapping_engine.index.controls.items():
+        checks = ", ".join(
+            f"{check['scanner']}:{check['check_id']}" for check in control.get("mapped_scanner_checks", [])
+        )
+        document = "\n".join([
+            f"{code} {control_id}: {control.get('title', '')}",
+            control.get("description", ""),
+            f"Category: {control.get('category', '')}",
+            "Requirements: " + "; ".join(control.get("requirements", [])),
+            f"Scanner checks: {checks}",
+        ])
+        documents[f"control:{code}:{control_id}"] = (document, {
+            "kind": "control",
+            "regulation": code,
+            "control_id": control_id,
+            "title": control.get("title", ""),
+            "priority": control.get("priority") or "",
+            "content_hash": _content_hash(document),
+        })
+    return documents
+
+
+class RAGEngine:
+    """
+    Vector index over regulation controls, scanner checks and open findings.
+
+    Embeddings are computed once and persisted by chromadb in
+    RAG_INDEX_DIR. Every document carries a hash of its text, so a sync
+    only embeds documents that are new or changed:
+
+    - controls: on startup and whenever the mapping files are reloaded
+    - checks: distinct checks of each completed audit, never removed
+    - findings: the open findings of an environment's latest audit,
+      replacing the previous audit's
+
+    The chat hot path embeds the question (memoized) and runs a single
+    top-k query.
+    """
+
+    def __init__(self, embedder: Optional[Embedder] = None, client: Optional[OllamaClient] = None):
+        self.embedder = embedder or shared_embedder
+        self.client = client or ollama_client
+        self._collection = None
+        self._disabled = False
+        self._sync_lock = asyncio.Lock()
+        self._query_vectors: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._controls_fingerprint: Optional[str] = None
+        self._startup_task: Optional[asyncio.Task] = None
+
+    def collection(self):
+        """The chromadb collection, or None if chromadb is unavailable"""
+        if self._collection is None and not self._disabled:
+            try:
+                import chromadb
+                from chromadb.config import Settings as ChromaSettings
+
+                client = chromadb.PersistentClient(
+                    path=settings.RAG_INDEX_DIR, settings=ChromaSettings(anonymized_telemetry=False)
+                )
+                self._collection = client.get_or_create_collection(
+                    settings.RAG_COLLECTION,
+                    metadata={"hnsw:space": "cosine"},
+                    embedding_function=None,
+                )
+            except Exception as e:
+                logger.warning("Compliance chat retrieval disabled: %s", e)
+                self._disabled = True
+        return self._collection
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _sync(self, documents: Documents, scope: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """
+        Make the index match ``documents``, embedding only what changed.
+
+        With a ``scope`` filter, indexed documents within it that are not
+        in ``documents`` are deleted. Blocking; run in a worker thread.
+        """
+        stats = {"embedded": 0, "updated": 0, "deleted": 0}
+        collection = self.collection()
+        if collection is None or not self.embedder.available:
+            return stats
+
+        if scope is not None:
+            existing = collection.get(where=scope, include=["metadatas"])
+        elif documents:
+            existing = collection.get(ids=list(documents), include=["metadatas"])
+        else:
+            return stats
+        current = dict(zip(existing["ids"], existing["metadatas"]))
+
+        to_embed: List[str] = []
+        to_update: List[str] = []
+        for doc_id, (_, metadata) in documents.items():
+            indexed = current.get(doc_id)
+            if indexed is None or indexed.get("content_hash") != metadata["content_hash"]:
+                to_embed.append(doc_id)
+            elif indexed != metadata:
+                to_update.append(doc_id)
+
+        for start in range(0, len(to_embed), UPSERT_BATCH_SIZE):
+            ids = to_embed[start:start + UPSERT_BATCH_SIZE]
+            vectors = self.embedder.encode([documents[doc_id][0] for doc_id in ids])
+            if vectors is None:
+                return stats
+            collection.upsert(
+                ids=ids,
+                embeddings=vectors.tolist(),
+                documents=[documents[doc_id][0] for doc_id in ids],
+                metadatas=[documents[doc_id][1] for doc_id in ids],
+            )
+            stats["embedded"] += len(ids)
+
+        if to_update:
+            collection.update(ids=to_update, metadatas=[documents[doc_id][1] for doc_id in to_update])
+            stats["updated"] = len(to_update)
+
+        if scope is not None:
+            stale = [doc_id for doc_id in current if doc_id not in documents]
+            if stale:
+                collection.delete(ids=stale)
+                stats["deleted"] = len(stale)
+        return stats
+
+    async def sync(self, documents: Documents, scope: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        async with self._sync_lock:
+            return await asyncio.to_thread(self._sync, documents, scope)
+
+    async def sync_controls(self) -> Dict[str, int]:
+        """Index the loaded regulation controls (no-op if the files did not change)"""
+        fingerprint = mapping_engine.fingerprint
+        if fingerprint == self._controls_fingerprint:
+            return {"embedded": 0, "updated": 0, "deleted": 0}
+        stats = await self.sync(control_documents(), scope={"kind": "control"})
+        self._controls_fingerprint = fingerprint
+        logger.info("Indexed regulation controls for chat: %s", stats)
+        return stats
+
+    async def index_audit(self, session: AsyncSession, audit_id: int) -> Dict[str, int]:
+        """Add an audit's checks and make its open findings the environment's"""
+        audit = await session.get(Audit, audit_id)
+        if audit is None or self.collection() is None:
+            return {}
+
+        checks: Documents = {}
+        for row in (await session.execute(CHECKS_SQL, {"audit_id": audit_id})).all():
+            controls = ", ".join(f"{code} {control_id}" for code, control_id in sorted(
+                mapping_engine.lookup(row.scanner, row.check_id)
+            ))
+            document = "\n".join([
+                f"{row.scanner} check {row.check_id}: {row.title}",
+                (row.description or "")[:1000],
+                f"Remediation: {(row.remediation or '')[:500]}",
+                f"Controls: {controls}",
+            ])
+            checks[f"check:{row.scanner}:{row.check_id}"] = (document, {
+                "kind": "check",
+                "scanner": row.scanner,
+                "check_id": row.check_id,
+                "title": row.title or "",
+                "content_hash": _content_hash(document),
+            })
+
+        findings: Documents = {}
+        result = await session.execute(
+            select(
+                Finding.id, Finding.finding_hash, Finding.scanner, Finding.check_id, Finding.title,
+                Finding.description, Finding.severity, Finding.resource_type, Finding.resource_id,
+                Finding.resource_region,
+            )
+            .where(Finding.audit_id == audit_id, Finding.status == "open")
+            .order_by(Finding.severity, Finding.id)
+            .limit(settings.RAG_MAX_FINDINGS_PER_ENVIRONMENT)
+        )
+        for row in result.all():
+            severity = _severity(row.severity)
+            document = "\n".join([
+                f"[{severity}] {row.title}",
+                f"Resource: {row.resource_type or ''} {row.resource_id or ''} {row.resource_region or ''}".rstrip(),
+                f"Check: {row.scanner} {row.check_id}",
+                (row.description or "")[:500],
+            ])
+            findings[f"finding:{audit.environment_id}:{row.finding_hash}"] = (document, {
+                "kind": "finding",
+                "environment_id": audit.environment_id,
+                "audit_id": audit_id,
+                "finding_id": row.id,
+                "severity": severity,
+                "scanner": row.scanner,
+                "check_id": row.check_id,
+                "title": row.title or "",
+                "content_hash": _content_hash(document),
+            })
+
+        stats = await self.sync(checks)
+        finding_stats = await self.sync(
+            findings, scope={"$and": [{"kind": "finding"}, {"environment_id": audit.environment_id}]}
+        )
+        for key, value in finding_stats.items():
+            stats[key] += value
+        return stats
+
+    def start(self) -> None:
+        """Index the controls in the background; the API does not wait for it"""
+        if self._startup_task is None:
+            self._startup_task = asyncio.create_task(self.sync_controls())
+
+    async def stop(self) -> None:
+        if self._startup_task is not None:
+            self._startup_task.cancel()
+            self._startup_task = None
+
+    # ------------------------------------------------------------------
+    # Retrieval
+    # ------------------------------------------------------------------
+
+    def _query_vector(self, question: str) -> Optional["np.ndarray"]:
+        vector = self._query_vectors.get(question)
+        if vector is None:
+            vectors = self.embedder.encode([question])
+            if vectors is None:
+                return None
+            vector = vectors[0]
+            self._query_vectors[question] = vector
+            while len(self._query_vectors) > QUERY_CACHE_SIZE:
+                self._query_vectors.popitem(last=False)
+        return vector
+
+    def _search(self, question: str, k: int, environment_id: Optional[int]) -> List[Dict[str, Any]]:
+        collection = self.collection()
+        if collection is None:
+            return []
+        vector = self._query_vector(question)
+        if vector is None:
+            return []
+
+        where = None
+        if environment_id is not None:
+            where = {"$or": [{"kind": {"$ne": "finding"}}, {"environment_id": environment_id}]}
+        result = collection.query(
+            query_embeddings=[vector.tolist()],
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas", "distances"],
+        )
+        return [
+            {"id": doc_id, "document": document, "distance": round(distance, 4), **metadata}
+            for doc_id, document, metadata, distance in zip(
+                result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+    async def search(
+        self, question: str, k: Optional[int] = None, environment_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Top-k indexed documents for a question"""
+        return await asyncio.to_thread(self._search, question, k or settings.RAG_TOP_K, environment_id)
+
+    async def chat(self, question: str, environment_id: Optional[int] = None) -> Dict[str, Any]:
+        sources = await self.search(question, environment_id=environment_id)
+        context = "\n\n".join(source["document"] for source in sources) or "(no indexed context)"
+        output = await self.client.generate(
+            CHAT_PROMPT.format(context=context, question=question), json_format=False
+        )
+        for source in sources:
+            source.pop("document")
+            source.pop("content_hash", None)
+        return {
+            "response": output["response"],
+            "model": self.client.model,
+            "sources": sources,
+            "processing_time_ms": output["processing_time_ms"],
+        }
+
+
+rag_engine = RAGEngine()
@@ -0,0 +1,354 @@
+"""
+AI remediation with an exact + semantic cache in front of batched LLM calls
+"""
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.lazy import lazy_import
+from ..core.resources import resources
+from ..models.models import AIAnalysis, Finding
+from .embeddings import Embedder, embedder as shared_embedder
+from .ollama_client import OllamaClient, OllamaError, ollama_client
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# (scanner, check_id, resource_type, model)
+RemediationKey = Tuple[str, str, str, str]
+
+REMEDIATION_PROMPT = """You are a cloud and Kubernetes security engineer.
+Write remediation guidance for each security finding listed below.
+
+Respond with JSON only, in this shape:
+{{"items": [{{"id": <finding id>,
+  "automated": {{"available": true|false, "type": "terraform|kubectl|cli|none", "code": "...", "description": "..."}},
+  "manual": {{"steps": ["1. ...", "2. ..."]}},
+  "risk_if_ignored": "...",
+  "estimated_fix_time": "...",
+  "confidence": 0.0-1.0}}]}}
+
+Findings (one JSON object per line):
+{findings}
+"""
+
+
+def finding_key(finding: Finding, model: str) -> RemediationKey:
+    return (finding.scanner, finding.check_id, finding.resource_type or "", model)
+
+
+def embedding_text(finding: Finding) -> str:
+    """What two findings must share to reuse each other's remediation"""
+    return f"{finding.check_id} {finding.resource_type or ''}: {finding.title}. {(finding.description or '')[:500]}"
+
+
+def prompt_line(item_id: int, finding: Finding) -> str:
+    return "FINDING " + json.dumps({
+        "id": item_id,
+        "scanner": finding.scanner,
+        "check_id": finding.check_id,
+        "resource_type": finding.resource_type,
+        "title": finding.title,
+        "description": (finding.description or "")[:1000],
+        "scanner_remediation": (finding.remediation or "")[:500],
+    }, ensure_ascii=False)
+
+
+class _VectorIndex:
+    """Ring buffer of normalized embeddings searched by dot product"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._vectors: Optional["np.ndarray"] = None
+        self._entries: List[Dict[str, Any]] = []
+        self._next = 0
+
+    def add(self, vector: "np.ndarray", entry: Dict[str, Any]) -> None:
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+        if len(self._entries) < self.max_entries:
+            self._entries.append(entry)
+        else:
+            self._entries[self._next] = entry
+        self._vectors[self._next] = vector
+        self._next = (self._next + 1) % self.max_entries
+
+    def search(self, queries: "np.ndarray") -> List[Tuple[Optional[Dict[str, Any]], float]]:
+        """Best entry and cosine similarity for every query row"""
+        if not self._entries:
+            return [(None, 0.0)] * len(queries)
+        similarities = queries @ self._vectors[: len(self._entries)].T
+        best = similarities.argmax(axis=1)
+        return [
+            (self._entries[index], float(similarities[row, index]))
+            for row, index in enumerate(best)
+        ]
+
+
+class RemediationCache:
+    """
+    Two cache levels in front of the LLM.
+
+    1. Exact: (scanner, check_id, resource_type, model) in an in-process
+       LRU backed by Redis, shared by every worker.
+    2. Semantic: sentence-transformers embeddings of the findings that
+       produced cached entries; a finding whose embedding is within
+       REMEDIATION_SIMILARITY_THRESHOLD of one of them (same scanner and
+       model) reuses that remediation.
+    """
+
+    def __init__(self, embedder: Optional[Embedder] = None):
+        self.max_local = settings.REMEDIATION_CACHE_LOCAL_MAX_ENTRIES
+        self.threshold = settings.REMEDIATION_SIMILARITY_THRESHOLD
+        self._local: "OrderedDict[RemediationKey, Dict[str, Any]]" = OrderedDict()
+        self._indexes: Dict[Tuple[str, str], _VectorIndex] = {}
+        self._embedder = embedder or shared_embedder
+
+    def _redis_client(self):
+        return resources.redis()
+
+    @staticmethod
+    def _redis_key(key: RemediationKey) -> str:
+        return "remediation:" + hashlib.sha256(json.dumps(key).encode()).hexdigest()
+
+    def _remember(self, key: RemediationKey, entry: Dict[str, Any]) -> None:
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+
+    async def get_exact(self, keys: Sequence[RemediationKey]) -> Dict[RemediationKey, Dict[str, Any]]:
+        found = {}
+        remote = []
+        for key in keys:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+                found[key] = entry
+            else:
+                remote.append(key)
+
+        if remote:
+            try:
+                values = await self._redis_client().mget([self._redis_key(key) for key in remote])
+            except Exception as e:
+                logger.debug("Remediation cache read failed: %s", e)
+                values = [None] * len(remote)
+            for key, value in zip(remote, values):
+                if value is not None:
+                    entry = json.loads(value)
+                    self._remember(key, entry)
+                    found[key] = entry
+        return found
+
+    async def embed(self, texts: Sequence[str]) -> Optional["np.ndarray"]:
+        if not texts:
+            return None
+        return await asyncio.to_thread(self._embedder.encode, texts)
+
+    def get_semantic(
+        self, keys: Sequence[RemediationKey], vectors: Optional["np.ndarray"]
+    ) -> Dict[RemediationKey, Tuple[Dict[str, Any], float]]:
+        if vectors is None:
+            return {}
+        found = {}
+        # One matrix product per (scanner, model) index
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for row, key in enumerate(keys):
+            groups.setdefault((key[0], key[3]), []).append(row)
+        for group, rows in groups.items():
+            index = self._indexes.get(group)
+            if index is None:
+                continue
+            for row, (entry, similarity) in zip(rows, index.search(vectors[rows])):
+                if entry is not None and similarity >= self.threshold:
+                    found[keys[row]] = (entry, similarity)
+        return found
+
+    async def put(self, key: RemediationKey, entry: Dict[str, Any], vector: Optional["np.ndarray"]) -> None:
+        self._remember(key, entry)
+        if vector is not None:
+            group = (key[0], key[3])
+            if group not in self._indexes:
+                self._indexes[group] = _VectorIndex(settings.REMEDIATION_SEMANTIC_MAX_ENTRIES)
+            self._indexes[group].add(vector, entry)
+        try:
+            await self._redis_client().set(
+                self._redis_key(key), json.dumps(entry), ex=settings.REMEDIATION_CACHE_TTL_SECONDS
+            )
+        except Exception as e:
+            logger.debug("Remediation cache write failed: %s", e)
+
+
+class RemediationGenerator:
+    """
+    Generates remediation for many findings at once.
+
+    Findings are grouped by exact key, so hundreds of findings of one
+    check cost one lookup. Keys missing from both cache levels are sent
+    to the LLM REMEDIATION_BATCH_SIZE per prompt, with concurrency bounded
+    by the Ollama client; concurrent requests for a key already being
+    generated wait for that result instead of asking again.
+    """
+
+    def __init__(self, client: Optional[OllamaClient] = None, cache: Optional[RemediationCache] = None):
+        self.client = client or ollama_client
+        self.cache = cache or RemediationCache()
+        self._inflight: Dict[RemediationKey, asyncio.Future] = {}
+
+    async def remediate(self, session: AsyncSession, findings: Sequence[Finding]) -> Dict[int, Dict[str, Any]]:
+        """Remediation per finding id; stored on the findings and as AIAnalysis rows"""
+        model = self.client.model
+        started = time.monotonic()
+
+        representatives: Dict[RemediationKey, Finding] = {}
+        for finding in findings:
+            representatives.setdefault(finding_key(finding, model), finding)
+        keys = list(representatives)
+
+        results: Dict[RemediationKey, Dict[str, Any]] = {}
+        for key, entry in (await self.cache.get_exact(keys)).items():
+            results[key] = {**entry, "cache": "exact"}
+
+        missing = [key for key in keys if key not in results]
+        vectors = await self.cache.embed([embedding_text(representatives[key]) for key in missing])
+        for key, (entry, similarity) in self.cache.get_semantic(missing, vectors).items():
+            results[key] = {**entry, "cache": "semantic", "similarity": round(similarity, 4)}
+
+        lookup_ms = int((time.monotonic() - started) * 1000)
+        for result in results.values():
+            result["processing_time_ms"] = lookup_ms
+
+        vector_of = {key: vectors[row] for row, key in enumerate(missing)} if vectors is not None else {}
+        to_generate = [key for key in missing if key not in results]
+        results.update(await self._generate(to_generate, representatives, vector_of))
+
+        for finding in findings:
+            result = results[finding_key(finding, model)]
+            finding.ai_remediation = json.dumps(result["remediation"], ensure_ascii=False)
+            session.add(AIAnalysis(
+                audit_id=finding.audit_id,
+                finding_id=finding.id,
+                analysis_type="remediation",
+                prompt=result.get("prompt", ""),
+                response=finding.ai_remediation,
+                model_used=result["model"],
+                confidence=result["remediation"].get("confidence"),
+                tokens_used=result.get("tokens") if result["cache"] == "miss" else 0,
+                processing_time_ms=result["processing_time_ms"],
+            ))
+        await session.commit()
+
+        return {
+            finding.id: {
+                key: value
+                for key, value in results[finding_key(finding, model)].items()
+                if key not in ("prompt", "tokens")
+            }
+            for finding in findings
+        }
+
+    async def _generate(
+        self,
+        keys: List[RemediationKey],
+        representatives: Dict[RemediationKey, Finding],
+        vector_of: Dict[RemediationKey, "np.ndarray"],
+    ) -> Dict[RemediationKey, Dict[str, Any]]:
+        waiting = {key: self._inflight[key] for key in keys if key in self._inflight}
+        owned = [key for key in keys if key not in waiting]
+        loop = asyncio.get_running_loop()
+        for key in owned:
+            self._inflight[key] = loop.create_future()
+
+        try:
+            size = settings.REMEDIATION_BATCH_SIZE
+            batches = [owned[start:start + size] for start in range(0, len(owned), size)]
+            generated: Dict[RemediationKey, Dict[str, Any]] = {}
+            for batch_results in await asyncio.gather(
+                *(self._generate_batch(batch, representatives) for batch in batches)
+            ):
+                generated.update(batch_results)
+
+            for key, entry in generated.items():
+                if not entry.get("error"):
+                    await self.cache.put(key, entry, vector_of.get(key))
+                self._inflight[key].set_result(entry)
+        finally:
+            for key in owned:
+                future = self._inflight.pop(key)
+                if not future.done():
+                    future.cancel()
+
+        for key, future in waiting.items():
+            try:
+                generated[key] = {**await asyncio.shield(future), "cache": "shared"}
+            except asyncio.CancelledError:
+                generated.update(await self._generate([key], representatives, vector_of))
+        return generated
+
+    async def _generate_batch(
+        self, keys: List[RemediationKey], representatives: Dict[RemediationKey, Finding]
+    ) -> Dict[RemediationKey, Dict[str, Any]]:
+        prompt = REMEDIATION_PROMPT.format(
+            findings="\n".join(prompt_line(item_id, representatives[key]) for item_id, key in enumerate(keys))
+        )
+        try:
+            output = await self.client.generate(prompt)
+            items = json.loads(output["response"]).get("items", [])
+            by_id = {item.get("id"): item for item in items if isinstance(item, dict)}
+        except (OllamaError, ValueError, AttributeError) as e:
+            logger.warning("Remediation batch of %d failed: %s", len(keys), e)
+            output, by_id = None, {}
+
+        results = {}
+        retry = []
+        for item_id, key in enumerate(keys):
+            item = by_id.get(item_id)
+            if item is not None:
+                item.pop("id", None)
+                results[key] = {
+                    "remediation": item,
+                    "model": self.client.model,
+                    "cache": "miss",
+                    "prompt": prompt,
+                    "tokens": output["tokens"] // len(keys),
+                    "processing_time_ms": output["processing_time_ms"],
+                }
+            else:
+                retry.append(key)
+
+        if retry and len(keys) > 1 and output is not None:
+            # The model dropped some items: ask for those one at a time
+            for single in await asyncio.gather(*(self._generate_batch([key], representatives) for key in retry)):
+                results.update(single)
+        else:
+            for key in retry:
+                results[key] = self._fallback(key, representatives[key])
+        return results
+
+    def _fallback(self, key: RemediationKey, finding: Finding) -> Dict[str, Any]:
+        """Scanner-provided remediation when the LLM is unavailable (not cached)"""
+        return {
+            "remediation": {
+                "automated": {"available": False, "type": "none", "code": "", "description": ""},
+                "manual": {"steps": [finding.remediation] if finding.remediation else []},
+                "risk_if_ignored": None,
+                "estimated_fix_time": None,
+                "confidence": 0.0,
+            },
+            "model": key[3],
+            "cache": "miss",
+            "error": "LLM unavailable",
+            "processing_time_ms": 0,
+        }
+
+
+remediation_generator = RemediationGenerator()
@@ -12,11 +12,17 @@ async_database_url = settings.DATABASE_URL.replace(
     "postgresql://", "postgresql+asyncpg://"
 )
 
-# Async engine for modern async operations
+# Async engine for modern async operations; its pool is the process's
+# asyncpg pool (see core.resources for warm-up, probes and metrics)
 async_engine = create_async_engine(
     async_database_url,
-    echo=settings.DEBUG,
+    echo=settings.DATABASE_ECHO,
     future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=True,
 )
 
 # Async session factory
@@ -29,7 +35,7 @@ AsyncSessionLocal = sessionmaker(
 # Sync engine for Alembic migrations
 sync_engine = create_engine(
     settings.DATABASE_URL,
-    echo=settings.DEBUG,
+    echo=settings.DATABASE_ECHO,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
@@ -0,0 +1,113 @@
+"""
+Import-time profile of a process entry point, with a startup budget
+
+    python -m app.core.import_profile                      # app.main
+    python -m app.core.import_profile app.tasks.celery_app --top 30
+    python -m app.core.import_profile --budget 1.5         # exit 1 if slower
+
+Each run imports the module in a fresh interpreter with ``-X importtime``
+and reports the slowest packages and modules, plus any HEAVY_MODULES that
+got loaded eagerly. The exit status is non-zero when the best of
+``--repeat`` runs exceeds ``--budget`` or a heavy module was loaded, so
+CI can run it as a startup regression check; tests/test_import_time.py
+runs it on every test run.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+import argparse
+import json
+import subprocess
+import sys
+
+from .lazy import HEAVY_MODULES
+
+DEFAULT_TARGET = "app.main"
+DEFAULT_BUDGET_SECONDS = 2.0
+
+# Prints the wall time and the loaded modules after -X importtime's own output
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {target}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+class Profile(NamedTuple):
+    seconds: float
+    timings: List[ImportTiming]
+    heavy: List[str]
+
+
+def parse_importtime(stderr: str) -> List[ImportTiming]:
+    """Lines of ``import time: self [us] | cumulative | imported package``"""
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        timings.append(ImportTiming(fields[2].strip(), int(fields[0]), int(fields[1])))
+    return timings
+
+
+def profile(target: str) -> Profile:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(target=target)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    loaded = set(report["modules"])
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    return Profile(report["seconds"], parse_importtime(result.stderr), heavy)
+
+
+def by_package(timings: List[ImportTiming]) -> List[Tuple[str, int]]:
+    """Self time summed per top-level package, slowest first"""
+    totals: Dict[str, int] = {}
+    for timing in timings:
+        package = timing.module.split(".")[0]
+        totals[package] = totals.get(package, 0) + timing.self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("target", nargs="?", default=DEFAULT_TARGET, help="module to import")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS, help="seconds")
+    parser.add_argument("--repeat", type=int, default=3, help="runs; the fastest is reported")
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    args = parser.parse_args(argv)
+
+    runs = [profile(args.target) for _ in range(max(1, args.repeat))]
+    best = min(runs, key=lambda run: run.seconds)
+
+    print(f"import {args.target}: {best.seconds:.3f}s (best of {len(runs)}, budget {args.budget:.3f}s)")
+    print(f"\n{'package':<40} {'self ms':>10}")
+    for package, self_us in by_package(best.timings)[: args.top]:
+        print(f"{package:<40} {self_us / 1000:>10.1f}")
+    print(f"\n{'module':<60} {'cumulative ms':>14}")
+    for timing in sorted(best.timings, key=lambda timing: timing.cumulative_us, reverse=True)[: args.top]:
+        print(f"{timing.module:<60} {timing.cumulative_us / 1000:>14.1f}")
+
+    failed = False
+    if best.heavy:
+        print(f"\nFAIL: heavy modules imported eagerly: {', '.join(best.heavy)}")
+        failed = True
+    if best.seconds > args.budget:
+        print(f"\nFAIL: import took {best.seconds:.3f}s, over the {args.budget:.3f}s budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Deferred imports of heavy optional subsystems
+"""
+from types import ModuleType
+import importlib
+
+# Packages that cost seconds or hundreds of MB to import. API and worker
+# processes must only load them when a request actually needs them:
+# import them inside the function that uses them, or through
+# ``lazy_import`` when a whole module uses them. ``import_profile``
+# reports any of these loaded by a plain ``import app.main``.
+HEAVY_MODULES = (
+    "numpy",
+    "pyarrow",
+    "chromadb",
+    "sentence_transformers",
+    "torch",
+    "transformers",
+    "langchain",
+    "langchain_community",
+    "boto3",
+    "botocore",
+    "kubernetes",
+    "azure",
+    "google.cloud",
+    "reportlab",
+)
+
+
+class LazyModule(ModuleType):
+    """
+    Stand-in for a module, imported on first attribute access.
+
+    After loading, the real module's namespace is copied onto the stand-in
+    so later lookups are plain attribute reads. Annotations that name the
+    module's types must be strings, or they trigger the import at
+    definition time.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_loaded"] = False
+
+    def _load(self) -> ModuleType:
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        self.__dict__["_lazy_loaded"] = True
+        return module
+
+    def __getattr__(self, attribute: str):
+        if self.__dict__["_lazy_loaded"]:
+            raise AttributeError(f"module {self.__name__!r} has no attribute {attribute!r}")
+        return getattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_loaded"] else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """``np = lazy_import("numpy")`` instead of ``import numpy as np``"""
+    return LazyModule(name)
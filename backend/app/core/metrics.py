@@ -0,0 +1,162 @@
+"""
+Prometheus metrics of the scan pipeline
+
+The API and the Celery workers record the same metrics. With
+PROMETHEUS_MULTIPROC_DIR pointing at a directory shared by all of them
+(prometheus_client's multiprocess mode), every process writes its samples
+there and the API's /metrics serves the aggregate; without it, each
+process only exposes its own. The directory must be emptied when the
+deployment is restarted, before any process starts (docker-entrypoint.sh
+removes the files of the container it runs in).
+"""
+from typing import Dict, Iterator, Optional
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+import os
+import socket
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess, values
+
+# Read by prometheus_client itself, so it has to be in the environment
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+# Scanner label of stages that are not specific to one scanner
+ALL_SCANNERS = "all"
+
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+RATE_BUCKETS = (1, 10, 50, 100, 500, 1000, 5000, 10000, 25000, 50000, 100000)
+BYTES_BUCKETS = tuple(1024 * 4 ** exponent for exponent in range(12))  # 1 KiB to 4 GiB
+QUEUE_BUCKETS = (0.01, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 900, 1800)
+
+
+def _process_identifier() -> str:
+    # The API and worker containers share the directory, not a PID namespace
+    return f"{socket.gethostname().replace('_', '-')}-{os.getpid()}"
+
+
+if MULTIPROCESS_DIR:
+    # Before any metric below is created: each one opens its file on creation
+    values.ValueClass = values.MultiProcessValue(_process_identifier)
+
+
+SCAN_STAGE_SECONDS = Histogram(
+    "compliance_scan_stage_duration_seconds",
+    "Time spent per scanner and pipeline stage",
+    ["scanner", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+SCAN_FINDINGS = Counter(
+    "compliance_scan_findings_total",
+    "Findings produced by scanner runs",
+    ["scanner"],
+)
+SCAN_FINDINGS_PER_SECOND = Histogram(
+    "compliance_scan_findings_per_second",
+    "Findings per second of wall time of a scanner run",
+    ["scanner"],
+    buckets=RATE_BUCKETS,
+)
+SCANNER_OUTPUT_BYTES = Histogram(
+    "compliance_scanner_output_bytes",
+    "Size of the report written by a scanner process",
+    ["scanner"],
+    buckets=BYTES_BUCKETS,
+)
+SCANNER_EXITS = Counter(
+    "compliance_scanner_exits_total",
+    "Scanner processes by exit code",
+    ["scanner", "exit_code"],
+)
+SCAN_QUEUE_WAIT_SECONDS = Histogram(
+    "compliance_scan_queue_wait_seconds",
+    "Time a scanner run waited for a concurrency slot (orchestrator) or a worker (celery)",
+    ["scanner", "queue"],
+    buckets=QUEUE_BUCKETS,
+)
+SCANS_IN_FLIGHT = Gauge(
+    "compliance_scans_in_flight",
+    "Scanner runs currently executing",
+    ["scanner"],
+    multiprocess_mode="livesum",
+)
+TRIVY_CACHE_REQUESTS = Counter(
+    "compliance_trivy_cache_requests_total",
+    "Trivy result cache lookups",
+    ["result"],
+)
+
+
+# Stage totals of the audit being profiled (services.profiling), by scanner
+_stage_totals: ContextVar[Optional[Dict[str, Dict[str, float]]]] = ContextVar("stage_totals", default=None)
+
+
+def observe_stage(scanner: str, stage: str, seconds: float) -> None:
+    SCAN_STAGE_SECONDS.labels(scanner, stage).observe(seconds)
+    totals = _stage_totals.get()
+    if totals is not None:
+        by_stage = totals.setdefault(scanner, {})
+        by_stage[stage] = by_stage.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def time_stage(scanner: str, stage: str) -> Iterator[None]:
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(scanner, stage, perf_counter() - started)
+
+
+@contextmanager
+def collect_stages() -> Iterator[Dict[str, Dict[str, float]]]:
+    """
+    Also sum the stages observed in this context into a dict
+
+    Tasks and threads started inside the block inherit the context, so
+    the concurrent scanner jobs of an audit all report into it.
+    """
+    totals: Dict[str, Dict[str, float]] = {}
+    token = _stage_totals.set(totals)
+    try:
+        yield totals
+    finally:
+        _stage_totals.reset(token)
+
+
+def record_process(scanner: str, returncode: Optional[int], output_bytes: int, seconds: float) -> None:
+    """Exit code, report size and lifetime of a finished scanner process"""
+    SCANNER_EXITS.labels(scanner, str(returncode)).inc()
+    observe_stage(scanner, "subprocess", seconds)
+    SCANNER_OUTPUT_BYTES.labels(scanner).observe(output_bytes)
+
+
+def record_run(scanner: str, findings: int, seconds: float) -> None:
+    """Findings and throughput of one complete scanner run"""
+    SCAN_FINDINGS.labels(scanner).inc(findings)
+    observe_stage(scanner, "total", seconds)
+    if seconds > 0:
+        SCAN_FINDINGS_PER_SECOND.labels(scanner).observe(findings / seconds)
+
+
+def exposition(*collectors) -> bytes:
+    """
+    Text exposition for /metrics
+
+    In multiprocess mode the samples of every process are read from the
+    shared directory; ``collectors`` (live, per-process values such as
+    pool sizes) are added to them.
+    """
+    if not MULTIPROCESS_DIR:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, MULTIPROCESS_DIR)
+    for collector in collectors:
+        registry.register(collector)
+    return generate_latest(registry)
+
+
+def mark_process_dead() -> None:
+    """Drop this process's in-flight gauges when it exits (multiprocess mode)"""
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(_process_identifier(), MULTIPROCESS_DIR)
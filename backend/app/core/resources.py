@@ -0,0 +1,257 @@
+"""
+Shared connection pools owned by the application lifespan
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+
+from .config import settings
+from .database import async_engine
+from .lazy import lazy_import
+
+# Loaded on the first Ollama call (httpx also imports its CLI: click, rich)
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceManager:
+    """
+    One configured pool per backing service, shared by the whole process.
+
+    - PostgreSQL: the async engine's asyncpg pool (core.database)
+    - Redis: one connection pool per response decoding mode
+    - HTTP (Ollama): one httpx client with keep-alive connections
+    - MinIO: one boto3 S3 client with its own urllib3 pool
+
+    Clients are created on first use, so scripts and workers only open
+    what they need. The API lifespan calls ``warm`` at startup and
+    ``close`` at shutdown; Celery tasks call ``close`` after each run
+    because asyncio connections are bound to the loop that opened them.
+    """
+
+    def __init__(self):
+        self._redis: Dict[bool, Any] = {}
+        self._http: Optional["httpx.AsyncClient"] = None
+        self._s3 = None
+
+    @property
+    def engine(self):
+        return async_engine
+
+    def redis(self, decode_responses: bool = False):
+        client = self._redis.get(decode_responses)
+        if client is None:
+            import redis.asyncio as redis
+
+            pool = redis.ConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                decode_responses=decode_responses,
+                socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+                health_check_interval=30,
+            )
+            # from_pool: the client owns the pool, so aclose() disconnects it
+            client = redis.Redis.from_pool(pool)
+            self._redis[decode_responses] = client
+        return client
+
+    def http(self) -> "httpx.AsyncClient":
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=settings.HTTP_TIMEOUT_SECONDS,
+            )
+        return self._http
+
+    def s3(self):
+        """boto3 client for MinIO (blocking: call it from a worker thread)"""
+        if self._s3 is None:
+            import boto3
+            from botocore.config import Config
+
+            scheme = "https" if settings.MINIO_SECURE else "http"
+            self._s3 = boto3.client(
+                "s3",
+                endpoint_url=f"{scheme}://{settings.MINIO_ENDPOINT}",
+                aws_access_key_id=settings.MINIO_ACCESS_KEY,
+                aws_secret_access_key=settings.MINIO_SECRET_KEY,
+                config=Config(
+                    max_pool_connections=settings.MINIO_MAX_POOL_CONNECTIONS,
+                    connect_timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+                    retries={"max_attempts": 2},
+                ),
+            )
+        return self._s3
+
+    # ------------------------------------------------------------------
+    # Probes
+    # ------------------------------------------------------------------
+
+    async def _probe_database(self) -> None:
+        async with self.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def _probe_redis(self) -> None:
+        await self.redis().ping()
+
+    async def _probe_ollama(self) -> None:
+        response = await self.http().get(f"{settings.OLLAMA_URL}/api/tags")
+        response.raise_for_status()
+
+    async def _probe_minio(self) -> None:
+        await asyncio.to_thread(self.s3().head_bucket, Bucket=settings.MINIO_BUCKET)
+
+    @property
+    def probes(self) -> Dict[str, Callable[[], Awaitable[None]]]:
+        return {
+            "database": self._probe_database,
+            "redis": self._probe_redis,
+            "ai": self._probe_ollama,
+            "storage": self._probe_minio,
+        }
+
+    async def _timed(self, probe: Callable[[], Awaitable[None]], timeout: float) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(probe(), timeout)
+            status, error = "operational", None
+        except asyncio.TimeoutError:
+            status, error = "down", f"no answer within {timeout}s"
+        except Exception as e:
+            status, error = "down", f"{type(e).__name__}: {e}"
+        return {
+            "status": status,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "error": error,
+        }
+
+    async def probe(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Probe every service concurrently through the shared pools"""
+        timeout = timeout or settings.HEALTH_PROBE_TIMEOUT_SECONDS
+        names = list(self.probes)
+        results = await asyncio.gather(*(self._timed(self.probes[name], timeout) for name in names))
+        return dict(zip(names, results))
+
+    async def warm(self) -> Dict[str, Dict[str, Any]]:
+        """Open the first connections of every pool before serving traffic"""
+        async def database() -> None:
+            # Several at once, so early requests do not all wait on connects
+            await asyncio.gather(
+                *(self._probe_database() for _ in range(min(settings.DB_POOL_WARM_CONNECTIONS, settings.DB_POOL_SIZE)))
+            )
+
+        timeout = settings.HEALTH_PROBE_TIMEOUT_SECONDS
+        probes = {**self.probes, "database": database}
+        names = list(probes)
+        results = dict(zip(names, await asyncio.gather(*(self._timed(probes[name], timeout) for name in names))))
+        for name, result in results.items():
+            if result["error"]:
+                logger.warning("Could not warm %s pool: %s", name, result["error"])
+        return results
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """Connections per pool: size, in use and idle (0 for pools not opened yet)"""
+        pool = self.engine.pool
+        stats = {
+            "database": {
+                "max": settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+                "open": pool.checkedin() + pool.checkedout(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+            }
+        }
+
+        in_use = idle = 0
+        for client in self._redis.values():
+            connection_pool = client.connection_pool
+            in_use += len(getattr(connection_pool, "_in_use_connections", ()))
+            idle += len(getattr(connection_pool, "_available_connections", ()))
+        stats["redis"] = {
+            "max": settings.REDIS_MAX_CONNECTIONS * max(1, len(self._redis)),
+            "open": in_use + idle,
+            "in_use": in_use,
+            "idle": idle,
+        }
+
+        connections = []
+        if self._http is not None:
+            # httpcore does not publish pool statistics; read its connection list
+            transport_pool = getattr(self._http._transport, "_pool", None)
+            connections = list(getattr(transport_pool, "connections", ()))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        stats["http"] = {
+            "max": settings.HTTP_MAX_CONNECTIONS,
+            "open": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+        }
+
+        in_use = idle = 0
+        if self._s3 is not None:
+            # botocore's urllib3 PoolManager keeps one HTTPConnectionPool per
+            # host; its queue holds idle connections and None for free slots
+            manager = getattr(getattr(self._s3._endpoint, "http_session", None), "_manager", None)
+            pools = getattr(manager, "pools", None)
+            for key in pools.keys() if pools is not None else ():
+                queue = getattr(pools.get(key), "pool", None)
+                if queue is not None:
+                    waiting = list(queue.queue)
+                    in_use += queue.maxsize - len(waiting)
+                    idle += sum(1 for connection in waiting if connection is not None)
+        stats["minio"] = {
+            "max": settings.MINIO_MAX_POOL_CONNECTIONS,
+            "open": in_use + idle,
+            "in_use": in_use,
+            "idle": idle,
+        }
+        return stats
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def close(self) -> None:
+        for client in self._redis.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug("Closing Redis pool failed: %s", e)
+        self._redis = {}
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        await self.engine.dispose()
+
+
+class PoolMetricsCollector:
+    """Prometheus collector reading ResourceManager.pool_stats at scrape time"""
+
+    def __init__(self, manager: ResourceManager):
+        self.manager = manager
+
+    def collect(self):
+        from prometheus_client.core import GaugeMetricFamily
+
+        family = GaugeMetricFamily(
+            "compliance_radar_pool_connections",
+            "Connections of the shared pools by state",
+            labels=["pool", "state"],
+        )
+        for pool, stats in self.manager.pool_stats().items():
+            for state, value in stats.items():
+                family.add_metric([pool, state], value)
+        yield family
+
+
+resources = ResourceManager()
@@ -2,15 +2,81 @@
 Compliance Radar - Revolutionary Multi-Cloud Compliance Platform
 Main FastAPI application with modern async architecture
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY
 from prometheus_fastapi_instrumentator import Instrumentator
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from contextlib import asynccontextmanager
 import asyncio
 from datetime import datetime
 
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .ai.ollama_client import OllamaError
+from .ai.rag_engine import rag_engine
+from .ai.remediation_generator import remediation_generator
 from .core.config import settings
+from .core.database import AsyncSessionLocal, get_db
+from .core.metrics import exposition, mark_process_dead
+from .core.resources import PoolMetricsCollector, resources
+from .models.models import Audit, Environment, Finding, Report, ScanStatusEnum, SeverityEnum
+from .scanners.registry import scanner_registry
+from .services.archive import findings_archive
+from .services.diff import audit_diff_engine, diff_to_dict
+from .services.export import EXPORT_FORMATS, export_findings, export_headers, export_media_type
+from .services.mapping_engine import mapping_engine
+from .services.orchestrator import scan_orchestrator
+from .services.pagination import InvalidCursor, clamp_limit, decode_cursor, decode_timestamp, next_cursor
+from .services.profiling import MEDIA_TYPES, REPORT_TYPE, audit_profiler
+from .services.progress import progress_hub
+from .services.raw_store import raw_blob_store
+from .services.response_cache import response_cache
+from .services.rollups import rollup_service
+from .services.scan_failures import real_findings
+from .services.trends import trend_analyzer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources and background services; release them on shutdown"""
+    print(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} starting...")
+    print(f"📚 API Documentation: http://localhost:8000/docs")
+    print(f"💚 Health Check: http://localhost:8000/health")
+    print(f"📊 Metrics: http://localhost:8000/metrics")
+
+    # Connection pools first: everything below may use them
+    for name, result in (await resources.warm()).items():
+        print(f"🔌 {name}: {result['status']} ({result['latency_ms']} ms)")
+
+    # Probe scanner binaries once; audits reuse the cached scanner objects
+    for info in (await scanner_registry.discover()).values():
+        status = info.version if info.available else "not installed"
+        print(f"🔍 Scanner {info.name}: {status}")
+
+    # Regulation mappings, hot-reloaded when regulation-mappings/ changes
+    mapping_engine.start()
+    print(f"🗺️  Regulations loaded: {', '.join(mapping_engine.index.regulations) or 'none'}")
+
+    # Cross-worker invalidation of cached responses
+    response_cache.start()
+
+    # Chat retrieval index: embeds only controls that changed since last run
+    rag_engine.start()
+
+    yield
+
+    await mapping_engine.stop()
+    await response_cache.stop()
+    await progress_hub.stop()
+    await rag_engine.stop()
+    await resources.close()
+    # --reload and worker restarts start new processes: drop this one's gauges
+    mark_process_dead()
+    print(f"👋 {settings.APP_NAME} shutting down...")
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -19,6 +85,7 @@ app = FastAPI(
     description="Revolutionary open-source compliance platform for multi-cloud and Kubernetes",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS Configuration
@@ -30,8 +97,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Prometheus metrics
-Instrumentator().instrument(app).expose(app)
+# Prometheus metrics: HTTP latency here, scan pipeline stages in core.metrics
+Instrumentator().instrument(app)
+pool_metrics = PoolMetricsCollector(resources)
+REGISTRY.register(pool_metrics)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition, aggregated over the API and Celery worker processes"""
+    return Response(exposition(pool_metrics), media_type=CONTENT_TYPE_LATEST)
 
 
 # ============================================================================
@@ -60,26 +135,108 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint with detailed status"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "version": settings.APP_VERSION,
-        "services": {
-            "api": "operational",
-            "database": "operational",  # TODO: Add real DB check
-            "redis": "operational",     # TODO: Add real Redis check
-            "ai": "operational"          # TODO: Add real Ollama check
-        }
-    }
+    """Health check endpoint with detailed status, probing every service concurrently"""
+    checks = await resources.probe()
+    if checks["database"]["status"] != "operational":
+        status, status_code = "unhealthy", 503
+    elif any(check["status"] != "operational" for check in checks.values()):
+        status, status_code = "degraded", 200
+    else:
+        status, status_code = "healthy", 200
+
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "status": status,
+            "timestamp": datetime.utcnow().isoformat(),
+            "version": settings.APP_VERSION,
+            "services": {
+                "api": "operational",
+                **{name: check["status"] for name, check in checks.items()},
+            },
+            "checks": checks,
+            "pools": resources.pool_stats(),
+        },
+    )
 
 
 # ============================================================================
 # SCAN ENDPOINTS
 # ============================================================================
 
+def _decode_cursor(cursor: str, types: List[type]) -> List[Any]:
+    try:
+        return decode_cursor(cursor, types)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _finding_to_dict(finding: Finding) -> Dict[str, Any]:
+    return {
+        "id": finding.id,
+        "scanner": finding.scanner,
+        "check_id": finding.check_id,
+        "title": finding.title,
+        "description": finding.description,
+        "severity": finding.severity.value,
+        "resource_type": finding.resource_type,
+        "resource_id": finding.resource_id,
+        "resource_region": finding.resource_region,
+        "remediation": finding.remediation,
+        "status": finding.status,
+        "regulations": sorted({
+            code for code, _ in mapping_engine.lookup(finding.scanner, finding.check_id)
+        }),
+        "cve": finding.check_id if finding.check_id.startswith("CVE-") else None,
+    }
+
+
+async def _list_findings(
+    db: AsyncSession,
+    limit: int,
+    cursor: Optional[str],
+    audit_id: Optional[int] = None,
+    scanner: Optional[str] = None,
+    severity: Optional[SeverityEnum] = None,
+    status: Optional[str] = None,
+) -> Dict[str, Any]:
+    """One keyset page of findings ordered by (severity, id)"""
+    limit = clamp_limit(limit, settings.PAGINATION_MAX_LIMIT)
+    query = select(Finding)
+    if audit_id is not None:
+        query = query.where(Finding.audit_id == audit_id)
+    if scanner is not None:
+        query = query.where(Finding.scanner == scanner)
+    if severity is not None:
+        query = query.where(Finding.severity == severity)
+    if status is not None:
+        query = query.where(Finding.status == status)
+    if cursor:
+        severity_name, finding_id = _decode_cursor(cursor, [str, int])
+        if severity_name not in SeverityEnum.__members__:
+            raise HTTPException(status_code=400, detail="Malformed cursor")
+        query = query.where(
+            tuple_(Finding.severity, Finding.id) > (SeverityEnum[severity_name], finding_id)
+        )
+
+    rows = (
+        await db.execute(query.order_by(Finding.severity, Finding.id).limit(limit + 1))
+    ).scalars().all()
+
+    return {
+        "limit": limit,
+        "next_cursor": next_cursor(rows, limit, lambda finding: (finding.severity.name, finding.id)),
+        "findings": [_finding_to_dict(finding) for finding in rows[:limit]],
+    }
+
+
 @app.post("/api/v1/scans")
-async def create_scan(scan_config: Dict[str, Any], background_tasks: BackgroundTasks):
+async def create_scan(
+    scan_config: Dict[str, Any],
+    background_tasks: BackgroundTasks,
+    profile: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
     """
     Create and execute a new security scan
 
@@ -89,166 +246,405 @@ async def create_scan(scan_config: Dict[str, Any], background_tasks: BackgroundT
         "scanners": ["prowler", "kube-bench", "trivy"],
         "targets": [
             {"type": "aws", "profile": "default"},
-            {"type": "kubernetes", "context": "my-cluster"}
+            {"type": "kubernetes", "context": "my-cluster", "timeout": 600}
         ]
     }
+
+    ``profile=true`` samples the orchestration and stores a flamegraph
+    with per-stage timings, listed by GET /api/v1/scans/{id}/profile.
     """
-    # For now, return enhanced mock data with multiple findings
-    scan_id = 1
+    environment_id = scan_config.get("environment_id")
+    scanners = scan_config.get("scanners", ["prowler", "kube-bench"])
+    targets = scan_config.get("targets", [])
+
+    environment = await db.get(Environment, environment_id) if environment_id else None
+    if environment is None:
+        raise HTTPException(status_code=404, detail="Environment not found")
+
+    try:
+        jobs = scan_orchestrator.plan(scanners, targets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not jobs:
+        raise HTTPException(status_code=400, detail="No scanner matches the requested targets")
+
+    audit = Audit(environment_id=environment.id, status=ScanStatusEnum.PENDING)
+    db.add(audit)
+    await db.commit()
+
+    # All scanner/target pairs run concurrently once the response is sent
+    background_tasks.add_task(scan_orchestrator.run_audit, audit.id, scanners, targets, profile)
 
-    # Simulate async scan execution
     return {
         "status": "success",
-        "scan_id": scan_id,
+        "scan_id": audit.id,
         "message": "Scan initiated successfully",
         "data": {
-            "id": scan_id,
-            "status": "running",
-            "environment": scan_config.get("environment_id", "test-env"),
-            "scanners": scan_config.get("scanners", ["prowler", "kube-bench"]),
-            "started_at": datetime.utcnow().isoformat(),
-            "estimated_duration": "5-10 minutes"
+            "id": audit.id,
+            "status": audit.status.value,
+            "environment": environment.name,
+            "scanners": scanners,
+            "jobs": len(jobs),
+            "profile": profile,
+            "created_at": datetime.utcnow().isoformat(),
         }
     }
 
 
 @app.get("/api/v1/scans")
-async def list_scans(limit: int = 20, offset: int = 0):
-    """List all scans with pagination"""
-    # Mock data for now
+async def list_scans(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    environment_id: Optional[int] = None,
+    status: Optional[ScanStatusEnum] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    List scans, newest first
+
+    Pagination is keyset based: pass ``next_cursor`` of a page as
+    ``cursor`` to fetch the following one.
+    """
+    limit = clamp_limit(limit, settings.PAGINATION_MAX_LIMIT)
+    query = select(Audit, Environment.name).join(Environment, Environment.id == Audit.environment_id)
+    if environment_id is not None:
+        query = query.where(Audit.environment_id == environment_id)
+    if status is not None:
+        query = query.where(Audit.status == status)
+    if cursor:
+        created_at, audit_id = _decode_cursor(cursor, [str, int])
+        try:
+            created_at = decode_timestamp(created_at)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.where(tuple_(Audit.created_at, Audit.id) < (created_at, audit_id))
+
+    rows = (
+        await db.execute(
+            query.order_by(Audit.created_at.desc(), Audit.id.desc()).limit(limit + 1)
+        )
+    ).all()
+    page = rows[:limit]
+
+    # Severity counts of the page's scans only
+    counts: Dict[int, Dict[str, int]] = {}
+    if page:
+        for audit_id, severity, count in (
+            await db.execute(
+                select(Finding.audit_id, Finding.severity, func.count())
+                .where(Finding.audit_id.in_([audit.id for audit, _ in page]), real_findings())
+                .group_by(Finding.audit_id, Finding.severity)
+            )
+        ).all():
+            counts.setdefault(audit_id, {})[severity.value] = count
+
     return {
-        "total": 1,
         "limit": limit,
-        "offset": offset,
+        "next_cursor": next_cursor(rows, limit, lambda row: (row[0].created_at.isoformat(), row[0].id)),
         "scans": [
             {
-                "id": 1,
-                "environment": "Production AWS",
-                "status": "completed",
-                "overall_score": 0.87,
-                "critical_findings": 3,
-                "high_findings": 12,
-                "medium_findings": 28,
-                "started_at": "2025-11-07T10:00:00Z",
-                "completed_at": "2025-11-07T10:08:32Z",
+                "id": audit.id,
+                "environment": environment_name,
+                "status": audit.status.value,
+                "overall_score": audit.overall_score,
+                "critical_findings": counts.get(audit.id, {}).get("critical", 0),
+                "high_findings": counts.get(audit.id, {}).get("high", 0),
+                "medium_findings": counts.get(audit.id, {}).get("medium", 0),
+                "started_at": audit.started_at.isoformat() if audit.started_at else None,
+                "completed_at": audit.completed_at.isoformat() if audit.completed_at else None,
             }
+            for audit, environment_name in page
         ]
     }
 
 
 @app.get("/api/v1/scans/{scan_id}")
-async def get_scan_details(scan_id: int):
-    """Get detailed scan results"""
+async def get_scan_details(scan_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """Get detailed scan results (cached once the scan has completed)"""
+    return await response_cache.respond(
+        request,
+        f"scan:{scan_id}",
+        lambda: _build_scan_details(db, scan_id),
+        tags=(f"scan:{scan_id}", "regulations"),
+    )
 
-    # Enhanced mock data with realistic findings
-    return {
+
+async def _build_scan_details(db: AsyncSession, scan_id: int):
+    """Get detailed scan results"""
+    audit = await db.get(Audit, scan_id)
+    if audit is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    environment = await db.get(Environment, audit.environment_id)
+
+    by_severity = {
+        severity.value: count
+        for severity, count in (
+            await db.execute(
+                select(Finding.severity, func.count())
+                .where(Finding.audit_id == scan_id, real_findings())
+                .group_by(Finding.severity)
+            )
+        ).all()
+    }
+    failed = sum(by_severity.values())
+
+    # Highest severities first; the full list is paginated elsewhere
+    findings = (
+        await db.execute(
+            select(Finding)
+            .where(Finding.audit_id == scan_id)
+            .order_by(Finding.severity, Finding.id)
+            .limit(settings.SCAN_DETAILS_FINDINGS_LIMIT)
+        )
+    ).scalars().all()
+
+    payload = {
         "status": "success",
         "data": {
-            "id": scan_id,
-            "environment": "Production AWS + K8s",
-            "status": "completed",
-            "overall_score": 0.87,
-            "conformity_scores": {
-                "NIS2": 0.85,
-                "ISO27001": 0.89,
-                "DORA": 0.82,
-                "RGPD": 0.91,
-                "HDS": 0.86,
-                "SecNumCloud": 0.84
-            },
+            "id": audit.id,
+            "environment": environment.name if environment else None,
+            "status": audit.status.value,
+            "overall_score": audit.overall_score,
+            "conformity_scores": audit.conformity_scores or {},
             "summary": {
-                "total_checks": 450,
-                "passed": 392,
-                "failed": 58,
-                "by_severity": {
-                    "critical": 3,
-                    "high": 12,
-                    "medium": 28,
-                    "low": 15
-                }
+                "total_checks": audit.total_checks or failed,
+                "passed": max((audit.total_checks or 0) - failed, 0),
+                "failed": failed,
+                "by_severity": by_severity,
             },
-            "findings": [
-                {
-                    "id": 1,
-                    "scanner": "prowler",
-                    "check_id": "s3_bucket_public_access",
-                    "title": "S3 Bucket allows public access",
-                    "description": "The S3 bucket 'prod-data-backups' is configured to allow public access, exposing sensitive data.",
-                    "severity": "critical",
-                    "resource_type": "AWS::S3::Bucket",
-                    "resource_id": "prod-data-backups",
-                    "resource_region": "us-east-1",
-                    "remediation": "Disable public access using bucket policies and ACLs",
-                    "regulations": ["NIS2", "RGPD", "ISO27001"],
-                    "cve": None
-                },
-                {
-                    "id": 2,
-                    "scanner": "prowler",
-                    "check_id": "iam_mfa_not_enabled",
-                    "title": "IAM user without MFA enabled",
-                    "description": "IAM user 'admin-user' does not have MFA enabled, creating a security risk.",
-                    "severity": "high",
-                    "resource_type": "AWS::IAM::User",
-                    "resource_id": "admin-user",
-                    "resource_region": "global",
-                    "remediation": "Enable MFA for all IAM users, especially those with admin privileges",
-                    "regulations": ["NIS2", "DORA", "ISO27001"],
-                    "cve": None
-                },
-                {
-                    "id": 3,
-                    "scanner": "kube-bench",
-                    "check_id": "1.2.3",
-                    "title": "Ensure that the --authorization-mode argument is not set to AlwaysAllow",
-                    "description": "The Kubernetes API server is configured with AlwaysAllow authorization mode.",
-                    "severity": "high",
-                    "resource_type": "Kubernetes::APIServer",
-                    "resource_id": "kube-apiserver",
-                    "resource_region": "eu-west-1",
-                    "remediation": "Set --authorization-mode to Node,RBAC",
-                    "regulations": ["ISO27001", "SecNumCloud"],
-                    "cve": None
-                },
-                {
-                    "id": 4,
-                    "scanner": "trivy",
-                    "check_id": "CVE-2024-1234",
-                    "title": "Critical vulnerability in nginx container",
-                    "description": "nginx:1.20 contains CVE-2024-1234 allowing remote code execution",
-                    "severity": "critical",
-                    "resource_type": "Container::Image",
-                    "resource_id": "nginx:1.20",
-                    "resource_region": "eu-west-1",
-                    "remediation": "Upgrade nginx to version 1.25 or later",
-                    "regulations": ["NIS2", "DORA"],
-                    "cve": "CVE-2024-1234"
-                },
-                {
-                    "id": 5,
-                    "scanner": "prowler",
-                    "check_id": "cloudtrail_not_enabled",
-                    "title": "CloudTrail is not enabled",
-                    "description": "AWS CloudTrail logging is not enabled, preventing audit trail analysis.",
-                    "severity": "high",
-                    "resource_type": "AWS::CloudTrail",
-                    "resource_id": "N/A",
-                    "resource_region": "us-east-1",
-                    "remediation": "Enable CloudTrail for all regions and configure log file validation",
-                    "regulations": ["NIS2", "ISO27001", "DORA"],
-                    "cve": None
-                }
-            ],
-            "started_at": "2025-11-07T10:00:00Z",
-            "completed_at": "2025-11-07T10:08:32Z",
-            "scan_duration_seconds": 512,
-            "scanner_versions": {
-                "prowler": "4.0.0",
-                "kube-bench": "0.7.0",
-                "trivy": "0.50.0"
-            }
+            "findings": [_finding_to_dict(finding) for finding in findings],
+            "started_at": audit.started_at.isoformat() if audit.started_at else None,
+            "completed_at": audit.completed_at.isoformat() if audit.completed_at else None,
+            "scan_duration_seconds": audit.scan_duration_seconds,
+            "scanner_versions": audit.scanner_versions or {},
+            "failed_scanners": audit.failed_scanners or {},
         }
     }
+    return payload, audit.status == ScanStatusEnum.COMPLETED
+
+
+@app.get("/api/v1/scans/{scan_id}/diff")
+async def get_scan_diff(
+    scan_id: int,
+    against: Optional[int] = None,
+    include_hashes: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Compare a scan with an earlier scan of the same environment
+
+    Findings are classified by finding_hash as new, fixed or persisting.
+    Without ``against`` the previous completed scan is used.
+    """
+    audit = await db.get(Audit, scan_id)
+    if audit is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    if against is None:
+        against = await audit_diff_engine.previous_audit_id(db, audit)
+        if against is None:
+            raise HTTPException(status_code=404, detail="No earlier scan to compare with")
+
+    baseline = await db.get(Audit, against)
+    if baseline is None:
+        raise HTTPException(status_code=404, detail="Comparison scan not found")
+    if baseline.environment_id != audit.environment_id:
+        raise HTTPException(status_code=400, detail="Scans belong to different environments")
+    if audit.status != ScanStatusEnum.COMPLETED or baseline.status != ScanStatusEnum.COMPLETED:
+        raise HTTPException(status_code=409, detail="Both scans must be completed")
+
+    diff = await audit_diff_engine.get_or_compute(db, audit.id, baseline.id)
+    return {"status": "success", "data": diff_to_dict(diff, include_hashes)}
+
+
+@app.get("/api/v1/scans/{scan_id}/findings")
+async def list_scan_findings(
+    scan_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    scanner: Optional[str] = None,
+    severity: Optional[SeverityEnum] = None,
+    status: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Findings of a scan, most severe first, with keyset pagination"""
+    if await db.get(Audit, scan_id) is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    page = await _list_findings(db, limit, cursor, scan_id, scanner, severity, status)
+    return {"status": "success", "scan_id": scan_id, **page}
+
+
+@app.get("/api/v1/scans/{scan_id}/findings/export")
+async def export_scan_findings(
+    scan_id: int,
+    format: str = "ndjson",
+    gzip: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Stream every finding of a scan as NDJSON or CSV
+
+    Rows are read through a server-side cursor and written as they
+    arrive, so memory use does not grow with the size of the scan.
+    ``gzip=true`` compresses the stream on the fly.
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if await db.get(Audit, scan_id) is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    return StreamingResponse(
+        export_findings(scan_id, format, gzip),
+        media_type=export_media_type(format, gzip),
+        headers=export_headers(scan_id, format, gzip),
+    )
+
+
+@app.get("/api/v1/scans/{scan_id}/profile")
+async def get_scan_profile(scan_id: int, db: AsyncSession = Depends(get_db)):
+    """Profiles recorded for a scan created with ``profile=true``, newest first"""
+    if await db.get(Audit, scan_id) is None:
+        raise HTTPException(status_code=404, detail="Scan not found")
+    reports = (
+        await db.execute(
+            select(Report)
+            .where(Report.audit_id == scan_id, Report.report_type == REPORT_TYPE)
+            .order_by(Report.id.desc())
+        )
+    ).scalars().all()
+    return {
+        "status": "success",
+        "scan_id": scan_id,
+        "data": [
+            {
+                "id": report.id,
+                "title": report.title,
+                "format": report.format,
+                "file_size_bytes": report.file_size_bytes,
+                "download": f"/api/v1/reports/{report.id}/download",
+                "created_at": report.created_at.isoformat() if report.created_at else None,
+            }
+            for report in reports
+        ],
+    }
+
+
+@app.get("/api/v1/reports/{report_id}/download")
+async def download_report(report_id: int, db: AsyncSession = Depends(get_db)):
+    """File of a stored report, from MinIO or the local fallback directory"""
+    report = await db.get(Report, report_id)
+    if report is None or not report.file_path:
+        raise HTTPException(status_code=404, detail="Report not found")
+    try:
+        content = await audit_profiler.store.get(report.file_path)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=f"Report file unavailable: {e}")
+    filename = report.file_path.rsplit("/", 1)[-1]
+    return Response(
+        content=content,
+        media_type=MEDIA_TYPES.get(report.format, "application/octet-stream"),
+        headers={"Content-Disposition": f'attachment; filename="report-{report.id}-{filename}"'},
+    )
+
+
+@app.websocket("/ws/scans/{scan_id}/progress")
+async def scan_progress(websocket: WebSocket, scan_id: int):
+    """
+    Live progress of a scan
+
+    Each frame is a full JSON snapshot (per-scanner state, findings so
+    far, counts by severity), sent at most every 250ms. The server
+    closes the socket after the final snapshot.
+    """
+    async with AsyncSessionLocal() as db:
+        audit = await db.get(Audit, scan_id)
+    if audit is None:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    subscription = await progress_hub.subscribe(scan_id)
+    if subscription.latest is None and audit.status not in (ScanStatusEnum.PENDING, ScanStatusEnum.RUNNING):
+        # Finished before the client connected and no snapshot is left
+        progress_hub.unsubscribe(subscription)
+        await websocket.send_json({
+            "type": "progress",
+            "scan_id": scan_id,
+            "status": audit.status.value,
+            "final": True,
+            "findings": audit.total_checks or 0,
+        })
+        await websocket.close()
+        return
+
+    await progress_hub.serve(websocket, subscription)
+
+
+# ============================================================================
+# FINDING ENDPOINTS
+# ============================================================================
+
+FINDING_STATUSES = {"open", "fixed", "accepted", "false_positive"}
+
+
+@app.get("/api/v1/findings")
+async def list_findings(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    scanner: Optional[str] = None,
+    severity: Optional[SeverityEnum] = None,
+    status: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Findings across all scans, most severe first, with keyset pagination"""
+    page = await _list_findings(db, limit, cursor, None, scanner, severity, status)
+    return {"status": "success", **page}
+
+
+@app.get("/api/v1/findings/{finding_id}/raw")
+async def get_finding_raw(finding_id: int, db: AsyncSession = Depends(get_db)):
+    """Full scanner output of a finding (stored compressed, loaded on demand)"""
+    raw = await raw_blob_store.load(db, finding_id)
+    if raw is None:
+        raise HTTPException(status_code=404, detail="Finding not found")
+    return Response(content=raw, media_type="application/json")
+
+
+@app.patch("/api/v1/findings/{finding_id}")
+async def update_finding(
+    finding_id: int,
+    update: Dict[str, Any],
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Update the triage state of a finding
+
+    Body:
+    {
+        "status": "accepted",      # open, fixed, accepted, false_positive
+        "assigned_to": "alice"
+    }
+    """
+    finding = await db.get(Finding, finding_id)
+    if finding is None:
+        raise HTTPException(status_code=404, detail="Finding not found")
+
+    old_status = finding.status
+    if "status" in update:
+        if update["status"] not in FINDING_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status: {update['status']}")
+        finding.status = update["status"]
+    if "assigned_to" in update:
+        finding.assigned_to = update["assigned_to"]
+
+    await rollup_service.apply_status_change(db, finding, old_status)
+    await db.commit()
+    await response_cache.invalidate(f"scan:{finding.audit_id}")
+
+    return {
+        "status": "success",
+        "data": {"id": finding.id, "status": finding.status, "assigned_to": finding.assigned_to},
+    }
 
 
 # ============================================================================
@@ -256,53 +652,69 @@ async def get_scan_details(scan_id: int):
 # ============================================================================
 
 @app.post("/api/v1/ai/remediation")
-async def generate_remediation(finding_id: int):
+async def generate_remediation(finding_id: int, db: AsyncSession = Depends(get_db)):
     """Generate AI-powered remediation for a specific finding"""
+    finding = await db.get(Finding, finding_id)
+    if not finding:
+        raise HTTPException(status_code=404, detail="Finding not found")
 
-    # Mock AI response
+    result = (await remediation_generator.remediate(db, [finding]))[finding_id]
     return {
         "status": "success",
         "finding_id": finding_id,
-        "remediation": {
-            "automated": {
-                "available": True,
-                "type": "terraform",
-                "code": """resource "aws_s3_bucket_public_access_block" "prod_data" {
-  bucket = "prod-data-backups"
-
-  block_public_acls       = true
-  block_public_policy     = true
-  ignore_public_acls      = true
-  restrict_public_buckets = true
-}""",
-                "description": "Apply this Terraform code to block public access"
-            },
-            "manual": {
-                "steps": [
-                    "1. Navigate to AWS Console → S3",
-                    "2. Select bucket 'prod-data-backups'",
-                    "3. Go to Permissions tab",
-                    "4. Click 'Block public access'",
-                    "5. Enable all 4 block settings",
-                    "6. Save changes"
-                ]
-            },
-            "risk_if_ignored": "Public data exposure, potential GDPR violation, data breach",
-            "estimated_fix_time": "5 minutes",
-            "confidence": 0.95
-        }
+        "remediation": result["remediation"],
+        "model": result["model"],
+        "cache": result["cache"],
+        "processing_time_ms": result["processing_time_ms"],
+    }
+
+
+@app.post("/api/v1/ai/remediation/batch")
+async def generate_remediation_batch(body: Dict[str, Any], db: AsyncSession = Depends(get_db)):
+    """
+    Generate remediation for many findings at once
+
+    Body: {"finding_ids": [1, 2, 3]} or {"scan_id": 1, "limit": 100}
+    (a scan's open findings, most severe first)
+    """
+    limit = clamp_limit(int(body.get("limit", 100)), settings.PAGINATION_MAX_LIMIT)
+    query = select(Finding)
+    if body.get("finding_ids"):
+        query = query.where(Finding.id.in_(body["finding_ids"][:limit]))
+    elif body.get("scan_id"):
+        query = (
+            query.where(Finding.audit_id == body["scan_id"], Finding.status == "open")
+            .order_by(Finding.severity, Finding.id)
+            .limit(limit)
+        )
+    else:
+        raise HTTPException(status_code=400, detail="Provide finding_ids or scan_id")
+
+    findings = (await db.execute(query)).scalars().all()
+    results = await remediation_generator.remediate(db, findings)
+
+    by_cache: Dict[str, int] = {}
+    for result in results.values():
+        by_cache[result["cache"]] = by_cache.get(result["cache"], 0) + 1
+    return {
+        "status": "success",
+        "count": len(results),
+        "cache": by_cache,
+        "data": [{"finding_id": finding_id, **result} for finding_id, result in results.items()],
     }
 
 
 @app.post("/api/v1/ai/chat")
-async def ai_chat(message: str):
-    """Interactive AI chat for compliance questions"""
+async def ai_chat(message: str, environment_id: Optional[int] = None):
+    """Interactive AI chat for compliance questions, grounded on the retrieval index"""
+    try:
+        answer = await rag_engine.chat(message, environment_id=environment_id)
+    except OllamaError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
-    # Mock AI response
     return {
         "status": "success",
-        "response": f"Based on your question about '{message}', I recommend reviewing NIS2 Article 21 requirements for security measures. Would you like me to generate a compliance checklist?",
-        "model": "llama3.1:8b",
+        **answer,
         "suggested_actions": [
             "Generate NIS2 compliance checklist",
             "Run full security audit",
@@ -316,82 +728,31 @@ async def ai_chat(message: str):
 # ============================================================================
 
 @app.get("/api/v1/regulations")
-async def list_regulations():
+async def list_regulations(request: Request):
     """List all supported regulatory frameworks"""
-    return {
-        "regulations": [
-            {
-                "code": "NIS2",
-                "name": "Network and Information Security Directive 2",
-                "version": "2024",
-                "mandatory_for": ["EU", "Critical Infrastructure"],
-                "controls_count": 150
-            },
-            {
-                "code": "ISO27001",
-                "name": "ISO/IEC 27001 Information Security",
-                "version": "2022",
-                "mandatory_for": ["Certification"],
-                "controls_count": 114
-            },
-            {
-                "code": "DORA",
-                "name": "Digital Operational Resilience Act",
-                "version": "2025",
-                "mandatory_for": ["EU", "Financial Services"],
-                "controls_count": 95
-            },
-            {
-                "code": "RGPD",
-                "name": "Règlement Général sur la Protection des Données",
-                "version": "2018",
-                "mandatory_for": ["EU", "Data Processing"],
-                "controls_count": 78
-            },
-            {
-                "code": "HDS",
-                "name": "Hébergement de Données de Santé",
-                "version": "2024",
-                "mandatory_for": ["France", "Health Data"],
-                "controls_count": 65
-            },
-            {
-                "code": "SecNumCloud",
-                "name": "SecNumCloud",
-                "version": "3.2",
-                "mandatory_for": ["France", "Sensitive Cloud"],
-                "controls_count": 142
-            }
-        ]
-    }
+    async def build():
+        return {"regulations": mapping_engine.list_regulations()}, True
+
+    return await response_cache.respond(
+        request, f"regulations:{mapping_engine.fingerprint}", build, tags=("regulations",)
+    )
 
 
 @app.get("/api/v1/regulations/{regulation_code}/controls")
-async def get_regulation_controls(regulation_code: str):
+async def get_regulation_controls(regulation_code: str, request: Request):
     """Get all controls for a specific regulation"""
-
-    if regulation_code == "NIS2":
-        return {
-            "regulation": "NIS2",
-            "controls": [
-                {
-                    "control_id": "Art.21.2.a",
-                    "title": "Risk analysis and information system security policies",
-                    "category": "Security Policies",
-                    "priority": "critical",
-                    "mapped_checks": ["s3_encryption", "ebs_encryption", "rds_encryption"]
-                },
-                {
-                    "control_id": "Art.21.2.b",
-                    "title": "Incident handling",
-                    "category": "Incident Management",
-                    "priority": "high",
-                    "mapped_checks": ["cloudtrail_enabled", "guardduty_enabled"]
-                }
-            ]
-        }
-
-    raise HTTPException(status_code=404, detail="Regulation not found")
+    async def build():
+        controls = mapping_engine.regulation_controls(regulation_code)
+        if controls is None:
+            raise HTTPException(status_code=404, detail="Regulation not found")
+        return {"regulation": regulation_code, "controls": controls}, True
+
+    return await response_cache.respond(
+        request,
+        f"regulations:{mapping_engine.fingerprint}:{regulation_code}",
+        build,
+        tags=("regulations",),
+    )
 
 
 # ============================================================================
@@ -399,9 +760,15 @@ async def get_regulation_controls(regulation_code: str):
 # ============================================================================
 
 @app.get("/api/v1/environments")
-async def list_environments():
+async def list_environments(request: Request):
     """List all configured environments"""
-    return {
+    return await response_cache.respond(
+        request, "environments", _build_environments, tags=("environments",)
+    )
+
+
+async def _build_environments():
+    payload = {
         "environments": [
             {
                 "id": 1,
@@ -429,6 +796,16 @@ async def list_environments():
             }
         ]
     }
+    return payload, True
+
+
+@app.get("/api/v1/environments/{environment_id}/trends")
+async def get_environment_trends(environment_id: int, months: int = 12):
+    """Compliance history of an environment, read from the Parquet archive"""
+    if not findings_archive.enabled:
+        raise HTTPException(status_code=503, detail="Findings archive is disabled")
+    months = max(1, min(months, 120))
+    return {"status": "success", "data": await trend_analyzer.environment_trends_async(environment_id, months)}
 
 
 # ============================================================================
@@ -436,27 +813,9 @@ async def list_environments():
 # ============================================================================
 
 @app.get("/api/v1/dashboard/stats")
-async def get_dashboard_stats():
-    """Get dashboard statistics"""
-    return {
-        "overall_compliance": 0.87,
-        "trend_7d": +0.03,
-        "total_environments": 3,
-        "total_scans_last_30d": 45,
-        "active_critical_findings": 3,
-        "active_high_findings": 12,
-        "findings_fixed_last_7d": 8,
-        "top_failing_regulations": [
-            {"code": "DORA", "score": 0.82},
-            {"code": "SecNumCloud", "score": 0.84}
-        ],
-        "scan_coverage": {
-            "aws": 0.95,
-            "kubernetes": 0.90,
-            "azure": 0.0,
-            "gcp": 0.0
-        }
-    }
+async def get_dashboard_stats(db: AsyncSession = Depends(get_db)):
+    """Get dashboard statistics (served from incrementally maintained rollups)"""
+    return await rollup_service.dashboard_stats(db)
 
 
 # ============================================================================
@@ -477,22 +836,3 @@ async def internal_error_handler(request, exc):
         status_code=500,
         content={"status": "error", "message": "Internal server error"}
     )
-
-
-# ============================================================================
-# STARTUP / SHUTDOWN EVENTS
-# ============================================================================
-
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup"""
-    print(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} starting...")
-    print(f"📚 API Documentation: http://localhost:8000/docs")
-    print(f"💚 Health Check: http://localhost:8000/health")
-    print(f"📊 Metrics: http://localhost:8000/metrics")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    print(f"👋 {settings.APP_NAME} shutting down...")
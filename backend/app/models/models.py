@@ -1,7 +1,7 @@
 """
 SQLAlchemy models for Compliance Radar
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, JSON, Enum, Boolean
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Text, JSON, Enum, Boolean, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -57,6 +57,11 @@ class Environment(Base):
 class Audit(Base):
     """An audit scan execution"""
     __tablename__ = "audits"
+    __table_args__ = (
+        # Keyset pagination of scan listings, newest first
+        Index("ix_audits_created_at_id", "created_at", "id"),
+        Index("ix_audits_environment_id_created_at", "environment_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     environment_id = Column(Integer, ForeignKey("environments.id"), nullable=False)
@@ -68,6 +73,7 @@ class Audit(Base):
 
     # Metadata
     scanner_versions = Column(JSON, nullable=True)  # {"prowler": "3.0.0", "kube-bench": "0.6.0"}
+    failed_scanners = Column(JSON, nullable=True)  # {"prowler": "Timed out after 3600s"}; None if all succeeded
     scan_duration_seconds = Column(Integer, nullable=True)
     total_checks = Column(Integer, default=0)
 
@@ -84,6 +90,12 @@ class Audit(Base):
 class Finding(Base):
     """Individual security finding from scanners"""
     __tablename__ = "findings"
+    __table_args__ = (
+        Index("ix_findings_audit_id_finding_hash", "audit_id", "finding_hash"),  # audit diffing
+        # Keyset pagination of findings, ordered by (severity, id)
+        Index("ix_findings_audit_id_severity_id", "audit_id", "severity", "id"),
+        Index("ix_findings_status_severity_id", "status", "severity", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     audit_id = Column(Integer, ForeignKey("audits.id"), nullable=False)
@@ -112,7 +124,7 @@ class Finding(Base):
     due_date = Column(DateTime(timezone=True), nullable=True)
 
     # Additional data
-    raw_data = Column(JSON, nullable=True)  # Full scanner output
+    raw_hash = Column(String(64), nullable=True)  # Full scanner output, see RawBlob
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -123,6 +135,73 @@ class Finding(Base):
     control_mappings = relationship("ControlMapping", back_populates="finding")
 
 
+class RawBlob(Base):
+    """Raw scanner output, zstd-compressed and stored once per distinct content"""
+    __tablename__ = "raw_blobs"
+
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 of the uncompressed JSON
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # uncompressed bytes
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class AuditDiff(Base):
+    """Stored comparison of an audit against an earlier audit of the same environment"""
+    __tablename__ = "audit_diffs"
+    __table_args__ = (
+        UniqueConstraint("audit_id", "against_audit_id", name="uq_audit_diffs_pair"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    audit_id = Column(Integer, ForeignKey("audits.id"), nullable=False)
+    against_audit_id = Column(Integer, ForeignKey("audits.id"), nullable=False)
+
+    # Counts of distinct finding hashes
+    new_count = Column(Integer, nullable=False, default=0)
+    fixed_count = Column(Integer, nullable=False, default=0)
+    persisting_count = Column(Integer, nullable=False, default=0)
+
+    new_hashes = Column(JSON, nullable=True)  # present now, absent before
+    fixed_hashes = Column(JSON, nullable=True)  # present before, absent now
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class OpenFindingRollup(Base):
+    """Open findings per environment and severity, as of the latest completed audit"""
+    __tablename__ = "open_finding_rollups"
+
+    environment_id = Column(Integer, ForeignKey("environments.id"), primary_key=True)
+    severity = Column(Enum(SeverityEnum), primary_key=True)
+    audit_id = Column(Integer, ForeignKey("audits.id"), nullable=False)  # audit the counts come from
+    open_count = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DailyFindingRollup(Base):
+    """New and fixed findings per environment, day and severity"""
+    __tablename__ = "daily_finding_rollups"
+
+    environment_id = Column(Integer, ForeignKey("environments.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    severity = Column(Enum(SeverityEnum), primary_key=True)
+    new_count = Column(Integer, nullable=False, default=0)
+    fixed_count = Column(Integer, nullable=False, default=0)
+
+
+class ScoreRollup(Base):
+    """Latest conformity score per environment, day and regulation"""
+    __tablename__ = "score_rollups"
+
+    environment_id = Column(Integer, ForeignKey("environments.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    regulation_code = Column(String(50), primary_key=True)  # "_overall" for Audit.overall_score
+    score = Column(Float, nullable=False)
+    audit_id = Column(Integer, ForeignKey("audits.id"), nullable=False)
+
+
 class Regulation(Base):
     """Regulatory frameworks (NIS2, ISO27001, etc.)"""
     __tablename__ = "regulations"
@@ -144,6 +223,9 @@ class Regulation(Base):
 class Control(Base):
     """Individual control within a regulation"""
     __tablename__ = "controls"
+    __table_args__ = (
+        UniqueConstraint("regulation_id", "control_id", name="uq_controls_regulation_control"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     regulation_id = Column(Integer, ForeignKey("regulations.id"), nullable=False)
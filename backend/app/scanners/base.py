@@ -2,14 +2,117 @@
 Base scanner class for all security scanners
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, BinaryIO, Sequence, Union
+from contextlib import asynccontextmanager
 from datetime import datetime
+from sys import intern
+import asyncio
 import hashlib
 import json
+import os
+import tempfile
+
+# Scanner stderr kept for error messages; the beginning of a long log is dropped
+STDERR_TAIL_BYTES = 64 * 1024
+PIPE_CHUNK_SIZE = 64 * 1024
+
+
+def finding_hash(scanner: str, check_id: str, resource_id: Optional[str], title: str) -> str:
+    """Deduplication hash of a finding"""
+    unique_str = f"{scanner}:{check_id}:{resource_id}:{title}"
+    return hashlib.sha256(unique_str.encode()).hexdigest()
+
+
+def encode_raw(raw_data: Union[Dict, bytes, None]) -> bytes:
+    """Serialize raw scanner output to compact JSON bytes"""
+    if isinstance(raw_data, (bytes, bytearray)):
+        return bytes(raw_data)
+    return json.dumps(raw_data or {}, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+async def read_tail(stream: asyncio.StreamReader, limit: int = STDERR_TAIL_BYTES) -> bytes:
+    """Drain a pipe to EOF, keeping only its last ``limit`` bytes"""
+    tail = bytearray()
+    while chunk := await stream.read(PIPE_CHUNK_SIZE):
+        tail += chunk
+        if len(tail) > limit:
+            del tail[:-limit]
+    return bytes(tail)
+
+
+class SpooledProcess:
+    """A finished scanner process: exit code, stdout spool file and stderr tail"""
+
+    __slots__ = ("returncode", "stdout", "stderr_tail")
+
+    def __init__(self, returncode: Optional[int], stdout: BinaryIO, stderr_tail: bytes):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr_tail = stderr_tail
+
+    @property
+    def stdout_bytes(self) -> int:
+        return os.fstat(self.stdout.fileno()).st_size
+
+    @property
+    def stderr(self) -> str:
+        return self.stderr_tail.decode(errors="replace")
+
+
+@asynccontextmanager
+async def run_spooled(cmd: Sequence[str], spool_dir: Optional[str] = None) -> AsyncIterator[SpooledProcess]:
+    """
+    Run a scanner with stdout written straight to an anonymous temp file
+
+    The kernel writes the report into the spool, so it never passes
+    through Python and is not held in memory; only the tail of stderr is
+    kept. The spool is deleted when the block exits.
+
+    Example:
+        async with run_spooled(cmd) as process:
+            if process.returncode != 0:
+                raise Exception(process.stderr)
+            for key, element, context in iter_json_file(process.stdout, {"results"}):
+                ...
+    """
+    with tempfile.TemporaryFile(dir=spool_dir) as spool:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=spool,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stderr_tail = await read_tail(process.stderr)
+            await process.wait()
+        finally:
+            # Cancelled or timed out: do not leave the scanner running
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        yield SpooledProcess(process.returncode, spool, stderr_tail)
 
 
 class ScanResult:
-    """Standardized scan result"""
+    """
+    Standardized scan result
+
+    Uses ``__slots__`` and keeps ``raw_data`` as JSON bytes, decoded only
+    when the attribute is read. Low-cardinality strings are interned.
+    """
+
+    __slots__ = (
+        "scanner",
+        "check_id",
+        "title",
+        "description",
+        "severity",
+        "resource_type",
+        "resource_id",
+        "resource_region",
+        "remediation",
+        "raw_json",
+        "finding_hash",
+    )
 
     def __init__(
         self,
@@ -22,26 +125,31 @@ class ScanResult:
         resource_id: Optional[str] = None,
         resource_region: Optional[str] = None,
         remediation: Optional[str] = None,
-        raw_data: Optional[Dict] = None,
+        raw_data: Union[Dict, bytes, None] = None,
+        finding_hash: Optional[str] = None,
     ):
-        self.scanner = scanner
+        self.scanner = intern(scanner)
         self.check_id = check_id
         self.title = title
         self.description = description
-        self.severity = severity.lower()
-        self.resource_type = resource_type
+        self.severity = intern(severity.lower())
+        self.resource_type = intern(resource_type) if resource_type else resource_type
         self.resource_id = resource_id
-        self.resource_region = resource_region
+        self.resource_region = intern(resource_region) if resource_region else resource_region
         self.remediation = remediation
-        self.raw_data = raw_data or {}
+        self.raw_json = encode_raw(raw_data)
 
         # Generate unique hash for deduplication
-        self.finding_hash = self._generate_hash()
+        self.finding_hash = finding_hash or self._generate_hash()
+
+    @property
+    def raw_data(self) -> Dict[str, Any]:
+        """Full scanner output, decoded on demand"""
+        return json.loads(self.raw_json)
 
     def _generate_hash(self) -> str:
         """Generate unique hash for this finding"""
-        unique_str = f"{self.scanner}:{self.check_id}:{self.resource_id}:{self.title}"
-        return hashlib.sha256(unique_str.encode()).hexdigest()
+        return finding_hash(self.scanner, self.check_id, self.resource_id, self.title)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary"""
@@ -63,15 +171,28 @@ class ScanResult:
 class BaseScanner(ABC):
     """Base class for all security scanners"""
 
-    def __init__(self, config: Dict[str, Any]):
+    # Short scanner name, also the default executable looked up on PATH
+    name: str = ""
+    # Arguments printing the scanner version
+    version_args: List[str] = ["--version"]
+    # Version reported when the binary cannot be probed
+    default_version: str = "unknown"
+
+    def __init__(self, config: Dict[str, Any], version: Optional[str] = None):
+        """
+        Args:
+            config: Scanner configuration, "binary" overrides the executable
+            version: Version probed by the scanner registry
+        """
         self.config = config
         self.scanner_name = self.__class__.__name__
-        self.version = self._get_version()
+        self.binary = config.get("binary") or self.name
+        self.version = version or self.default_version
 
-    @abstractmethod
-    def _get_version(self) -> str:
-        """Get scanner version"""
-        pass
+    @classmethod
+    def parse_version(cls, output: str) -> str:
+        """Extract the version from the output of ``version_args``"""
+        return output.strip() or cls.default_version
 
     @abstractmethod
     async def scan(self, target: Dict[str, Any]) -> List[ScanResult]:
@@ -87,6 +208,21 @@ class BaseScanner(ABC):
         """
         pass
 
+    async def scan_stream(self, target: Dict[str, Any]) -> AsyncIterator[ScanResult]:
+        """
+        Execute scan on target and yield findings as they are produced
+
+        Scanners able to parse their output incrementally override this and
+        implement ``scan()`` with ``collect_stream()``. The default simply
+        replays the result of ``scan()``.
+        """
+        for result in await self.scan(target):
+            yield result
+
+    async def collect_stream(self, target: Dict[str, Any]) -> List[ScanResult]:
+        """Run scan_stream() to completion and return all findings"""
+        return [result async for result in self.scan_stream(target)]
+
     def normalize_severity(self, severity: str) -> str:
         """Normalize severity levels across scanners"""
         severity_lower = severity.lower()
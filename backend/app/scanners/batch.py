@@ -0,0 +1,93 @@
+"""
+Columnar container for batches of scan results
+"""
+from typing import Iterable, Iterator
+from sys import intern
+
+from .base import ScanResult
+
+
+class FindingBatch:
+    """
+    Column-oriented batch of findings.
+
+    Each field is stored in its own list instead of one object per
+    finding. Repeated values (scanner, severity, resource_type, region)
+    are interned so the columns share a single string instance, and
+    ``raw_data`` stays as the JSON bytes produced by the scanner until a
+    consumer explicitly decodes a row.
+    """
+
+    COLUMNS = (
+        "scanner",
+        "check_id",
+        "title",
+        "description",
+        "severity",
+        "resource_type",
+        "resource_id",
+        "resource_region",
+        "remediation",
+        "raw_json",
+        "finding_hash",
+    )
+
+    __slots__ = COLUMNS
+
+    def __init__(self):
+        for column in self.COLUMNS:
+            setattr(self, column, [])
+
+    @classmethod
+    def from_results(cls, results: Iterable[ScanResult]) -> "FindingBatch":
+        batch = cls()
+        batch.extend(results)
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.finding_hash)
+
+    def __bool__(self) -> bool:
+        return bool(self.finding_hash)
+
+    def append(self, result: ScanResult) -> None:
+        """Add one finding to the columns"""
+        self.scanner.append(intern(result.scanner))
+        self.check_id.append(result.check_id)
+        self.title.append(result.title)
+        self.description.append(result.description)
+        self.severity.append(intern(result.severity))
+        self.resource_type.append(intern(result.resource_type) if result.resource_type else result.resource_type)
+        self.resource_id.append(result.resource_id)
+        self.resource_region.append(intern(result.resource_region) if result.resource_region else result.resource_region)
+        self.remediation.append(result.remediation)
+        self.raw_json.append(result.raw_json)
+        self.finding_hash.append(result.finding_hash)
+
+    def extend(self, results: Iterable[ScanResult]) -> None:
+        if isinstance(results, FindingBatch):
+            for column in self.COLUMNS:
+                getattr(self, column).extend(getattr(results, column))
+            return
+        for result in results:
+            self.append(result)
+
+    def result(self, index: int) -> ScanResult:
+        """Materialize one row as a ScanResult (hash is not recomputed)"""
+        return ScanResult(
+            scanner=self.scanner[index],
+            check_id=self.check_id[index],
+            title=self.title[index],
+            description=self.description[index],
+            severity=self.severity[index],
+            resource_type=self.resource_type[index],
+            resource_id=self.resource_id[index],
+            resource_region=self.resource_region[index],
+            remediation=self.remediation[index],
+            raw_data=self.raw_json[index],
+            finding_hash=self.finding_hash[index],
+        )
+
+    def __iter__(self) -> Iterator[ScanResult]:
+        for index in range(len(self)):
+            yield self.result(index)
@@ -0,0 +1,334 @@
+"""
+Content-addressed cache of Trivy scan results
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import zlib
+
+from ..core.config import settings
+from ..core.metrics import TRIVY_CACHE_REQUESTS
+from ..core.resources import resources
+from .base import ScanResult
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+DB_VERSION_TTL_SECONDS = 300
+
+_META_FIELDS = (
+    "scanner",
+    "check_id",
+    "title",
+    "description",
+    "severity",
+    "resource_type",
+    "resource_id",
+    "resource_region",
+    "remediation",
+    "finding_hash",
+)
+
+
+def encode_result(result: ScanResult) -> bytes:
+    """One cache line: metadata JSON, a tab, the raw JSON bytes"""
+    meta = json.dumps([getattr(result, field) for field in _META_FIELDS], separators=(",", ":"))
+    # json.dumps escapes control characters, so neither part contains \t or \n
+    return meta.encode() + b"\t" + result.raw_json + b"\n"
+
+
+def decode_result(line: bytes) -> ScanResult:
+    meta, raw_json = line.rstrip(b"\n").split(b"\t", 1)
+    return ScanResult(**dict(zip(_META_FIELDS, json.loads(meta))), raw_data=raw_json)
+
+
+class CacheWriter:
+    """Compresses findings as they stream past, stored only on commit()"""
+
+    def __init__(self, cache: "TrivyResultCache", key: str):
+        self.cache = cache
+        self.key = key
+        self.count = 0
+        self._compressor = zlib.compressobj(level=6)
+        self._chunks: List[bytes] = []
+
+    def add(self, result: ScanResult) -> None:
+        self.count += 1
+        chunk = self._compressor.compress(encode_result(result))
+        if chunk:
+            self._chunks.append(chunk)
+
+    async def commit(self) -> None:
+        self._chunks.append(self._compressor.flush())
+        await self.cache.store(self.key, b"".join(self._chunks))
+        self._chunks = []
+
+
+class TrivyResultCache:
+    """
+    Replays Trivy findings for targets that have already been scanned.
+
+    The key covers everything that can change the report: scan type, the
+    resolved image digest or a content hash of the scanned file tree, the
+    trivy version, the vulnerability DB version and the severity filter.
+    Targets whose content cannot be pinned (mutable tags without a local
+    digest, remote repositories) are never cached.
+
+    Entries are zlib-compressed NDJSON stored either on local disk, with
+    LRU eviction once TRIVY_CACHE_MAX_BYTES is exceeded, or in Redis,
+    where eviction is left to the server's maxmemory-policy. Both
+    backends expire entries not read for TRIVY_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        directory: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.backend = backend or settings.TRIVY_CACHE_BACKEND
+        self.directory = directory or settings.TRIVY_CACHE_DIR
+        self.ttl_seconds = ttl_seconds or settings.TRIVY_CACHE_TTL_SECONDS
+        self.max_bytes = max_bytes or settings.TRIVY_CACHE_MAX_BYTES
+        self.hits = 0
+        self.misses = 0
+        self._db_versions: Dict[str, Tuple[float, Optional[str]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend in ("disk", "redis")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Key derivation
+    # ------------------------------------------------------------------
+
+    async def key_for(
+        self,
+        binary: str,
+        trivy_version: str,
+        scan_type: str,
+        scan_target: str,
+        severities: List[str],
+    ) -> Optional[str]:
+        """Cache key for a scan, or None when the target cannot be pinned"""
+        if not self.enabled:
+            return None
+        try:
+            return await self._key_for(binary, trivy_version, scan_type, scan_target, severities)
+        except Exception as e:
+            # The cache is an optimisation: scan uncached rather than fail
+            logger.warning("Could not derive Trivy cache key: %s", e)
+            return None
+
+    async def _key_for(
+        self,
+        binary: str,
+        trivy_version: str,
+        scan_type: str,
+        scan_target: str,
+        severities: List[str],
+    ) -> Optional[str]:
+        if scan_type == "image":
+            content_id = await self._resolve_image_digest(scan_target)
+        elif scan_type in ("filesystem", "fs", "config"):
+            content_id = await asyncio.to_thread(self._hash_tree, scan_target)
+        else:
+            content_id = None
+
+        db_version = await self._db_version(binary)
+        if content_id is None or db_version is None:
+            return None
+
+        material = json.dumps(
+            [CACHE_FORMAT_VERSION, scan_type, content_id, trivy_version, db_version, sorted(severities)]
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    async def _run(self, *cmd: str) -> Optional[str]:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            stdout, _ = await asyncio.wait_for(process.communicate(), 30)
+        except (OSError, asyncio.TimeoutError):
+            return None
+        if process.returncode != 0:
+            return None
+        return stdout.decode().strip()
+
+    async def _resolve_image_digest(self, image: str) -> Optional[str]:
+        """Pinned digest of an image reference"""
+        if "@sha256:" in image:
+            return image.split("@", 1)[1]
+        # Local image ID is the digest of the image config
+        return await self._run("docker", "image", "inspect", "--format", "{{.Id}}", image)
+
+    @staticmethod
+    def _hash_tree(path: str) -> Optional[str]:
+        """Content hash of a file or directory tree"""
+        if not os.path.exists(path):
+            return None
+
+        digest = hashlib.sha256()
+        if os.path.isfile(path):
+            entries = [(os.path.basename(path), path)]
+        else:
+            entries = []
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    full = os.path.join(root, name)
+                    entries.append((os.path.relpath(full, path), full))
+
+        for relative, full in entries:
+            digest.update(relative.encode() + b"\0")
+            try:
+                with open(full, "rb") as f:
+                    for block in iter(lambda: f.read(1024 * 1024), b""):
+                        digest.update(block)
+            except OSError:
+                continue
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    async def _db_version(self, binary: str) -> Optional[str]:
+        """Vulnerability DB version, refreshed every few minutes"""
+        cached = self._db_versions.get(binary)
+        if cached is not None and time.monotonic() - cached[0] < DB_VERSION_TTL_SECONDS:
+            return cached[1]
+
+        output = await self._run(binary, "version", "--format", "json")
+        version = None
+        if output:
+            try:
+                db = json.loads(output).get("VulnerabilityDB") or {}
+                if db:
+                    version = f"{db.get('Version')}:{db.get('UpdatedAt')}"
+            except ValueError:
+                version = None
+
+        self._db_versions[binary] = (time.monotonic(), version)
+        return version
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    async def load(self, key: str) -> Optional[Iterator[ScanResult]]:
+        """Replay a cached scan, or None on a miss"""
+        try:
+            if self.backend == "redis":
+                blob = await self._redis_client().getex(self._redis_key(key), ex=self.ttl_seconds)
+            else:
+                blob = await asyncio.to_thread(self._disk_read, key)
+        except Exception as e:
+            # An unreachable Redis or unreadable entry is a miss, as in store()
+            logger.warning("Could not load Trivy cache entry: %s", e)
+            blob = None
+
+        if blob is None:
+            self.misses += 1
+            TRIVY_CACHE_REQUESTS.labels(result="miss").inc()
+            return None
+
+        self.hits += 1
+        TRIVY_CACHE_REQUESTS.labels(result="hit").inc()
+        return self._replay(blob)
+
+    @staticmethod
+    def _replay(blob: bytes) -> Iterator[ScanResult]:
+        decompressor = zlib.decompressobj()
+        pending = b""
+        for start in range(0, len(blob), 64 * 1024):
+            pending += decompressor.decompress(blob[start:start + 64 * 1024])
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                yield decode_result(line)
+        pending += decompressor.flush()
+        for line in pending.split(b"\n"):
+            if line:
+                yield decode_result(line)
+
+    def writer(self, key: str) -> CacheWriter:
+        return CacheWriter(self, key)
+
+    async def store(self, key: str, blob: bytes) -> None:
+        try:
+            if self.backend == "redis":
+                await self._redis_client().set(self._redis_key(key), blob, ex=self.ttl_seconds)
+            else:
+                await asyncio.to_thread(self._disk_write, key, blob)
+        except Exception as e:
+            logger.warning("Could not store Trivy cache entry: %s", e)
+
+    def _redis_client(self):
+        return resources.redis()
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"trivy-cache:{key}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.ndjson.z")
+
+    def _disk_read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            if time.time() - os.stat(path).st_mtime > self.ttl_seconds:
+                os.unlink(path)
+                return None
+            with open(path, "rb") as f:
+                blob = f.read()
+            # Bump mtime: it drives both LRU order and sliding expiry
+            os.utime(path)
+            return blob
+        except FileNotFoundError:
+            return None
+
+    def _disk_write(self, key: str, blob: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, self._path(key))
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries beyond max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".ndjson.z"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+trivy_result_cache = TrivyResultCache()
@@ -1,32 +1,28 @@
 """
 kube-bench scanner integration for Kubernetes CIS Benchmark
 """
-from typing import List, Dict, Any
-import subprocess
-import json
-import asyncio
-from .base import BaseScanner, ScanResult
+from typing import List, Dict, Any, AsyncIterator
+from time import perf_counter
+from ..core.metrics import observe_stage, record_process
+from .base import BaseScanner, ScanResult, run_spooled
+from .streaming import iter_json_file
 
 
 class KubeBenchScanner(BaseScanner):
     """kube-bench scanner for CIS Kubernetes Benchmark"""
 
-    def _get_version(self) -> str:
-        """Get kube-bench version"""
-        try:
-            result = subprocess.run(
-                ["kube-bench", "version"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            return result.stdout.strip() or "0.7.0"
-        except Exception:
-            return "0.7.0"
+    name = "kube-bench"
+    version_args = ["version"]
+    default_version = "0.7.0"
 
     async def scan(self, target: Dict[str, Any]) -> List[ScanResult]:
+        """Execute kube-bench scan and return all findings"""
+        return await self.collect_stream(target)
+
+    async def scan_stream(self, target: Dict[str, Any]) -> AsyncIterator[ScanResult]:
         """
-        Execute kube-bench scan on Kubernetes cluster
+        Execute kube-bench scan on Kubernetes cluster, yielding findings
+        while the spooled report is parsed
 
         Args:
             target: {
@@ -40,7 +36,7 @@ class KubeBenchScanner(BaseScanner):
         benchmark = target.get("benchmark", "cis-1.8")
 
         # Build kube-bench command
-        cmd = ["kube-bench", "run", "--json"]
+        cmd = [self.binary, "run", "--json"]
 
         if context:
             cmd.extend(["--context", context])
@@ -49,57 +45,50 @@ class KubeBenchScanner(BaseScanner):
             cmd.extend(["--benchmark", benchmark])
 
         try:
-            # Run kube-bench asynchronously
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-
-            stdout, stderr = await process.communicate()
-
-            if process.returncode != 0:
-                raise Exception(f"kube-bench failed: {stderr.decode()}")
-
-            # Parse JSON output
-            results_data = json.loads(stdout.decode())
-
-            # Convert to ScanResult objects
-            findings = []
-            for control in results_data.get("Controls", []):
-                for test in control.get("tests", []):
-                    for result in test.get("results", []):
-                        if result.get("status") == "FAIL":
-                            findings.append(
-                                ScanResult(
-                                    scanner="kube-bench",
-                                    check_id=result.get("test_number", "unknown"),
-                                    title=result.get("test_desc", "Unknown check"),
-                                    description=result.get("reason", "Check failed"),
-                                    severity=self._map_kube_bench_severity(
-                                        result.get("scored", True)
-                                    ),
-                                    resource_type="Kubernetes",
-                                    resource_id=f"{context or 'default'}",
-                                    remediation=result.get("remediation", ""),
-                                    raw_data=result,
-                                )
-                            )
-
-            return findings
+            # Run kube-bench asynchronously, its report spooled to disk
+            spawned = perf_counter()
+            async with run_spooled(cmd) as process:
+                record_process("kube-bench", process.returncode, process.stdout_bytes, perf_counter() - spawned)
+
+                if process.returncode != 0:
+                    raise Exception(f"kube-bench failed: {process.stderr}")
+
+                # Results of Controls[].tests[], decoded one at a time;
+                # parsing interleaves with the consumer, so time it per result
+                parse_seconds = 0.0
+                started = perf_counter()
+                for _, result, _ in iter_json_file(process.stdout, {"results"}):
+                    if result.get("status") != "FAIL":
+                        continue
+                    finding = ScanResult(
+                        scanner="kube-bench",
+                        check_id=result.get("test_number", "unknown"),
+                        title=result.get("test_desc", "Unknown check"),
+                        description=result.get("reason", "Check failed"),
+                        severity=self._map_kube_bench_severity(
+                            result.get("scored", True)
+                        ),
+                        resource_type="Kubernetes",
+                        resource_id=f"{context or 'default'}",
+                        remediation=result.get("remediation", ""),
+                        raw_data=result,
+                    )
+                    parse_seconds += perf_counter() - started
+                    yield finding
+                    started = perf_counter()
+                parse_seconds += perf_counter() - started
+                observe_stage("kube-bench", "parse", parse_seconds)
 
         except Exception as e:
             # Return error as finding for visibility
-            return [
-                ScanResult(
-                    scanner="kube-bench",
-                    check_id="ERROR",
-                    title="Scanner execution failed",
-                    description=f"Error running kube-bench: {str(e)}",
-                    severity="high",
-                    raw_data={"error": str(e)},
-                )
-            ]
+            yield ScanResult(
+                scanner="kube-bench",
+                check_id="ERROR",
+                title="Scanner execution failed",
+                description=f"Error running kube-bench: {str(e)}",
+                severity="high",
+                raw_data={"error": str(e)},
+            )
 
     def _map_kube_bench_severity(self, scored: bool) -> str:
         """Map kube-bench scored status to severity"""
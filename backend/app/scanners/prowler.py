@@ -1,35 +1,30 @@
 """
 Prowler scanner integration for AWS security assessment
 """
-from typing import List, Dict, Any
-import subprocess
-import json
-import asyncio
+from typing import List, Dict, Any, AsyncIterator
+from time import perf_counter
 import tempfile
 import os
 from pathlib import Path
-from .base import BaseScanner, ScanResult
+from ..core.metrics import observe_stage, record_process
+from .base import BaseScanner, ScanResult, run_spooled
+from .streaming import ROOT, iter_json_file
 
 
 class ProwlerScanner(BaseScanner):
     """Prowler scanner for AWS security assessment"""
 
-    def _get_version(self) -> str:
-        """Get Prowler version"""
-        try:
-            result = subprocess.run(
-                ["prowler", "--version"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            return result.stdout.strip() or "4.0.0"
-        except Exception:
-            return "4.0.0"
+    name = "prowler"
+    default_version = "4.0.0"
 
     async def scan(self, target: Dict[str, Any]) -> List[ScanResult]:
+        """Execute Prowler scan and return all findings"""
+        return await self.collect_stream(target)
+
+    async def scan_stream(self, target: Dict[str, Any]) -> AsyncIterator[ScanResult]:
         """
-        Execute Prowler scan on AWS account
+        Execute Prowler scan on AWS account, yielding findings while its
+        JSON report is parsed
 
         Args:
             target: {
@@ -50,7 +45,7 @@ class ProwlerScanner(BaseScanner):
 
             # Build prowler command
             cmd = [
-                "prowler",
+                self.binary,
                 "aws",
                 "--output-modes", "json",
                 "--output-filename", "prowler-output",
@@ -68,14 +63,12 @@ class ProwlerScanner(BaseScanner):
             cmd.append("--no-banner")
 
             try:
-                # Run prowler asynchronously
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-
-                stdout, stderr = await process.communicate()
+                # Run prowler asynchronously; its console output is only
+                # spooled (next to the report) for the stderr tail
+                spawned = perf_counter()
+                async with run_spooled(cmd, spool_dir=temp_dir) as process:
+                    runtime = perf_counter() - spawned
+                    returncode, stderr = process.returncode, process.stderr
 
                 # Read JSON output
                 if not output_file.exists():
@@ -84,44 +77,53 @@ class ProwlerScanner(BaseScanner):
                     if json_files:
                         output_file = json_files[0]
                     else:
-                        raise Exception("No output file generated")
-
-                with open(output_file, "r") as f:
-                    results_data = json.load(f)
-
-                # Convert to ScanResult objects
-                findings = []
-                for check in results_data:
-                    if check.get("Status") == "FAIL":
-                        findings.append(
-                            ScanResult(
-                                scanner="prowler",
-                                check_id=check.get("CheckID", "unknown"),
-                                title=check.get("CheckTitle", "Unknown check"),
-                                description=check.get("Description", ""),
-                                severity=self.normalize_severity(
-                                    check.get("Severity", "medium")
-                                ),
-                                resource_type=check.get("ResourceType", "AWS"),
-                                resource_id=check.get("ResourceId", ""),
-                                resource_region=check.get("Region", ""),
-                                remediation=check.get("Remediation", {}).get(
-                                    "Recommendation", ""
-                                ),
-                                raw_data=check,
-                            )
+                        record_process("prowler", returncode, 0, runtime)
+                        raise Exception(f"No output file generated: {stderr}")
+
+                record_process("prowler", returncode, output_file.stat().st_size, runtime)
+
+                # Checks of the top-level array, decoded one at a time;
+                # parsing interleaves with the consumer, so time it per check
+                parse_seconds = 0.0
+                with open(output_file, "rb") as f:
+                    started = perf_counter()
+                    for _, check, _ in iter_json_file(f, {ROOT}):
+                        if check.get("Status") != "FAIL":
+                            continue
+                        finding = ScanResult(
+                            scanner="prowler",
+                            check_id=check.get("CheckID", "unknown"),
+                            title=check.get("CheckTitle", "Unknown check"),
+                            description=check.get("Description", ""),
+                            severity=self.normalize_severity(
+                                check.get("Severity", "medium")
+                            ),
+                            resource_type=check.get("ResourceType", "AWS"),
+                            resource_id=check.get("ResourceId", ""),
+                            resource_region=check.get("Region", ""),
+                            remediation=self._recommendation(check),
+                            raw_data=check,
                         )
-
-                return findings
+                        parse_seconds += perf_counter() - started
+                        yield finding
+                        started = perf_counter()
+                    parse_seconds += perf_counter() - started
+                observe_stage("prowler", "parse", parse_seconds)
 
             except Exception as e:
-                return [
-                    ScanResult(
-                        scanner="prowler",
-                        check_id="ERROR",
-                        title="Scanner execution failed",
-                        description=f"Error running Prowler: {str(e)}",
-                        severity="high",
-                        raw_data={"error": str(e)},
-                    )
-                ]
+                yield ScanResult(
+                    scanner="prowler",
+                    check_id="ERROR",
+                    title="Scanner execution failed",
+                    description=f"Error running Prowler: {str(e)}",
+                    severity="high",
+                    raw_data={"error": str(e)},
+                )
+
+    @staticmethod
+    def _recommendation(check: Dict[str, Any]) -> str:
+        """Remediation text; Prowler nests it as Recommendation.Text"""
+        recommendation = (check.get("Remediation") or {}).get("Recommendation", "")
+        if isinstance(recommendation, dict):
+            return recommendation.get("Text", "")
+        return recommendation or ""
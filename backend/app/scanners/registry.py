@@ -0,0 +1,172 @@
+"""
+Scanner discovery and version registry
+"""
+from typing import Any, Dict, List, Optional, Tuple, Type
+import asyncio
+import logging
+import os
+import shutil
+
+from ..core.config import settings
+from .base import BaseScanner
+from .kube_bench import KubeBenchScanner
+from .prowler import ProwlerScanner
+from .trivy import TrivyScanner
+
+logger = logging.getLogger(__name__)
+
+SCANNER_CLASSES: Dict[str, Type[BaseScanner]] = {
+    "prowler": ProwlerScanner,
+    "kube-bench": KubeBenchScanner,
+    "trivy": TrivyScanner,
+}
+
+# Scanner name -> settings attribute holding its binary path
+SCANNER_BINARY_SETTINGS = {
+    "kube-bench": "KUBE_BENCH_PATH",
+    "prowler": "PROWLER_PATH",
+    "trivy": "TRIVY_PATH",
+    "scout": "SCOUT_SUITE_PATH",
+}
+
+VERSION_PROBE_TIMEOUT_SECONDS = 10
+
+
+class ScannerInfo:
+    """Discovered state of one scanner binary"""
+
+    def __init__(self, name: str, path: str, mtime_ns: Optional[int], version: Optional[str]):
+        self.name = name
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.version = version
+
+    @property
+    def available(self) -> bool:
+        return self.mtime_ns is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "available": self.available,
+            "version": self.version,
+        }
+
+
+class ScannerRegistry:
+    """
+    Discovers scanner binaries once and hands out shared scanner objects.
+
+    Versions are probed with non-blocking subprocesses, all binaries in
+    parallel, and cached by (path, mtime) so an upgraded binary is probed
+    again on the next refresh() while an unchanged one never is.
+    """
+
+    def __init__(self):
+        self._versions: Dict[Tuple[str, int], str] = {}
+        self._info: Dict[str, ScannerInfo] = {}
+        self._scanners: Dict[str, BaseScanner] = {}
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def resolve_binary(name: str) -> str:
+        """Configured path if present, otherwise the executable found on PATH"""
+        configured = getattr(settings, SCANNER_BINARY_SETTINGS[name])
+        if os.path.exists(configured):
+            return configured
+        return shutil.which(name) or shutil.which(os.path.basename(configured)) or configured
+
+    async def discover(self) -> Dict[str, ScannerInfo]:
+        """Probe every known scanner binary concurrently (call at startup)"""
+        async with self._lock:
+            infos = await asyncio.gather(
+                *(self._probe(name) for name in SCANNER_BINARY_SETTINGS)
+            )
+            for info in infos:
+                previous = self._info.get(info.name)
+                self._info[info.name] = info
+                changed = (
+                    previous is None
+                    or previous.path != info.path
+                    or previous.version != info.version
+                )
+                if changed:
+                    logger.info(
+                        "Scanner %s: %s (%s)",
+                        info.name, info.version, info.path if info.available else "not installed",
+                    )
+
+                scanner_cls = SCANNER_CLASSES.get(info.name)
+                if scanner_cls is not None and (changed or info.name not in self._scanners):
+                    self._scanners[info.name] = scanner_cls(
+                        {"binary": info.path}, version=info.version
+                    )
+            return dict(self._info)
+
+    async def refresh(self) -> Dict[str, ScannerInfo]:
+        """Re-stat binaries; only changed ones are probed again"""
+        return await self.discover()
+
+    async def _probe(self, name: str) -> ScannerInfo:
+        path = self.resolve_binary(name)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return ScannerInfo(name, path, None, self._default_version(name))
+
+        cached = self._versions.get((path, mtime_ns))
+        if cached is not None:
+            return ScannerInfo(name, path, mtime_ns, cached)
+
+        version = await self._probe_version(name, path)
+        self._versions[(path, mtime_ns)] = version
+        return ScannerInfo(name, path, mtime_ns, version)
+
+    async def _probe_version(self, name: str, path: str) -> str:
+        scanner_cls = SCANNER_CLASSES.get(name)
+        version_args: List[str] = scanner_cls.version_args if scanner_cls else ["--version"]
+
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                path,
+                *version_args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            stdout, _ = await asyncio.wait_for(
+                process.communicate(), VERSION_PROBE_TIMEOUT_SECONDS
+            )
+            output = stdout.decode(errors="replace")
+            if scanner_cls is not None:
+                return scanner_cls.parse_version(output)
+            return output.strip() or self._default_version(name)
+        except Exception as e:
+            logger.warning("Could not probe %s version: %s", name, e)
+            if process is not None and process.returncode is None:
+                process.kill()
+                await process.wait()
+            return self._default_version(name)
+
+    @staticmethod
+    def _default_version(name: str) -> str:
+        scanner_cls = SCANNER_CLASSES.get(name)
+        return scanner_cls.default_version if scanner_cls else "unknown"
+
+    def get(self, name: str) -> BaseScanner:
+        """Shared scanner instance; falls back to PATH lookup before discovery"""
+        scanner = self._scanners.get(name)
+        if scanner is None:
+            scanner = SCANNER_CLASSES[name]({"binary": self.resolve_binary(name)})
+            self._scanners[name] = scanner
+        return scanner
+
+    def info(self) -> Dict[str, ScannerInfo]:
+        return dict(self._info)
+
+    def versions(self) -> Dict[str, str]:
+        return {name: info.version for name, info in self._info.items()}
+
+
+scanner_registry = ScannerRegistry()
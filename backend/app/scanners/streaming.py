@@ -0,0 +1,218 @@
+"""
+Incremental JSON parsing for large scanner reports
+"""
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+import codecs
+import json
+import mmap
+import os
+import re
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(r"[^\s,:\[\]{}\"]+")
+
+# Array key selecting the elements of a top-level array
+ROOT = "$"
+
+# Bytes of a mapped file handed to the streamer at a time
+FILE_CHUNK_SIZE = 1024 * 1024
+
+
+class JSONArrayStreamer:
+    """
+    Pull complete elements out of selected arrays of a JSON document
+    while it is still being read.
+
+    Only the element currently being decoded is buffered, so memory stays
+    proportional to the largest single element rather than to the whole
+    report. Everything outside the selected arrays is tokenized and
+    discarded.
+
+    Example:
+        streamer = JSONArrayStreamer({"Vulnerabilities"}, {"Target"})
+        for chunk in chunks:
+            for key, element, context in streamer.feed(chunk):
+                ...
+        list(streamer.close())
+
+    Each yielded tuple holds the array key, the decoded element and the
+    ``context_keys`` scalars collected so far in the enclosing objects
+    (innermost wins). ``ROOT`` selects the elements of a top-level array.
+    """
+
+    def __init__(self, array_keys: Set[str], context_keys: Optional[Set[str]] = None):
+        self.array_keys = set(array_keys)
+        self.context_keys = set(context_keys or ())
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+        self._done = False
+        # Stack frames: [kind, key_in_parent, expecting_key, current_key, context]
+        self._stack: List[list] = []
+
+    def feed(self, data) -> Iterator[Tuple[str, Any, Dict[str, Any]]]:
+        """Feed a chunk of bytes (or str) and yield every completed element"""
+        if isinstance(data, str):
+            self._buffer += data
+        else:
+            self._buffer += self._utf8.decode(data)
+        yield from self._parse()
+        self._compact()
+
+    def close(self) -> Iterator[Tuple[str, Any, Dict[str, Any]]]:
+        """Signal end of input and yield any remaining elements"""
+        self._buffer += self._utf8.decode(b"", final=True)
+        self._eof = True
+        yield from self._parse()
+        if self._stack:
+            raise ValueError("Truncated JSON document")
+        self._buffer = ""
+        self._pos = 0
+
+    def _compact(self) -> None:
+        """Drop already-consumed input"""
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+    def _context(self) -> Dict[str, Any]:
+        context: Dict[str, Any] = {}
+        for frame in self._stack:
+            context.update(frame[4])
+        return context
+
+    def _selected_array(self) -> Optional[str]:
+        """Array key if the next value is an element of a selected array"""
+        if self._stack and self._stack[-1][0] == "array" and self._stack[-1][1] in self.array_keys:
+            return self._stack[-1][1]
+        return None
+
+    def _value_done(self) -> None:
+        """Bookkeeping after a complete value has been consumed"""
+        if self._stack and self._stack[-1][0] == "object":
+            self._stack[-1][2] = True
+            self._stack[-1][3] = None
+        elif not self._stack:
+            self._done = True
+
+    def _parse(self) -> Iterator[Tuple[str, Any, Dict[str, Any]]]:
+        buf = self._buffer
+        while True:
+            pos = _WHITESPACE.match(buf, self._pos).end()
+            self._pos = pos
+            if pos >= len(buf):
+                return
+            char = buf[pos]
+
+            if self._done:
+                raise ValueError(f"Extra data after JSON document at offset {pos}")
+
+            if char in ",:":
+                self._pos = pos + 1
+                continue
+
+            if char in "}]":
+                self._stack.pop()
+                self._pos = pos + 1
+                self._value_done()
+                continue
+
+            frame = self._stack[-1] if self._stack else None
+
+            # Object keys
+            if frame is not None and frame[0] == "object" and frame[2]:
+                match = _STRING.match(buf, pos)
+                if match is None:
+                    if self._eof:
+                        raise ValueError(f"Invalid object key at offset {pos}")
+                    return
+                frame[3] = json.loads(match.group())
+                frame[2] = False
+                self._pos = match.end()
+                continue
+
+            # Elements of selected arrays are decoded whole
+            array_key = self._selected_array()
+            if array_key is not None:
+                try:
+                    element, end = self._decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if self._eof:
+                        raise
+                    return
+                if not isinstance(element, (dict, list, str)):
+                    # A bare scalar decodes as soon as it is a valid prefix
+                    # ("1." as 1): only accept it once a delimiter follows
+                    after = _WHITESPACE.match(buf, end).end()
+                    if after >= len(buf):
+                        if not self._eof:
+                            return
+                    elif buf[after] not in ",]":
+                        if self._eof:
+                            raise ValueError(f"Invalid array element at offset {pos}")
+                        return
+                self._pos = end
+                yield array_key, element, self._context()
+                continue
+
+            if frame is None:
+                key = ROOT
+            else:
+                key = frame[3] if frame[0] == "object" else None
+
+            if char == "{":
+                self._stack.append(["object", key, True, None, {}])
+                self._pos = pos + 1
+                continue
+
+            if char == "[":
+                self._stack.append(["array", key, False, None, {}])
+                self._pos = pos + 1
+                continue
+
+            if char == '"':
+                match = _STRING.match(buf, pos)
+                if match is None:
+                    if self._eof:
+                        raise ValueError(f"Unterminated string at offset {pos}")
+                    return
+                if key in self.context_keys:
+                    frame[4][key] = json.loads(match.group())
+                self._pos = match.end()
+                self._value_done()
+                continue
+
+            match = _SCALAR.match(buf, pos)
+            if match is None:
+                raise ValueError(f"Unexpected character {char!r} at offset {pos}")
+            if match.end() >= len(buf) and not self._eof:
+                return
+            if key in self.context_keys:
+                frame[4][key] = json.loads(match.group())
+            self._pos = match.end()
+            self._value_done()
+
+
+def iter_json_file(
+    file: BinaryIO,
+    array_keys: Set[str],
+    context_keys: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, Any, Dict[str, Any]]]:
+    """
+    Stream the elements of selected arrays out of a JSON file
+
+    The file is memory-mapped and fed to a JSONArrayStreamer one slice at
+    a time, so neither the raw report nor its decoded form is ever held
+    in memory as a whole.
+    """
+    size = os.fstat(file.fileno()).st_size
+    if size == 0:
+        raise ValueError("Empty JSON document")
+    streamer = JSONArrayStreamer(array_keys, context_keys)
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for offset in range(0, size, FILE_CHUNK_SIZE):
+            yield from streamer.feed(mapped[offset:offset + FILE_CHUNK_SIZE])
+    yield from streamer.close()
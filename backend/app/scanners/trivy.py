@@ -1,44 +1,47 @@
 """
 Trivy scanner integration for container and IaC security
 """
-from typing import List, Dict, Any
-import subprocess
-import json
+from typing import List, Dict, Any, AsyncIterator
+from time import perf_counter
 import asyncio
-from .base import BaseScanner, ScanResult
+from ..core.metrics import observe_stage, record_process
+from .base import BaseScanner, ScanResult, read_tail
+from .cache import trivy_result_cache
+from .streaming import JSONArrayStreamer
+
+# Bytes read from the trivy pipe per iteration
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class TrivyScanner(BaseScanner):
     """Trivy scanner for container and infrastructure-as-code scanning"""
 
-    def _get_version(self) -> str:
-        """Get Trivy version"""
-        try:
-            result = subprocess.run(
-                ["trivy", "--version"],
-                capture_output=True,
-                text=True,
-                timeout=10,
-            )
-            # Parse version from output
-            lines = result.stdout.strip().split("\n")
-            for line in lines:
-                if "Version:" in line:
-                    return line.split(":")[-1].strip()
-            return "0.50.0"
-        except Exception:
-            return "0.50.0"
+    name = "trivy"
+    default_version = "0.50.0"
+
+    @classmethod
+    def parse_version(cls, output: str) -> str:
+        """Parse version from ``trivy --version`` output"""
+        for line in output.strip().split("\n"):
+            if "Version:" in line:
+                return line.split(":")[-1].strip()
+        return cls.default_version
 
     async def scan(self, target: Dict[str, Any]) -> List[ScanResult]:
+        """Execute Trivy scan and return all findings"""
+        return await self.collect_stream(target)
+
+    async def scan_stream(self, target: Dict[str, Any]) -> AsyncIterator[ScanResult]:
         """
-        Execute Trivy scan
+        Execute Trivy scan, yielding findings while the report is read
 
         Args:
             target: {
                 "type": "trivy",
                 "scan_type": "image" | "filesystem" | "config",
                 "target": "nginx:latest" | "/path/to/scan",
-                "severity": ["CRITICAL", "HIGH"]  # optional
+                "severity": ["CRITICAL", "HIGH"],  # optional
+                "cache": True  # optional, replay results for unchanged content
             }
         """
         scan_type = target.get("scan_type", "image")
@@ -50,88 +53,127 @@ class TrivyScanner(BaseScanner):
 
         # Build trivy command
         cmd = [
-            "trivy",
+            self.binary,
             scan_type,
             "--format", "json",
             "--severity", ",".join(severities),
             scan_target,
         ]
 
+        cache_key = None
+        if target.get("cache", True):
+            cache_key = await trivy_result_cache.key_for(
+                self.binary, self.version, scan_type, scan_target, severities
+            )
+        if cache_key is not None:
+            cached = await trivy_result_cache.load(cache_key)
+            if cached is not None:
+                for result in cached:
+                    yield result
+                return
+
+        writer = trivy_result_cache.writer(cache_key) if cache_key else None
+        process = None
+        stderr_task = None
         try:
             # Run trivy asynchronously
+            spawned = perf_counter()
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
             )
 
-            stdout, stderr = await process.communicate()
-
-            if process.returncode != 0 and not stdout:
-                raise Exception(f"Trivy failed: {stderr.decode()}")
-
-            # Parse JSON output
-            results_data = json.loads(stdout.decode())
-
-            # Convert to ScanResult objects
-            findings = []
-
-            # Handle different output formats
-            results_list = results_data.get("Results", [])
-            if not results_list and isinstance(results_data, list):
-                results_list = results_data
-
-            for result in results_list:
-                target_name = result.get("Target", scan_target)
-                vulns = result.get("Vulnerabilities", [])
-                misconfigs = result.get("Misconfigurations", [])
-
-                # Process vulnerabilities
-                for vuln in vulns or []:
-                    findings.append(
-                        ScanResult(
-                            scanner="trivy",
-                            check_id=vuln.get("VulnerabilityID", "unknown"),
-                            title=f"{vuln.get('PkgName', 'Unknown')} - {vuln.get('VulnerabilityID', '')}",
-                            description=vuln.get("Description", vuln.get("Title", "")),
-                            severity=self.normalize_severity(vuln.get("Severity", "medium")),
-                            resource_type="Package",
-                            resource_id=f"{vuln.get('PkgName', '')}@{vuln.get('InstalledVersion', '')}",
-                            remediation=f"Upgrade to version {vuln.get('FixedVersion', 'latest')}"
-                            if vuln.get("FixedVersion")
-                            else "No fix available",
-                            raw_data=vuln,
-                        )
-                    )
-
-                # Process misconfigurations
-                for misconfig in misconfigs or []:
-                    findings.append(
-                        ScanResult(
-                            scanner="trivy",
-                            check_id=misconfig.get("ID", "unknown"),
-                            title=misconfig.get("Title", "Unknown misconfiguration"),
-                            description=misconfig.get("Description", ""),
-                            severity=self.normalize_severity(
-                                misconfig.get("Severity", "medium")
-                            ),
-                            resource_type="Configuration",
-                            resource_id=target_name,
-                            remediation=misconfig.get("Resolution", ""),
-                            raw_data=misconfig,
-                        )
-                    )
-
-            return findings
+            # Drain stderr concurrently so a chatty trivy cannot block on a
+            # full pipe, keeping only its tail for the error message
+            stderr_task = asyncio.ensure_future(read_tail(process.stderr))
+
+            streamer = JSONArrayStreamer(
+                {"Vulnerabilities", "Misconfigurations"}, {"Target"}
+            )
+            received = False
+            output_bytes = 0
+            # Parsing interleaves with the consumer: time it per chunk
+            parse_seconds = 0.0
+
+            while True:
+                chunk = await process.stdout.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                received = True
+                output_bytes += len(chunk)
+                started = perf_counter()
+                results = [
+                    self._to_scan_result(key, item, context.get("Target", scan_target))
+                    for key, item, context in streamer.feed(chunk)
+                ]
+                parse_seconds += perf_counter() - started
+                for result in results:
+                    if writer is not None:
+                        writer.add(result)
+                    yield result
+
+            await process.wait()
+            stderr = await stderr_task
+            record_process("trivy", process.returncode, output_bytes, perf_counter() - spawned)
+            observe_stage("trivy", "parse", parse_seconds)
+
+            if process.returncode != 0 and not received:
+                raise Exception(f"Trivy failed: {stderr.decode(errors='replace')}")
+
+            for key, item, context in streamer.close():
+                result = self._to_scan_result(key, item, context.get("Target", scan_target))
+                if writer is not None:
+                    writer.add(result)
+                yield result
+
+            # Only complete, successful reports are worth replaying
+            if writer is not None and process.returncode == 0:
+                await writer.commit()
 
         except Exception as e:
-            return [
-                ScanResult(
-                    scanner="trivy",
-                    check_id="ERROR",
-                    title="Scanner execution failed",
-                    description=f"Error running Trivy: {str(e)}",
-                    severity="high",
-                    raw_data={"error": str(e)},
-                )
-            ]
+            yield ScanResult(
+                scanner="trivy",
+                check_id="ERROR",
+                title="Scanner execution failed",
+                description=f"Error running Trivy: {str(e)}",
+                severity="high",
+                raw_data={"error": str(e)},
+            )
+
+        finally:
+            # Consumer stopped early or scan was cancelled
+            if process is not None and process.returncode is None:
+                process.kill()
+                await process.wait()
+            if stderr_task is not None and not stderr_task.done():
+                stderr_task.cancel()
+
+    def _to_scan_result(self, key: str, item: Dict[str, Any], target_name: str) -> ScanResult:
+        """Convert a Vulnerabilities/Misconfigurations element to a ScanResult"""
+        if key == "Vulnerabilities":
+            return ScanResult(
+                scanner="trivy",
+                check_id=item.get("VulnerabilityID", "unknown"),
+                title=f"{item.get('PkgName', 'Unknown')} - {item.get('VulnerabilityID', '')}",
+                description=item.get("Description", item.get("Title", "")),
+                severity=self.normalize_severity(item.get("Severity", "medium")),
+                resource_type="Package",
+                resource_id=f"{item.get('PkgName', '')}@{item.get('InstalledVersion', '')}",
+                remediation=f"Upgrade to version {item.get('FixedVersion', 'latest')}"
+                if item.get("FixedVersion")
+                else "No fix available",
+                raw_data=item,
+            )
+
+        return ScanResult(
+            scanner="trivy",
+            check_id=item.get("ID", "unknown"),
+            title=item.get("Title", "Unknown misconfiguration"),
+            description=item.get("Description", ""),
+            severity=self.normalize_severity(item.get("Severity", "medium")),
+            resource_type="Configuration",
+            resource_id=target_name,
+            remediation=item.get("Resolution", ""),
+            raw_data=item,
+        )
@@ -0,0 +1,178 @@
+"""
+Columnar Parquet archive of completed audits' findings
+"""
+from typing import Any, List, Optional, Tuple
+from datetime import datetime, timezone
+from functools import lru_cache
+import asyncio
+import json
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.lazy import lazy_import
+from ..models.models import Audit, Finding, ScanStatusEnum
+
+# Only processes that archive or read trends pay for pyarrow
+pa = lazy_import("pyarrow")
+pafs = lazy_import("pyarrow.fs")
+pq = lazy_import("pyarrow.parquet")
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def archive_schema() -> "pa.Schema":
+    # Low-cardinality columns are dictionary-encoded (in Arrow and in Parquet)
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("audit_id", pa.int64()),
+        ("finding_hash", pa.string()),
+        ("scanner", dictionary),
+        ("check_id", dictionary),
+        ("severity", dictionary),
+        ("status", dictionary),
+        ("resource_type", dictionary),
+        ("resource_region", dictionary),
+        ("resource_id", pa.string()),
+        ("title", pa.string()),
+    ])
+
+_COLUMNS = (
+    Finding.audit_id,
+    Finding.finding_hash,
+    Finding.scanner,
+    Finding.check_id,
+    Finding.severity,
+    Finding.status,
+    Finding.resource_type,
+    Finding.resource_region,
+    Finding.resource_id,
+    Finding.title,
+)
+
+# Key of the per-file audit summary in the Parquet footer
+AUDIT_METADATA_KEY = b"compliance_radar.audit"
+
+
+def _to_batch(rows: List[Any]) -> "pa.RecordBatch":
+    columns = list(zip(*rows))
+    # severity is a SeverityEnum; archive its value ("critical")
+    columns[4] = [severity.value for severity in columns[4]]
+    schema = archive_schema()
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+        schema=schema,
+    )
+
+
+class FindingsArchive:
+    """
+    Writes each completed audit's findings to one Parquet file.
+
+    Files are hive-partitioned as
+    ``<root>/environment_id=<id>/month=<YYYY-MM>/audit-<id>.parquet`` so
+    trend queries read only the environment and months they need. The
+    audit's scores travel in the file footer. ``raw_data`` and
+    descriptions are left out: the archive is for analytics, the
+    database remains the system of record. Files are written once, so
+    statuses are as of completion and later triage is not reflected.
+
+    The root is a local directory or a prefix in a MinIO (S3) bucket,
+    accessed through pyarrow's filesystem layer either way.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend or settings.FINDINGS_ARCHIVE_BACKEND
+        self._filesystem: Optional[Tuple["pafs.FileSystem", str]] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend in ("local", "minio")
+
+    def filesystem(self) -> Tuple["pafs.FileSystem", str]:
+        """(filesystem, root path) of the archive"""
+        if self._filesystem is None:
+            if self.backend == "minio":
+                filesystem = pafs.S3FileSystem(
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    endpoint_override=settings.MINIO_ENDPOINT,
+                    scheme="https" if settings.MINIO_SECURE else "http",
+                )
+                root = f"{settings.FINDINGS_ARCHIVE_BUCKET}/findings"
+            else:
+                filesystem = pafs.LocalFileSystem()
+                root = settings.FINDINGS_ARCHIVE_DIR
+            filesystem.create_dir(root, recursive=True)
+            self._filesystem = (filesystem, root)
+        return self._filesystem
+
+    def environment_path(self, environment_id: int) -> str:
+        return f"{self.filesystem()[1]}/environment_id={environment_id}"
+
+    def audit_path(self, environment_id: int, completed_at: datetime, audit_id: int) -> str:
+        month = completed_at.strftime("%Y-%m")
+        return f"{self.environment_path(environment_id)}/month={month}/audit-{audit_id}.parquet"
+
+    async def archive_audit(self, session: AsyncSession, audit_id: int) -> Optional[str]:
+        """Write one completed audit to the archive, returning the file path"""
+        if not self.enabled:
+            return None
+        audit = await session.get(Audit, audit_id)
+        if audit is None or audit.status != ScanStatusEnum.COMPLETED:
+            return None
+
+        completed_at = audit.completed_at or datetime.now(timezone.utc)
+        summary = {
+            "audit_id": audit.id,
+            "environment_id": audit.environment_id,
+            "completed_at": completed_at.isoformat(),
+            "overall_score": audit.overall_score,
+            "conformity_scores": audit.conformity_scores or {},
+            "scanner_versions": audit.scanner_versions or {},
+            "failed_scanners": audit.failed_scanners or {},
+        }
+        schema = archive_schema().with_metadata({AUDIT_METADATA_KEY: json.dumps(summary)})
+
+        filesystem, _ = await asyncio.to_thread(self.filesystem)
+        path = self.audit_path(audit.environment_id, completed_at, audit.id)
+        # Local writes go through a dot-file (skipped by dataset discovery) so
+        # readers never see a partial file; S3 objects appear on upload completion
+        directory, filename = path.rsplit("/", 1)
+        if isinstance(filesystem, pafs.LocalFileSystem):
+            write_path = f"{directory}/.{filename}.tmp"
+        else:
+            write_path = path
+        await asyncio.to_thread(filesystem.create_dir, directory, recursive=True)
+
+        writer = await asyncio.to_thread(
+            pq.ParquetWriter, write_path, schema, filesystem=filesystem, compression="zstd"
+        )
+        rows = 0
+        try:
+            result = await session.stream(
+                select(*_COLUMNS)
+                .where(Finding.audit_id == audit_id)
+                .order_by(Finding.id)
+                .execution_options(yield_per=settings.FINDINGS_ARCHIVE_BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                batch = _to_batch(partition)
+                await asyncio.to_thread(writer.write_batch, batch)
+                rows += batch.num_rows
+        except BaseException:
+            await asyncio.to_thread(writer.close)
+            await asyncio.to_thread(filesystem.delete_file, write_path)
+            raise
+        await asyncio.to_thread(writer.close)
+
+        if write_path != path:
+            await asyncio.to_thread(filesystem.move, write_path, path)
+        logger.info("Archived %d findings of audit %s to %s", rows, audit_id, path)
+        return path
+
+
+findings_archive = FindingsArchive()
@@ -0,0 +1,132 @@
+"""
+Set-based diffing of audits by finding hash
+"""
+from typing import Any, Dict, Optional
+import logging
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import Audit, AuditDiff, ScanStatusEnum
+from .scan_failures import failed_scanners
+
+logger = logging.getLogger(__name__)
+
+# One pass over both audits: a hash full outer join of their distinct hashes.
+# Failure pseudo-findings are not findings, and a scanner that failed in
+# either audit is left out of both: its missing findings are not fixes
+# and its reappearing ones are not new.
+DIFF_SQL = text("""
+    WITH cur AS (
+        SELECT DISTINCT finding_hash FROM findings
+        WHERE audit_id = :audit_id
+          AND check_id NOT IN ('ERROR', 'TIMEOUT') AND scanner <> ALL(:failed_scanners)
+    ), prev AS (
+        SELECT DISTINCT finding_hash FROM findings
+        WHERE audit_id = :against_audit_id
+          AND check_id NOT IN ('ERROR', 'TIMEOUT') AND scanner <> ALL(:failed_scanners)
+    )
+    SELECT
+        coalesce(array_agg(cur.finding_hash) FILTER (WHERE prev.finding_hash IS NULL), '{}') AS new,
+        coalesce(array_agg(prev.finding_hash) FILTER (WHERE cur.finding_hash IS NULL), '{}') AS fixed,
+        count(*) FILTER (WHERE cur.finding_hash IS NOT NULL AND prev.finding_hash IS NOT NULL) AS persisting
+    FROM cur FULL OUTER JOIN prev ON cur.finding_hash = prev.finding_hash
+""")
+
+
+def diff_to_dict(diff: AuditDiff, include_hashes: bool = False) -> Dict[str, Any]:
+    data = {
+        "audit_id": diff.audit_id,
+        "against_audit_id": diff.against_audit_id,
+        "new": diff.new_count,
+        "fixed": diff.fixed_count,
+        "persisting": diff.persisting_count,
+        "computed_at": diff.created_at.isoformat() if diff.created_at else None,
+    }
+    if include_hashes:
+        data["new_hashes"] = diff.new_hashes or []
+        data["fixed_hashes"] = diff.fixed_hashes or []
+    return data
+
+
+class AuditDiffEngine:
+    """
+    Classifies findings of an audit as new, fixed or persisting relative
+    to another audit of the same environment.
+
+    Diffs are computed once in PostgreSQL and stored in ``audit_diffs``;
+    later requests for the same pair read the stored row.
+    """
+
+    async def previous_audit_id(self, session: AsyncSession, audit: Audit) -> Optional[int]:
+        """Most recent completed audit of the same environment before this one"""
+        result = await session.execute(
+            select(Audit.id)
+            .where(
+                Audit.environment_id == audit.environment_id,
+                Audit.status == ScanStatusEnum.COMPLETED,
+                Audit.id < audit.id,
+            )
+            .order_by(Audit.id.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    async def get_or_compute(
+        self, session: AsyncSession, audit_id: int, against_audit_id: int
+    ) -> AuditDiff:
+        stored = await session.execute(
+            select(AuditDiff).where(
+                AuditDiff.audit_id == audit_id,
+                AuditDiff.against_audit_id == against_audit_id,
+            )
+        )
+        diff = stored.scalar_one_or_none()
+        if diff is not None:
+            return diff
+
+        failed = await failed_scanners(session, [audit_id, against_audit_id])
+        row = (
+            await session.execute(
+                DIFF_SQL,
+                {"audit_id": audit_id, "against_audit_id": against_audit_id, "failed_scanners": sorted(failed)},
+            )
+        ).one()
+
+        # Concurrent requests for the same pair: first writer wins
+        await session.execute(
+            insert(AuditDiff)
+            .values(
+                audit_id=audit_id,
+                against_audit_id=against_audit_id,
+                new_count=len(row.new),
+                fixed_count=len(row.fixed),
+                persisting_count=row.persisting,
+                new_hashes=list(row.new),
+                fixed_hashes=list(row.fixed),
+            )
+            .on_conflict_do_nothing(constraint="uq_audit_diffs_pair")
+        )
+        await session.commit()
+
+        stored = await session.execute(
+            select(AuditDiff).where(
+                AuditDiff.audit_id == audit_id,
+                AuditDiff.against_audit_id == against_audit_id,
+            )
+        )
+        return stored.scalar_one()
+
+    async def diff_with_previous(self, session: AsyncSession, audit_id: int) -> Optional[AuditDiff]:
+        """Diff a just-completed audit against its predecessor, if any"""
+        audit = await session.get(Audit, audit_id)
+        if audit is None:
+            return None
+        against_audit_id = await self.previous_audit_id(session, audit)
+        if against_audit_id is None:
+            return None
+        return await self.get_or_compute(session, audit_id, against_audit_id)
+
+
+audit_diff_engine = AuditDiffEngine()
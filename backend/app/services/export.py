@@ -0,0 +1,117 @@
+"""
+Streaming export of audit findings
+"""
+from typing import Any, AsyncIterator, Dict, Iterable
+import csv
+import io
+import json
+import zlib
+
+from sqlalchemy import select
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models.models import Finding
+
+EXPORT_COLUMNS = (
+    Finding.id,
+    Finding.finding_hash,
+    Finding.scanner,
+    Finding.check_id,
+    Finding.title,
+    Finding.description,
+    Finding.severity,
+    Finding.resource_type,
+    Finding.resource_id,
+    Finding.resource_region,
+    Finding.remediation,
+    Finding.status,
+    Finding.assigned_to,
+    Finding.created_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+
+def _plain(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if hasattr(value, "value"):  # SeverityEnum
+        return value.value
+    return value
+
+
+def _encode_ndjson(rows: Iterable[Any]) -> bytes:
+    lines = [
+        json.dumps(dict(zip(EXPORT_FIELDS, map(_plain, row))), ensure_ascii=False, separators=(",", ":"))
+        for row in rows
+    ]
+    lines.append("")
+    return "\n".join(lines).encode()
+
+
+class _CSVEncoder:
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(EXPORT_FIELDS)
+        return self._drain()
+
+    def encode(self, rows: Iterable[Any]) -> bytes:
+        self._writer.writerows([map(_plain, row) for row in rows])
+        return self._drain()
+
+
+async def _export_chunks(audit_id: int, fmt: str) -> AsyncIterator[bytes]:
+    csv_encoder = _CSVEncoder() if fmt == "csv" else None
+    if csv_encoder is not None:
+        yield csv_encoder.header()
+
+    # Own session: the request's session is closed before the body streams.
+    # stream() + yield_per runs a server-side cursor, one partition in memory.
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            select(*EXPORT_COLUMNS)
+            .where(Finding.audit_id == audit_id)
+            .order_by(Finding.id)
+            .execution_options(yield_per=settings.FINDINGS_EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield csv_encoder.encode(rows) if csv_encoder is not None else _encode_ndjson(rows)
+
+
+async def _gzip(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(level=6, wbits=31)  # gzip container
+    async for chunk in chunks:
+        # Flush per chunk so the client receives data as it is produced
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def export_findings(audit_id: int, fmt: str, gzip: bool = False) -> AsyncIterator[bytes]:
+    """Body iterator for a StreamingResponse exporting all findings of an audit"""
+    chunks = _export_chunks(audit_id, fmt)
+    return _gzip(chunks) if gzip else chunks
+
+
+def export_headers(audit_id: int, fmt: str, gzip: bool = False) -> Dict[str, str]:
+    extension = EXPORT_FORMATS[fmt][1] + (".gz" if gzip else "")
+    return {"Content-Disposition": f'attachment; filename="scan-{audit_id}-findings.{extension}"'}
+
+
+def export_media_type(fmt: str, gzip: bool = False) -> str:
+    return "application/gzip" if gzip else EXPORT_FORMATS[fmt][0]
+
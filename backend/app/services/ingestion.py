@@ -0,0 +1,181 @@
+"""
+Bulk persistence of scanner findings through PostgreSQL COPY
+"""
+from typing import List, Any, Optional, Callable, Awaitable, Tuple
+from itertools import repeat
+import asyncio
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..core.config import settings
+from ..core.database import async_engine
+from ..core.metrics import observe_stage, time_stage
+from ..models.models import Finding, SeverityEnum
+from ..scanners.base import ScanResult
+from ..scanners.batch import FindingBatch
+from .raw_store import raw_blob_store
+
+logger = logging.getLogger(__name__)
+
+# Columns written by COPY; id and timestamps use their server defaults
+FINDING_COLUMNS = [
+    "audit_id",
+    "finding_hash",
+    "scanner",
+    "check_id",
+    "title",
+    "description",
+    "severity",
+    "resource_type",
+    "resource_id",
+    "resource_region",
+    "remediation",
+    "status",
+    "raw_hash",
+]
+
+
+class IngestStats:
+    """Throughput counters for one ingestion run"""
+
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.copy_seconds = 0.0
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rows_per_second(self) -> float:
+        """Rows written per second of COPY time"""
+        return self.rows / self.copy_seconds if self.copy_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "copy_seconds": round(self.copy_seconds, 3),
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+# SQLAlchemy stores Enum columns by member name
+_SEVERITY_LABELS = {member.value: member.name for member in SeverityEnum}
+
+
+def to_copy_records(audit_id: int, batch: FindingBatch, raw_hashes: List[str]) -> List[Tuple[Any, ...]]:
+    """Build COPY records in FINDING_COLUMNS order from a whole batch"""
+    severities = [_SEVERITY_LABELS[severity] for severity in batch.severity]
+    return list(zip(
+        repeat(audit_id),
+        batch.finding_hash,
+        batch.scanner,
+        batch.check_id,
+        batch.title,
+        batch.description,
+        severities,
+        batch.resource_type,
+        batch.resource_id,
+        batch.resource_region,
+        batch.remediation,
+        repeat("open"),
+        raw_hashes,
+    ))
+
+
+class FindingIngestor:
+    """
+    Buffers findings of an audit and writes them in COPY batches.
+
+    Findings can be added while a scanner is still streaming; every full
+    batch is copied in the background while the next one fills up, with
+    at most one COPY in flight per ingestor.
+
+    Example:
+        ingestor = FindingIngestor(audit_id)
+        async for result in scanner.scan_stream(target):
+            await ingestor.add(result)
+        stats = await ingestor.close()
+    """
+
+    def __init__(
+        self,
+        audit_id: int,
+        batch_size: Optional[int] = None,
+        engine: Optional[AsyncEngine] = None,
+        transform: Optional[Callable[[List[ScanResult]], Awaitable[List[ScanResult]]]] = None,
+    ):
+        self.audit_id = audit_id
+        self.batch_size = batch_size or settings.FINDINGS_COPY_BATCH_SIZE
+        self.engine = engine or async_engine
+        self.transform = transform
+        self.stats = IngestStats()
+        self._pending = FindingBatch()
+        self._inflight: Optional[asyncio.Task] = None
+
+    async def add(self, result: ScanResult) -> None:
+        """Queue one finding, flushing when the batch is full"""
+        self._pending.append(result)
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Hand the current batch to COPY, waiting for the previous one first"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, FindingBatch()
+        await self._wait_inflight()
+        self._inflight = asyncio.create_task(self._copy(batch))
+
+    async def close(self) -> IngestStats:
+        """Flush remaining findings and return throughput stats"""
+        await self.flush()
+        await self._wait_inflight()
+        self.stats.finished = time.monotonic()
+        logger.info(
+            "Ingested %d findings for audit %s in %d batches (%.0f rows/s)",
+            self.stats.rows, self.audit_id, self.stats.batches, self.stats.rows_per_second,
+        )
+        return self.stats
+
+    async def _wait_inflight(self) -> None:
+        if self._inflight is not None:
+            task, self._inflight = self._inflight, None
+            await task
+
+    async def _copy(self, batch: FindingBatch) -> None:
+        # An ingestor serves a single scanner run
+        scanner = batch.scanner[0]
+        if self.transform is not None:
+            with time_stage(scanner, "post_process"):
+                batch = FindingBatch.from_results(await self.transform(list(batch)))
+        if not batch:
+            return
+        with time_stage(scanner, "prepare"):
+            raw_hashes, blobs = await asyncio.to_thread(raw_blob_store.prepare, batch.raw_json)
+            records = to_copy_records(self.audit_id, batch, raw_hashes)
+
+        started = time.monotonic()
+        async with self.engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            # Blobs first so a visible finding always has its raw data
+            await raw_blob_store.store(raw.driver_connection, blobs)
+            # Outside a transaction asyncpg commits each COPY on its own,
+            # so findings become visible while the scan is still running
+            await raw.driver_connection.copy_records_to_table(
+                Finding.__tablename__,
+                records=records,
+                columns=FINDING_COLUMNS,
+            )
+        elapsed = time.monotonic() - started
+        observe_stage(scanner, "copy", elapsed)
+        self.stats.copy_seconds += elapsed
+        self.stats.rows += len(records)
+        self.stats.batches += 1
@@ -0,0 +1,398 @@
+"""
+Regulation mapping engine built from regulation-mappings/*.json
+"""
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from fnmatch import fnmatchcase
+from pathlib import Path
+import asyncio
+import hashlib
+import json
+import logging
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models.models import Control, Regulation
+from .response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# (regulation code, control id)
+ControlKey = Tuple[str, str]
+# (scanner, check id or pattern)
+CheckKey = Tuple[str, str]
+
+_EMPTY: FrozenSet[ControlKey] = frozenset()
+
+# Bound on memoized wildcard lookups (trivy emits one check_id per CVE)
+LOOKUP_MEMO_SIZE = 200_000
+
+PERSIST_MAPPINGS_SQL = text("""
+    INSERT INTO control_mappings (finding_id, control_id, confidence_score, mapping_source)
+    SELECT f.id, m.control_pk, 1.0, 'rules'
+    FROM findings f
+    JOIN unnest(
+        CAST(:scanners AS text[]), CAST(:check_ids AS text[]), CAST(:control_pks AS integer[])
+    ) AS m(scanner, check_id, control_pk)
+      ON f.scanner = m.scanner AND f.check_id = m.check_id
+    WHERE f.audit_id = :audit_id
+""")
+
+
+def _is_pattern(check_id: str) -> bool:
+    return any(char in check_id for char in "*?[")
+
+
+def validate_document(document: Any) -> None:
+    """Raise ValueError unless a regulation file has every key the index reads"""
+    if not isinstance(document, dict):
+        raise ValueError("top level is not an object")
+    regulation = document.get("regulation")
+    if not isinstance(regulation, dict) or not isinstance(regulation.get("code"), str):
+        raise ValueError("regulation.code is missing")
+    controls = document.get("controls", [])
+    if not isinstance(controls, list):
+        raise ValueError("controls is not a list")
+    for position, control in enumerate(controls):
+        if not isinstance(control, dict) or not isinstance(control.get("control_id"), str):
+            raise ValueError(f"controls[{position}].control_id is missing")
+        checks = control.get("mapped_scanner_checks", [])
+        if not isinstance(checks, list) or not all(
+            isinstance(check, dict) and isinstance(check.get("scanner"), str) and isinstance(check.get("check_id"), str)
+            for check in checks
+        ):
+            raise ValueError(f"{control['control_id']}: mapped_scanner_checks need a scanner and a check_id")
+        requirements = control.get("requirements", [])
+        if not isinstance(requirements, list) or not all(isinstance(requirement, str) for requirement in requirements):
+            raise ValueError(f"{control['control_id']}: requirements is not a list of strings")
+
+
+class RegulationIndex:
+    """Immutable snapshot of all loaded regulation files"""
+
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self.regulations: Dict[str, Dict[str, Any]] = {}
+        self.controls: Dict[ControlKey, Dict[str, Any]] = {}
+        # Distinct check columns, in a stable order (used for scoring)
+        self.checks: List[CheckKey] = []
+        self.check_index: Dict[CheckKey, int] = {}
+        self.check_controls: Dict[CheckKey, Set[ControlKey]] = {}
+
+        self._exact: Dict[CheckKey, FrozenSet[ControlKey]] = {}
+        self._prefixes: Dict[str, List[Tuple[str, CheckKey]]] = {}
+        self._patterns: Dict[str, List[Tuple[str, CheckKey]]] = {}
+        self._memo: Dict[CheckKey, FrozenSet[ControlKey]] = {}
+
+        for document in documents:
+            self._add_document(document)
+
+        for key, controls in self.check_controls.items():
+            scanner, check_id = key
+            if not _is_pattern(check_id):
+                self._exact[key] = frozenset(controls)
+            elif check_id.endswith("*") and not _is_pattern(check_id[:-1]):
+                self._prefixes.setdefault(scanner, []).append((check_id[:-1], key))
+            else:
+                self._patterns.setdefault(scanner, []).append((check_id, key))
+
+        # Longest prefix first so lookups can stop at the most specific match
+        for prefixes in self._prefixes.values():
+            prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+
+    def _add_document(self, document: Dict[str, Any]) -> None:
+        regulation = document.get("regulation", {})
+        code = regulation["code"]
+        controls = document.get("controls", [])
+        self.regulations[code] = {**regulation, "controls_count": len(controls)}
+
+        for control in controls:
+            control_key = (code, control["control_id"])
+            self.controls[control_key] = control
+            for check in control.get("mapped_scanner_checks", []):
+                check_key = (check["scanner"], check["check_id"])
+                if check_key not in self.check_index:
+                    self.check_index[check_key] = len(self.checks)
+                    self.checks.append(check_key)
+                self.check_controls.setdefault(check_key, set()).add(control_key)
+
+    def matching_checks(self, scanner: str, check_id: str) -> List[CheckKey]:
+        """Check columns (exact and wildcard) a finding falls under"""
+        matches = []
+        if (scanner, check_id) in self._exact:
+            matches.append((scanner, check_id))
+        for prefix, key in self._prefixes.get(scanner, ()):
+            if check_id.startswith(prefix):
+                matches.append(key)
+        for pattern, key in self._patterns.get(scanner, ()):
+            if fnmatchcase(check_id, pattern):
+                matches.append(key)
+        return matches
+
+    def lookup(self, scanner: str, check_id: str) -> FrozenSet[ControlKey]:
+        """Controls affected by a finding; O(1) for exact and memoized checks"""
+        key = (scanner, check_id)
+        found = self._exact.get(key)
+        if found is not None and not self._prefixes.get(scanner) and not self._patterns.get(scanner):
+            return found
+
+        found = self._memo.get(key)
+        if found is not None:
+            return found
+
+        controls: Set[ControlKey] = set()
+        for check_key in self.matching_checks(scanner, check_id):
+            controls |= self.check_controls[check_key]
+        found = frozenset(controls) if controls else _EMPTY
+
+        if len(self._memo) >= LOOKUP_MEMO_SIZE:
+            self._memo.clear()
+        self._memo[key] = found
+        return found
+
+
+class RegulationMappingEngine:
+    """
+    Maps findings to regulatory controls.
+
+    All files in REGULATION_MAPPINGS_DIR are loaded into an inverted
+    index from (scanner, check_id) to the (regulation, control) pairs it
+    affects. The directory is polled and the index rebuilt and swapped
+    atomically whenever a file is added, removed or modified.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = self._resolve_directory(directory or settings.REGULATION_MAPPINGS_DIR)
+        self.index = RegulationIndex([])
+        self._mtimes: Dict[str, int] = {}
+        self._control_pks: Optional[Dict[ControlKey, int]] = None
+        self._watch_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _resolve_directory(directory: str) -> Path:
+        path = Path(directory)
+        if path.is_absolute() or path.exists():
+            return path
+        # Running from backend/: mappings live at the repository root
+        return Path(__file__).resolve().parents[3] / path
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _scan_mtimes(self) -> Dict[str, int]:
+        if not self.directory.is_dir():
+            return {}
+        return {str(path): path.stat().st_mtime_ns for path in sorted(self.directory.glob("*.json"))}
+
+    def load(self) -> RegulationIndex:
+        """(Re)build the index from disk"""
+        mtimes = self._scan_mtimes()
+        documents = []
+        for path in mtimes:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    document = json.load(f)
+                validate_document(document)
+                documents.append(document)
+            except (OSError, ValueError) as e:
+                logger.error("Skipping invalid regulation mapping %s: %s", path, e)
+
+        self.index = RegulationIndex(documents)
+        self._mtimes = mtimes
+        self._control_pks = None
+        logger.info(
+            "Loaded %d regulations, %d controls, %d mapped checks from %s",
+            len(self.index.regulations), len(self.index.controls), len(self.index.checks), self.directory,
+        )
+        return self.index
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the loaded files; equal across workers reading the same directory"""
+        material = json.dumps(sorted((Path(path).name, mtime) for path, mtime in self._mtimes.items()))
+        return hashlib.sha256(material.encode()).hexdigest()[:16]
+
+    def reload_if_changed(self) -> bool:
+        if self._scan_mtimes() == self._mtimes:
+            return False
+        self.load()
+        return True
+
+    async def watch(self, interval: Optional[float] = None) -> None:
+        """Poll the mapping directory and hot-reload on change"""
+        interval = interval or settings.REGULATION_MAPPINGS_RELOAD_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self.reload_if_changed):
+                    await response_cache.invalidate("regulations")
+                    # Imported here: the chat index itself reads this engine
+                    from ..ai.rag_engine import rag_engine
+
+                    await rag_engine.sync_controls()
+            except Exception:
+                logger.exception("Reloading regulation mappings failed")
+
+    def start(self) -> None:
+        """Load now and start the hot-reload watcher"""
+        self.load()
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self.watch())
+
+    async def stop(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    # ------------------------------------------------------------------
+    # Mapping
+    # ------------------------------------------------------------------
+
+    def lookup(self, scanner: str, check_id: str) -> FrozenSet[ControlKey]:
+        return self.index.lookup(scanner, check_id)
+
+    def map_checks(self, check_keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], FrozenSet[ControlKey]]:
+        """Map distinct (scanner, check_id) pairs, e.g. those of one audit"""
+        index = self.index
+        mapped = {}
+        for scanner, check_id in check_keys:
+            controls = index.lookup(scanner, check_id)
+            if controls:
+                mapped[(scanner, check_id)] = controls
+        return mapped
+
+    async def sync_controls(self, session: AsyncSession) -> Dict[ControlKey, int]:
+        """Upsert Regulation/Control rows for the loaded files, returning control ids"""
+        if self._control_pks is not None:
+            return self._control_pks
+
+        index = self.index
+        for code, regulation in index.regulations.items():
+            await session.execute(
+                insert(Regulation)
+                .values(
+                    code=code,
+                    name=regulation.get("name", code),
+                    version=regulation.get("version"),
+                    description=regulation.get("description"),
+                    mandatory_for=regulation.get("mandatory_for") or regulation.get("scope"),
+                )
+                .on_conflict_do_update(
+                    index_elements=[Regulation.code],
+                    set_={
+                        "name": regulation.get("name", code),
+                        "version": regulation.get("version"),
+                        "description": regulation.get("description"),
+                    },
+                )
+            )
+
+        regulation_ids = dict(
+            (await session.execute(select(Regulation.code, Regulation.id))).all()
+        )
+
+        rows = [
+            {
+                "regulation_id": regulation_ids[code],
+                "control_id": control_id,
+                "title": control.get("title", control_id),
+                "description": control.get("description", ""),
+                "category": control.get("category"),
+                "priority": control.get("priority"),
+            }
+            for (code, control_id), control in index.controls.items()
+        ]
+        if rows:
+            statement = insert(Control).values(rows)
+            await session.execute(
+                statement.on_conflict_do_update(
+                    constraint="uq_controls_regulation_control",
+                    set_={
+                        "title": statement.excluded.title,
+                        "description": statement.excluded.description,
+                        "category": statement.excluded.category,
+                        "priority": statement.excluded.priority,
+                    },
+                )
+            )
+        await session.commit()
+
+        result = await session.execute(
+            select(Regulation.code, Control.control_id, Control.id).join(
+                Control, Control.regulation_id == Regulation.id
+            )
+        )
+        control_pks = {(code, control_id): pk for code, control_id, pk in result.all()}
+        # Only cache if the index was not swapped meanwhile
+        if index is self.index:
+            self._control_pks = control_pks
+        return control_pks
+
+    async def persist_audit_mappings(self, session: AsyncSession, audit_id: int) -> int:
+        """Create ControlMapping rows for a whole audit in one INSERT ... SELECT"""
+        control_pks = await self.sync_controls(session)
+
+        distinct_checks = await session.execute(
+            text("SELECT DISTINCT scanner, check_id FROM findings WHERE audit_id = :audit_id"),
+            {"audit_id": audit_id},
+        )
+
+        scanners: List[str] = []
+        check_ids: List[str] = []
+        pks: List[int] = []
+        for (scanner, check_id), controls in self.map_checks(distinct_checks.all()).items():
+            for control_key in controls:
+                pk = control_pks.get(control_key)
+                if pk is not None:
+                    scanners.append(scanner)
+                    check_ids.append(check_id)
+                    pks.append(pk)
+
+        if not pks:
+            return 0
+
+        result = await session.execute(
+            PERSIST_MAPPINGS_SQL,
+            {"audit_id": audit_id, "scanners": scanners, "check_ids": check_ids, "control_pks": pks},
+        )
+        await session.commit()
+        return result.rowcount
+
+    # ------------------------------------------------------------------
+    # Read API
+    # ------------------------------------------------------------------
+
+    def list_regulations(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "code": code,
+                "name": regulation.get("name", code),
+                "version": regulation.get("version"),
+                "mandatory_for": regulation.get("mandatory_for") or regulation.get("scope", []),
+                "controls_count": regulation["controls_count"],
+            }
+            for code, regulation in self.index.regulations.items()
+        ]
+
+    def regulation_controls(self, code: str) -> Optional[List[Dict[str, Any]]]:
+        if code not in self.index.regulations:
+            return None
+        return [
+            {
+                "control_id": control_id,
+                "title": control.get("title"),
+                "description": control.get("description"),
+                "category": control.get("category"),
+                "priority": control.get("priority"),
+                "requirements": control.get("requirements", []),
+                "mapped_checks": [check["check_id"] for check in control.get("mapped_scanner_checks", [])],
+                "mapped_scanner_checks": control.get("mapped_scanner_checks", []),
+            }
+            for (regulation_code, control_id), control in self.index.controls.items()
+            if regulation_code == code
+        ]
+
+
+mapping_engine = RegulationMappingEngine()
@@ -0,0 +1,340 @@
+"""
+Concurrent multi-scanner audit orchestration
+"""
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
+from datetime import datetime, timezone
+import asyncio
+import logging
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..ai.rag_engine import rag_engine
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..core.metrics import ALL_SCANNERS, SCAN_QUEUE_WAIT_SECONDS, SCANS_IN_FLIGHT, record_run, time_stage
+from ..models.models import Audit, Finding, ScanStatusEnum
+from ..scanners.base import BaseScanner, ScanResult
+from ..scanners.registry import SCANNER_CLASSES, scanner_registry
+from .archive import findings_archive
+from .diff import audit_diff_engine
+from .ingestion import FindingIngestor, IngestStats
+from .mapping_engine import mapping_engine
+from .profiling import audit_profiler
+from .progress import ScanProgress
+from .response_cache import response_cache
+from .rollups import rollup_service
+from .scan_failures import is_failure, real_findings
+from .scoring import conformity_scorer
+
+logger = logging.getLogger(__name__)
+
+# Target types each scanner knows how to handle
+SCANNER_TARGET_TYPES = {
+    "prowler": {"aws"},
+    "kube-bench": {"kubernetes"},
+    "trivy": {"trivy", "image", "filesystem", "config"},
+}
+
+
+class ScanJob:
+    """A single scanner run against a single target"""
+
+    def __init__(self, scanner_name: str, target: Dict[str, Any]):
+        self.scanner_name = scanner_name
+        self.target = target
+        self.ingest: Optional[IngestStats] = None
+        self.version: Optional[str] = None
+        self.duration_seconds: float = 0.0
+        self.error: Optional[str] = None
+        # Live progress: pending, running, completed, failed, timed_out, skipped
+        self.state = "pending"
+        self.findings = 0
+        self.by_severity: Dict[str, int] = {}
+
+    def record(self, severity: str) -> None:
+        self.findings += 1
+        self.by_severity[severity] = self.by_severity.get(severity, 0) + 1
+
+
+def audit_outcome(jobs: List[ScanJob]) -> Tuple[ScanStatusEnum, Dict[str, str]]:
+    """
+    Status of an audit whose jobs all ran, and the error of each failed scanner
+
+    An audit with failed jobs is still COMPLETED (partial) when at least
+    one job succeeded; its failed scanners are recorded so derived data
+    can leave them out. It is FAILED when every job that ran failed.
+    """
+    failed: Dict[str, str] = {}
+    for job in jobs:
+        if job.state in ("failed", "timed_out"):
+            failed.setdefault(job.scanner_name, job.error or job.state)
+    succeeded = any(job.state == "completed" for job in jobs)
+    if failed and not succeeded:
+        return ScanStatusEnum.FAILED, failed
+    return ScanStatusEnum.COMPLETED, failed
+
+
+class ScanOrchestrator:
+    """
+    Runs every requested scanner/target pair of an audit concurrently.
+
+    A global semaphore bounds the total number of running scanner
+    processes and a per-scanner semaphore keeps heavy tools (prowler)
+    from starving the others. Findings are streamed into the database in
+    COPY batches while each scanner is still running, so an audit takes
+    roughly as long as its slowest scanner.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        per_scanner_concurrency: Optional[Dict[str, int]] = None,
+        default_timeout: Optional[float] = None,
+    ):
+        self.max_concurrency = max_concurrency or settings.SCAN_MAX_CONCURRENCY
+        self.per_scanner_concurrency = per_scanner_concurrency or settings.SCAN_PER_SCANNER_CONCURRENCY
+        self.default_timeout = default_timeout or settings.SCAN_TARGET_TIMEOUT_SECONDS
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        self._scanner_limits = {
+            name: asyncio.Semaphore(self.per_scanner_concurrency.get(name, self.max_concurrency))
+            for name in SCANNER_CLASSES
+        }
+
+    def plan(self, scanners: List[str], targets: List[Dict[str, Any]]) -> List[ScanJob]:
+        """Pair each requested scanner with every target it supports"""
+        unknown = [name for name in scanners if name not in SCANNER_CLASSES]
+        if unknown:
+            raise ValueError(f"Unknown scanner(s): {', '.join(unknown)}")
+
+        jobs = []
+        for target in targets:
+            for name in scanners:
+                if target.get("type") in SCANNER_TARGET_TYPES[name]:
+                    jobs.append(ScanJob(name, target))
+        return jobs
+
+    async def _run_job(self, audit_id: int, job: ScanJob) -> ScanJob:
+        """Run one scanner/target pair within the concurrency limits"""
+        timeout = job.target.get("timeout", self.default_timeout)
+        queued = time.monotonic()
+
+        async with self._global_limit, self._scanner_limits[job.scanner_name]:
+            started = time.monotonic()
+            SCAN_QUEUE_WAIT_SECONDS.labels(job.scanner_name, "orchestrator").observe(started - queued)
+            SCANS_IN_FLIGHT.labels(job.scanner_name).inc()
+            job.state = "running"
+            ingestor = FindingIngestor(audit_id)
+            try:
+                scanner = scanner_registry.get(job.scanner_name)
+                if type(scanner).post_scan_process is not BaseScanner.post_scan_process:
+                    ingestor.transform = scanner.post_scan_process
+
+                if not await scanner.pre_scan_check(job.target):
+                    job.error = "Target not supported by scanner"
+                    job.state = "skipped"
+                    return job
+
+                async with asyncio.timeout(timeout):
+                    if job.scanner_name == "prowler" and settings.PROWLER_FANOUT_ENABLED:
+                        await self._run_prowler_fanout(audit_id, job, ingestor.stats)
+                    else:
+                        async for result in scanner.scan_stream(job.target):
+                            await ingestor.add(result)
+                            # Scanners report their own failures as an ERROR finding
+                            if not is_failure(result.check_id):
+                                job.record(result.severity)
+                            elif job.error is None:
+                                job.error = result.description
+                if job.error:
+                    job.state = "failed"
+                else:
+                    job.state = "completed"
+                    # Only successful runs count towards the audit's scanner_versions
+                    job.version = scanner.version
+
+            except TimeoutError:
+                job.error = f"Timed out after {timeout}s"
+                job.state = "timed_out"
+                await ingestor.add(
+                    ScanResult(
+                        scanner=job.scanner_name,
+                        check_id="TIMEOUT",
+                        title="Scanner execution timed out",
+                        description=f"{job.scanner_name} did not finish within {timeout}s",
+                        severity="high",
+                        raw_data={"error": job.error, "target": job.target},
+                    )
+                )
+
+            except Exception as e:
+                logger.exception("Scanner %s failed", job.scanner_name)
+                job.error = str(e)
+                job.state = "failed"
+                await ingestor.add(
+                    ScanResult(
+                        scanner=job.scanner_name,
+                        check_id="ERROR",
+                        title="Scanner execution failed",
+                        description=f"Error running {job.scanner_name}: {str(e)}",
+                        severity="high",
+                        raw_data={"error": str(e)},
+                    )
+                )
+
+            finally:
+                job.ingest = await ingestor.close()
+                job.duration_seconds = time.monotonic() - started
+                SCANS_IN_FLIGHT.labels(job.scanner_name).dec()
+                record_run(job.scanner_name, job.ingest.rows, job.duration_seconds)
+
+        return job
+
+    async def _run_prowler_fanout(self, audit_id: int, job: ScanJob, stats: IngestStats) -> None:
+        """Scan a prowler target as region x service shards on the Celery workers"""
+        # Imported here so API processes without fan-out never load Celery
+        from ..tasks.prowler import run_prowler_fanout
+
+        merged = await run_prowler_fanout(audit_id, job.target)
+        job.findings += merged["rows"]
+        stats.rows += merged["rows"]
+        stats.batches += merged["shards"]
+        stats.copy_seconds += merged["copy_seconds"]
+        if merged["errors"]:
+            job.error = f"{len(merged['errors'])} of {merged['shards']} shards failed: {merged['errors'][0]}"
+
+    async def _count_findings(self, audit_id: int) -> int:
+        """Findings stored for the audit, without the failure pseudo-findings"""
+        async with AsyncSessionLocal() as session:
+            return (
+                await session.execute(
+                    select(func.count()).select_from(Finding).where(Finding.audit_id == audit_id, real_findings())
+                )
+            ).scalar_one()
+
+    async def _update_audit(self, audit_id: int, **values: Any) -> None:
+        async with AsyncSessionLocal() as session:
+            audit = await session.get(Audit, audit_id)
+            for key, value in values.items():
+                setattr(audit, key, value)
+            await session.commit()
+
+    async def run_audit(
+        self,
+        audit_id: int,
+        scanners: List[str],
+        targets: List[Dict[str, Any]],
+        profile: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Execute all scanner/target pairs of an audit and record the results
+
+        Args:
+            profile: Sample the orchestration and store a flamegraph report
+
+        Returns:
+            Summary with per-job durations and errors
+        """
+        if profile:
+            return await audit_profiler.profile(audit_id, self._execute(audit_id, scanners, targets))
+        return await self._execute(audit_id, scanners, targets)
+
+    async def _execute(self, audit_id: int, scanners: List[str], targets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        started = time.monotonic()
+        await self._update_audit(
+            audit_id,
+            status=ScanStatusEnum.RUNNING,
+            started_at=datetime.now(timezone.utc),
+        )
+
+        scanner_versions: Dict[str, str] = {}
+        failed_scanners: Dict[str, str] = {}
+        summary: List[Dict[str, Any]] = []
+        progress: Optional[ScanProgress] = None
+
+        try:
+            # Cheap when binaries are unchanged: versions are cached by mtime
+            await scanner_registry.refresh()
+            jobs = self.plan(scanners, targets)
+            progress = ScanProgress(audit_id, jobs)
+            progress.start()
+            tasks = [asyncio.create_task(self._run_job(audit_id, job)) for job in jobs]
+
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    job = await next_done
+
+                    if job.version:
+                        scanner_versions[job.scanner_name] = job.version
+                    summary.append({
+                        "scanner": job.scanner_name,
+                        "target": job.target.get("type"),
+                        "findings": job.ingest.rows,
+                        "duration_seconds": round(job.duration_seconds, 3),
+                        "rows_per_second": round(job.ingest.rows_per_second, 1),
+                        "error": job.error,
+                    })
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            status, failed_scanners = audit_outcome(jobs)
+            if failed_scanners:
+                logger.warning("Audit %s: scanner(s) failed: %s", audit_id, failed_scanners)
+
+        except Exception:
+            logger.exception("Audit %s failed", audit_id)
+            status = ScanStatusEnum.FAILED
+
+        await self._update_audit(
+            audit_id,
+            status=status,
+            completed_at=datetime.now(timezone.utc),
+            scan_duration_seconds=int(round(time.monotonic() - started)),
+            scanner_versions=scanner_versions,
+            failed_scanners=failed_scanners or None,
+            total_checks=await self._count_findings(audit_id),
+        )
+        if progress is not None:
+            await progress.finish(status.value)
+
+        if status == ScanStatusEnum.COMPLETED:
+            await self._after_completion(audit_id)
+
+        return {"audit_id": audit_id, "status": status.value, "failed_scanners": failed_scanners, "jobs": summary}
+
+    async def _derive(
+        self,
+        audit_id: int,
+        stage: str,
+        step: Callable[[AsyncSession, int], Awaitable[Any]],
+        failure: str,
+    ) -> None:
+        """Run one post-audit step in its own session, timed and isolated from the others"""
+        try:
+            with time_stage(ALL_SCANNERS, stage):
+                async with AsyncSessionLocal() as session:
+                    await step(session, audit_id)
+        except Exception:
+            logger.exception(failure, audit_id)
+
+    async def _after_completion(self, audit_id: int) -> None:
+        """Derived data computed once per completed audit"""
+        await self._derive(
+            audit_id, "mapping", mapping_engine.persist_audit_mappings, "Mapping audit %s to controls failed"
+        )
+        await self._derive(audit_id, "scoring", conformity_scorer.score_audit, "Scoring audit %s failed")
+        await self._derive(audit_id, "diff", audit_diff_engine.diff_with_previous, "Diffing audit %s failed")
+        # Last: rollups read the scores and the diff stored above
+        await self._derive(
+            audit_id, "rollups", rollup_service.apply_audit, "Updating dashboard rollups for audit %s failed"
+        )
+
+        await response_cache.invalidate(f"scan:{audit_id}", "environments")
+
+        await self._derive(audit_id, "indexing", rag_engine.index_audit, "Indexing audit %s for chat failed")
+        await self._derive(audit_id, "archive", findings_archive.archive_audit, "Archiving audit %s failed")
+
+
+scan_orchestrator = ScanOrchestrator()
@@ -0,0 +1,57 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+from typing import Any, List, Optional, Sequence
+from datetime import datetime
+import base64
+import json
+
+# Largest value of the INTEGER primary keys used in cursors
+MAX_ID = 2 ** 31 - 1
+
+
+class InvalidCursor(ValueError):
+    """Raised for cursors that were not produced by encode_cursor"""
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort key of the last row of a page"""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """Sort key values carried by a cursor, one of each of ``types``"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}") from e
+    if not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursor("Malformed cursor")
+    for value, expected in zip(values, types):
+        # bool is an int subclass; ids must also fit their integer columns
+        if not isinstance(value, expected) or isinstance(value, bool) and expected is not bool:
+            raise InvalidCursor("Malformed cursor")
+        if expected is int and not 0 <= value <= MAX_ID:
+            raise InvalidCursor("Malformed cursor")
+    return values
+
+
+def decode_timestamp(value: str) -> datetime:
+    """Timestamp sort key of a cursor (encoded with isoformat)"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError as e:
+        raise InvalidCursor(f"Malformed cursor: {e}") from e
+
+
+def clamp_limit(limit: int, maximum: int) -> int:
+    return max(1, min(limit, maximum))
+
+
+def next_cursor(rows: Sequence[Any], limit: int, key) -> Optional[str]:
+    """Cursor for the page after ``rows`` (fetched with limit + 1), if any"""
+    if len(rows) <= limit:
+        return None
+    return encode_cursor(key(rows[limit - 1]))
@@ -0,0 +1,307 @@
+"""
+On-demand profiling of individual audits, stored as flamegraph reports
+"""
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
+from collections import Counter
+from html import escape
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..core.metrics import collect_stages
+from ..core.resources import resources
+from ..models.models import Report
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+REPORT_TYPE = "profile"
+
+# (file name, Report.format, content type) of the artifacts of one profile
+ARTIFACTS = (
+    ("flamegraph.svg", "svg", "image/svg+xml"),
+    ("stacks.folded", "folded", "text/plain; charset=utf-8"),
+    ("stages.json", "json", "application/json"),
+)
+MEDIA_TYPES = {report_format: content_type for _, report_format, content_type in ARTIFACTS}
+
+
+class StackSampler:
+    """
+    Samples the Python stacks of a thread at a fixed interval.
+
+    The event loop thread is sampled together with the default
+    executor's busy threads (``asyncio.to_thread`` work such as raw blob
+    compression). Samples are counted per collapsed stack
+    (``thread;outer;...;inner``), the input format of flamegraphs.
+    Wall-clock, not CPU: a loop waiting on scanners or the database shows
+    up under its selector, which is how slow I/O becomes visible.
+    """
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="audit-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.thread_id:
+                    self.samples[_collapse("event-loop", frame)] += 1
+                elif names.get(ident, "").startswith("asyncio_") and frame.f_code.co_name != "_worker":
+                    # Executor threads idle in _worker are waiting for work
+                    self.samples[_collapse("executor", frame)] += 1
+
+
+def _collapse(root: str, frame) -> str:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    frames.append(root)
+    return ";".join(name.replace(";", ",") for name in reversed(frames))
+
+
+def collapsed_stacks(samples: Counter) -> str:
+    """Brendan Gregg's folded format: one ``stack count`` line per stack"""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+
+
+# ----------------------------------------------------------------------
+# Flamegraph rendering
+# ----------------------------------------------------------------------
+
+FLAME_WIDTH = 1200
+FRAME_HEIGHT = 16
+MIN_FRAME_WIDTH = 0.5  # px, narrower frames are not drawn
+CHAR_WIDTH = 6.5
+
+
+class _Node:
+    __slots__ = ("value", "children")
+
+    def __init__(self):
+        self.value = 0
+        self.children: Dict[str, "_Node"] = {}
+
+
+def _color(name: str) -> str:
+    # Stable warm colors: same function, same color across profiles
+    h = zlib.crc32(name.encode())
+    return f"rgb({205 + h % 50},{(h >> 8) % 180},{(h >> 16) % 55})"
+
+
+def render_flamegraph(samples: Counter, title: str) -> str:
+    """Static SVG flamegraph, widths proportional to samples; hover shows details"""
+    root = _Node()
+    depth = 0
+    for stack, count in samples.items():
+        frames = stack.split(";")
+        depth = max(depth, len(frames))
+        node = root
+        node.value += count
+        for name in frames:
+            node = node.children.setdefault(name, _Node())
+            node.value += count
+
+    total = root.value or 1
+    scale = FLAME_WIDTH / total
+    height = (depth + 3) * FRAME_HEIGHT
+    rects: List[str] = []
+
+    def draw(name: str, node: _Node, x: float, level: int) -> None:
+        width = node.value * scale
+        if width < MIN_FRAME_WIDTH:
+            return
+        y = height - (level + 1) * FRAME_HEIGHT
+        label = f"{name} ({node.value} samples, {100 * node.value / total:.2f}%)"
+        text = name[: int(width / CHAR_WIDTH)]
+        rects.append(
+            f'<g><title>{escape(label)}</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{FRAME_HEIGHT - 1}" fill="{_color(name)}" rx="2"/>'
+            + (f'<text x="{x + 3:.1f}" y="{y + FRAME_HEIGHT - 4}">{escape(text)}</text>' if len(text) > 2 else "")
+            + "</g>"
+        )
+        offset = x
+        for child_name, child in sorted(node.children.items()):
+            draw(child_name, child, offset, level + 1)
+            offset += child.value * scale
+
+    offset = 0.0
+    for name, node in sorted(root.children.items()):
+        draw(name, node, offset, 0)
+        offset += node.value * scale
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{FLAME_WIDTH}" height="{height}" '
+        f'viewBox="0 0 {FLAME_WIDTH} {height}" font-family="monospace" font-size="11">'
+        f'<rect width="100%" height="100%" fill="#f8f8f8"/>'
+        f'<text x="{FLAME_WIDTH / 2}" y="{FRAME_HEIGHT}" text-anchor="middle" font-size="14">{escape(title)}</text>'
+        + "".join(rects)
+        + "</svg>\n"
+    )
+
+
+# ----------------------------------------------------------------------
+# Storage
+# ----------------------------------------------------------------------
+
+class ArtifactStore:
+    """
+    Report files in the MinIO bucket, or under REPORTS_LOCAL_DIR when
+    MinIO is not configured or fails. Paths are ``s3://bucket/key`` or
+    local paths.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend or settings.PROFILE_STORAGE_BACKEND
+
+    async def put(self, key: str, data: bytes, content_type: str) -> str:
+        if self.backend == "minio":
+            try:
+                await asyncio.to_thread(
+                    resources.s3().put_object,
+                    Bucket=settings.MINIO_BUCKET,
+                    Key=key,
+                    Body=data,
+                    ContentType=content_type,
+                )
+                return f"s3://{settings.MINIO_BUCKET}/{key}"
+            except Exception as e:
+                logger.warning("Storing %s in MinIO failed, keeping it on local disk: %s", key, e)
+
+        path = os.path.join(settings.REPORTS_LOCAL_DIR, key)
+        await asyncio.to_thread(_write_file, path, data)
+        return path
+
+    async def get(self, file_path: str) -> bytes:
+        if file_path.startswith("s3://"):
+            bucket, key = file_path[len("s3://"):].split("/", 1)
+            response = await asyncio.to_thread(resources.s3().get_object, Bucket=bucket, Key=key)
+            return await asyncio.to_thread(response["Body"].read)
+        return await asyncio.to_thread(_read_file, file_path)
+
+
+def _write_file(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+# ----------------------------------------------------------------------
+# Audit profiler
+# ----------------------------------------------------------------------
+
+class AuditProfiler:
+    """
+    Runs one audit's orchestration under the stack sampler and stores
+    the result as ``Report`` rows (``report_type="profile"``): an SVG
+    flamegraph, the collapsed stacks and the per-stage timings.
+
+    Stage timings come from core.metrics and cover exactly this audit.
+    Stacks are those of the whole event loop, so requests or audits
+    running at the same time appear in the flamegraph too. Scanner
+    processes and Celery prowler shards are outside of the sampled
+    process: their cost shows as subprocess and stage timings only.
+    """
+
+    def __init__(self, store: Optional[ArtifactStore] = None, interval_ms: Optional[int] = None):
+        self.store = store or ArtifactStore()
+        self.interval = (interval_ms or settings.PROFILE_SAMPLE_INTERVAL_MS) / 1000
+
+    async def profile(self, audit_id: int, work: Awaitable[T]) -> T:
+        sampler = StackSampler(self.interval)
+        started = time.monotonic()
+        with collect_stages() as stages:
+            sampler.start()
+            try:
+                result = await work
+            finally:
+                sampler.stop()
+        elapsed = time.monotonic() - started
+
+        try:
+            await self.save(audit_id, sampler.samples, stages, elapsed, result)
+        except Exception:
+            logger.exception("Storing the profile of audit %s failed", audit_id)
+        return result
+
+    async def save(
+        self,
+        audit_id: int,
+        samples: Counter,
+        stages: Dict[str, Dict[str, float]],
+        elapsed: float,
+        result: Any = None,
+    ) -> List[Report]:
+        title = f"Audit {audit_id} profile ({elapsed:.1f}s, {sum(samples.values())} samples)"
+        timings = {
+            "audit_id": audit_id,
+            "elapsed_seconds": round(elapsed, 3),
+            "sample_interval_ms": round(self.interval * 1000, 3),
+            "samples": sum(samples.values()),
+            "stages": {
+                scanner: {stage: round(seconds, 4) for stage, seconds in sorted(by_stage.items())}
+                for scanner, by_stage in sorted(stages.items())
+            },
+            "jobs": result.get("jobs", []) if isinstance(result, dict) else [],
+        }
+        contents: Dict[str, bytes] = {
+            "svg": render_flamegraph(samples, title).encode(),
+            "folded": collapsed_stacks(samples).encode(),
+            "json": json.dumps(timings, indent=2).encode(),
+        }
+
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        stored: List[Tuple[str, str, int]] = []
+        for filename, report_format, content_type in ARTIFACTS:
+            data = contents[report_format]
+            path = await self.store.put(f"profiles/audit-{audit_id}/{stamp}/{filename}", data, content_type)
+            stored.append((report_format, path, len(data)))
+
+        async with AsyncSessionLocal() as session:
+            reports = [
+                Report(
+                    audit_id=audit_id,
+                    title=title,
+                    report_type=REPORT_TYPE,
+                    format=report_format,
+                    file_path=path,
+                    file_size_bytes=size,
+                    generated_by="audit-profiler",
+                )
+                for report_format, path, size in stored
+            ]
+            session.add_all(reports)
+            await session.commit()
+        logger.info("Stored profile of audit %s: %s", audit_id, stored[0][1])
+        return reports
+
+
+audit_profiler = AuditProfiler()
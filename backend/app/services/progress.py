@@ -0,0 +1,262 @@
+"""
+Real-time scan progress: coalesced snapshots fanned out over Redis pub/sub
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import time
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from ..core.config import settings
+from ..core.resources import resources
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "scan-progress:"
+LATEST_PREFIX = "scan-progress-latest:"
+
+# WebSocket close codes
+CLOSE_NORMAL = 1000
+CLOSE_TRY_AGAIN_LATER = 1013  # client too slow to keep up
+
+
+class ScanProgress:
+    """
+    Publishes progress snapshots of one running audit.
+
+    Jobs only bump counters; a ticker turns them into a full snapshot at
+    most once per PROGRESS_INTERVAL_SECONDS, and only if something
+    changed. Snapshots replace each other, so any of them may be skipped
+    downstream without losing state.
+    """
+
+    def __init__(self, audit_id: int, jobs: List[Any], hub: Optional["ProgressHub"] = None):
+        self.audit_id = audit_id
+        self.jobs = jobs
+        self.hub = hub or progress_hub
+        self.status = "running"
+        self._seq = 0
+        self._signature: Optional[Tuple] = None
+        self._started = time.monotonic()
+        self._ticker: Optional[asyncio.Task] = None
+
+    def snapshot(self, final: bool = False) -> Dict[str, Any]:
+        by_severity: Counter = Counter()
+        for job in self.jobs:
+            by_severity.update(job.by_severity)
+        self._seq += 1
+        return {
+            "type": "progress",
+            "scan_id": self.audit_id,
+            "seq": self._seq,
+            "status": self.status,
+            "final": final,
+            "elapsed_seconds": round(time.monotonic() - self._started, 1),
+            "findings": sum(job.findings for job in self.jobs),
+            "by_severity": dict(by_severity),
+            "scanners": [
+                {
+                    "scanner": job.scanner_name,
+                    "target": job.target.get("type"),
+                    "state": job.state,
+                    "findings": job.findings,
+                    "error": job.error,
+                }
+                for job in self.jobs
+            ],
+        }
+
+    async def publish_if_changed(self) -> None:
+        signature = tuple((job.state, job.findings) for job in self.jobs)
+        if signature != self._signature:
+            self._signature = signature
+            await self.hub.publish(self.audit_id, self.snapshot())
+
+    async def _tick(self) -> None:
+        while True:
+            try:
+                await self.publish_if_changed()
+            except Exception:
+                logger.exception("Publishing progress of audit %s failed", self.audit_id)
+            await asyncio.sleep(settings.PROGRESS_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        self._ticker = asyncio.create_task(self._tick())
+
+    async def finish(self, status: str) -> None:
+        if self._ticker is not None:
+            self._ticker.cancel()
+            self._ticker = None
+        self.status = status
+        await self.hub.publish(self.audit_id, self.snapshot(final=True))
+
+
+class Subscription:
+    """Single-slot mailbox: a new snapshot replaces one not yet sent"""
+
+    __slots__ = ("audit_id", "latest", "final", "event")
+
+    def __init__(self, audit_id: int):
+        self.audit_id = audit_id
+        self.latest: Optional[str] = None
+        self.final = False
+        self.event = asyncio.Event()
+
+    def offer(self, data: str, final: bool) -> None:
+        self.latest = data
+        self.final = final
+        self.event.set()
+
+
+class ProgressHub:
+    """
+    Per-process fan-out of progress snapshots to WebSocket subscribers.
+
+    Publishers send to Redis (``scan-progress:<id>``) and each API worker
+    listens once and hands snapshots to its local subscribers, so a
+    client can connect to any worker. Every subscriber gets at most one
+    frame per PROGRESS_INTERVAL_SECONDS, always the latest snapshot;
+    a client that cannot take a frame within PROGRESS_SEND_TIMEOUT_SECONDS
+    is disconnected. Without Redis, delivery stays within the process.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend or settings.PROGRESS_BACKEND
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._latest: Dict[int, Tuple[str, bool]] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def shared(self) -> bool:
+        return self.backend == "redis"
+
+    def _redis_client(self):
+        return resources.redis(decode_responses=True)
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    async def publish(self, audit_id: int, snapshot: Dict[str, Any]) -> None:
+        data = json.dumps(snapshot, separators=(",", ":"))
+        if self.shared:
+            try:
+                async with self._redis_client().pipeline(transaction=False) as pipe:
+                    pipe.set(LATEST_PREFIX + str(audit_id), data, ex=settings.PROGRESS_SNAPSHOT_TTL_SECONDS)
+                    pipe.publish(CHANNEL_PREFIX + str(audit_id), data)
+                    await pipe.execute()
+                return
+            except Exception as e:
+                logger.debug("Progress publish over Redis failed, delivering locally: %s", e)
+        self._deliver(audit_id, data, snapshot["final"])
+
+    def _deliver(self, audit_id: int, data: str, final: bool) -> None:
+        if final:
+            self._latest.pop(audit_id, None)
+        else:
+            self._latest[audit_id] = (data, final)
+        for subscription in self._subscribers.get(audit_id, ()):
+            subscription.offer(data, final)
+
+    async def listen(self) -> None:
+        """Relay snapshots published by any process to local subscribers"""
+        while True:
+            try:
+                pubsub = self._redis_client().pubsub()
+                await pubsub.psubscribe(CHANNEL_PREFIX + "*")
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    audit_id = int(message["channel"][len(CHANNEL_PREFIX):])
+                    if audit_id in self._subscribers:
+                        data = message["data"]
+                        self._deliver(audit_id, data, json.loads(data)["final"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Progress feed lost: %s", e)
+                await asyncio.sleep(5)
+
+    async def stop(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+
+    # ------------------------------------------------------------------
+    # Subscribing
+    # ------------------------------------------------------------------
+
+    async def subscribe(self, audit_id: int) -> Subscription:
+        if self.shared and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self.listen())
+
+        subscription = Subscription(audit_id)
+        self._subscribers.setdefault(audit_id, set()).add(subscription)
+
+        # Start from the current state instead of waiting for the next change
+        latest = self._latest.get(audit_id)
+        if latest is None and self.shared:
+            try:
+                data = await self._redis_client().get(LATEST_PREFIX + str(audit_id))
+                if data is not None:
+                    latest = (data, json.loads(data)["final"])
+            except Exception as e:
+                logger.debug("Reading latest progress failed: %s", e)
+        if latest is not None and subscription.latest is None:
+            subscription.offer(*latest)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.audit_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.audit_id]
+
+    async def serve(self, websocket: WebSocket, subscription: Subscription) -> None:
+        """Send coalesced snapshots until the scan finishes or the client leaves"""
+        # Only used to notice disconnects; clients are not expected to send
+        async def drain() -> None:
+            try:
+                while True:
+                    await websocket.receive_text()
+            except (WebSocketDisconnect, RuntimeError):
+                pass
+
+        receiver = asyncio.create_task(drain())
+        try:
+            while True:
+                waiter = asyncio.create_task(subscription.event.wait())
+                await asyncio.wait({waiter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if receiver.done():
+                    waiter.cancel()
+                    return
+
+                subscription.event.clear()
+                data, final = subscription.latest, subscription.final
+                try:
+                    await asyncio.wait_for(
+                        websocket.send_text(data), settings.PROGRESS_SEND_TIMEOUT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    logger.info("Dropping slow progress subscriber of audit %s", subscription.audit_id)
+                    try:
+                        await asyncio.wait_for(websocket.close(code=CLOSE_TRY_AGAIN_LATER), 1)
+                    except Exception:
+                        pass
+                    return
+
+                if final:
+                    await websocket.close(code=CLOSE_NORMAL)
+                    return
+                # Coalesce: whatever arrives meanwhile collapses into one frame
+                await asyncio.sleep(settings.PROGRESS_INTERVAL_SECONDS)
+        finally:
+            receiver.cancel()
+            self.unsubscribe(subscription)
+
+
+progress_hub = ProgressHub()
@@ -0,0 +1,97 @@
+"""
+Content-addressed, zstd-compressed storage of raw scanner output
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import hashlib
+
+import zstandard
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..models.models import Finding, RawBlob
+
+# One round-trip for a whole batch; existing blobs are left untouched
+INSERT_BLOBS_SQL = """
+    INSERT INTO raw_blobs (content_hash, data, size)
+    SELECT * FROM unnest($1::varchar[], $2::bytea[], $3::integer[])
+    ON CONFLICT (content_hash) DO NOTHING
+"""
+
+
+class RawBlobStore:
+    """
+    Keeps ``raw_data`` out of the findings table.
+
+    Each distinct payload is stored once in ``raw_blobs``, keyed by the
+    SHA-256 of its JSON bytes and compressed with zstd; findings only
+    carry the hash. Re-scans of an unchanged target, and the same
+    vulnerability reported for many images, therefore add no blob data.
+    Hashes written recently are remembered so their payloads are not
+    compressed and sent again.
+    """
+
+    def __init__(self, level: Optional[int] = None, known_max: Optional[int] = None):
+        self.level = level or settings.RAW_BLOB_ZSTD_LEVEL
+        self.known_max = known_max or settings.RAW_BLOB_KNOWN_HASHES
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+
+    @staticmethod
+    def content_hash(raw_json: bytes) -> str:
+        return hashlib.sha256(raw_json).hexdigest()
+
+    def prepare(self, raw_jsons: List[bytes]) -> Tuple[List[str], Dict[str, Tuple[bytes, int]]]:
+        """
+        Hash a batch of payloads and compress the ones not stored yet.
+
+        Returns the hash column and {hash: (compressed, size)} of new blobs.
+        CPU bound; callers run it in a worker thread.
+        """
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        hashes = []
+        blobs: Dict[str, Tuple[bytes, int]] = {}
+        for raw_json in raw_jsons:
+            digest = self.content_hash(raw_json)
+            hashes.append(digest)
+            if digest not in self._known and digest not in blobs:
+                blobs[digest] = (compressor.compress(raw_json), len(raw_json))
+        return hashes, blobs
+
+    async def store(self, connection, blobs: Dict[str, Tuple[bytes, int]]) -> None:
+        """Insert new blobs through an asyncpg connection"""
+        if not blobs:
+            return
+        digests = list(blobs)
+        await connection.execute(
+            INSERT_BLOBS_SQL,
+            digests,
+            [blobs[digest][0] for digest in digests],
+            [blobs[digest][1] for digest in digests],
+        )
+        for digest in digests:
+            self._known[digest] = None
+        while len(self._known) > self.known_max:
+            self._known.popitem(last=False)
+
+    @staticmethod
+    def decompress(data: bytes) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    async def load(self, session: AsyncSession, finding_id: int) -> Optional[bytes]:
+        """Raw scanner JSON of a finding, or None if the finding does not exist"""
+        row = (
+            await session.execute(
+                select(Finding.raw_hash, RawBlob.data)
+                .outerjoin(RawBlob, RawBlob.content_hash == Finding.raw_hash)
+                .where(Finding.id == finding_id)
+            )
+        ).first()
+        if row is None:
+            return None
+        if row.data is None:
+            return b"{}"
+        return self.decompress(row.data)
+
+
+raw_blob_store = RawBlobStore()
@@ -0,0 +1,302 @@
+"""
+Two-level response cache with ETags and event-driven invalidation
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+
+from fastapi import Request, Response
+
+from ..core.config import settings
+from ..core.resources import resources
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "response-cache:"
+TAG_PREFIX = "response-cache:tag:"
+GENERATION_PREFIX = "response-cache:generation:"
+INVALIDATION_CHANNEL = "response-cache:invalidate"
+
+# (etag, JSON body, tags)
+Entry = Tuple[str, bytes, Tuple[str, ...]]
+# Invalidation counters of an entry's tags: (local, shared or None if unknown)
+Generations = Tuple[Tuple[int, ...], Optional[Tuple[int, ...]]]
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison against an If-None-Match header"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def render(payload: Any) -> bytes:
+    """JSON body as JSONResponse would render it"""
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=str).encode()
+
+
+class ResponseCache:
+    """
+    Caches rendered JSON responses of read-heavy endpoints.
+
+    Lookups go through an in-process LRU, then Redis (shared by all API
+    workers). Entries carry tags and stay valid until an event
+    invalidates one of their tags: invalidation removes the Redis keys
+    and is broadcast over pub/sub so every worker drops its local copy.
+    Redis being unreachable degrades to the local LRU only.
+
+    Each invalidation also bumps a per-tag generation. A response built
+    while one of its tags was invalidated is served but not stored, so a
+    slow build cannot put pre-invalidation data back. Redis entries also
+    expire after RESPONSE_CACHE_TTL_SECONDS should an invalidation be lost.
+    """
+
+    def __init__(self, backend: Optional[str] = None, max_entries: Optional[int] = None):
+        self.backend = backend or settings.RESPONSE_CACHE_BACKEND
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_LOCAL_MAX_ENTRIES
+        self.hits = 0
+        self.misses = 0
+        self._local: "OrderedDict[str, Entry]" = OrderedDict()
+        self._tag_keys: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend in ("redis", "memory")
+
+    @property
+    def shared(self) -> bool:
+        return self.backend == "redis"
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "local_entries": len(self._local),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def _redis_client(self):
+        return resources.redis()
+
+    # ------------------------------------------------------------------
+    # Local LRU
+    # ------------------------------------------------------------------
+
+    def _local_get(self, key: str) -> Optional[Entry]:
+        entry = self._local.get(key)
+        if entry is not None:
+            self._local.move_to_end(key)
+        return entry
+
+    def _local_put(self, key: str, entry: Entry) -> None:
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        for tag in entry[2]:
+            self._tag_keys.setdefault(tag, set()).add(key)
+        while len(self._local) > self.max_entries:
+            old_key, (_, _, old_tags) = self._local.popitem(last=False)
+            self._forget_tags(old_key, old_tags)
+
+    def _forget_tags(self, key: str, tags: Iterable[str]) -> None:
+        for tag in tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def _local_invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in self._tag_keys.pop(tag, ()):
+                entry = self._local.pop(key, None)
+                if entry is not None:
+                    self._forget_tags(key, entry[2])
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[Entry]:
+        entry = self._local_get(key)
+        if entry is not None or not self.shared:
+            return entry
+
+        try:
+            blob = await self._redis_client().get(KEY_PREFIX + key)
+        except Exception as e:
+            logger.debug("Response cache read failed: %s", e)
+            return None
+        if blob is None:
+            return None
+
+        header, body = blob.split(b"\n", 1)
+        etag, *tags = header.decode().split(" ")
+        entry = (etag, body, tuple(tags))
+        self._local_put(key, entry)
+        return entry
+
+    async def generations(self, tags: Iterable[str]) -> Generations:
+        """Invalidation counters of ``tags``, taken before building a response"""
+        tags = tuple(tags)
+        local = tuple(self._generations.get(tag, 0) for tag in tags)
+        if not self.shared or not tags:
+            return local, ()
+        try:
+            values = await self._redis_client().mget([GENERATION_PREFIX + tag for tag in tags])
+        except Exception as e:
+            logger.debug("Response cache generation read failed: %s", e)
+            return local, None
+        return local, tuple(int(value or 0) for value in values)
+
+    async def put(
+        self, key: str, body: bytes, tags: Iterable[str] = (), generations: Optional[Generations] = None
+    ) -> Entry:
+        """
+        Store a response, unless one of its tags was invalidated since
+        ``generations`` was taken
+        """
+        entry = (make_etag(body), body, tuple(tags))
+        if generations is not None:
+            local, shared = generations
+            if local != tuple(self._generations.get(tag, 0) for tag in entry[2]):
+                return entry
+            if shared is None:
+                # Redis was unreachable: its generations are unknown
+                return entry
+        else:
+            shared = None
+        self._local_put(key, entry)
+        if self.shared:
+            try:
+                await self._shared_put(key, entry, shared)
+            except Exception as e:
+                logger.debug("Response cache write failed: %s", e)
+        return entry
+
+    async def _shared_put(self, key: str, entry: Entry, shared: Optional[Tuple[int, ...]]) -> None:
+        from redis.exceptions import WatchError
+
+        header = " ".join((entry[0],) + entry[2]).encode()
+        generation_keys = [GENERATION_PREFIX + tag for tag in entry[2]]
+        async with self._redis_client().pipeline(transaction=True) as pipe:
+            if shared is not None and generation_keys:
+                # invalidate() bumps the generation before collecting keys:
+                # a bump before this check skips the write, one after it
+                # aborts the transaction or deletes the stored key
+                await pipe.watch(*generation_keys)
+                if tuple(int(value or 0) for value in await pipe.mget(generation_keys)) != shared:
+                    self._local_invalidate(entry[2])
+                    return
+                pipe.multi()
+            pipe.set(KEY_PREFIX + key, header + b"\n" + entry[1], ex=settings.RESPONSE_CACHE_TTL_SECONDS)
+            for tag in entry[2]:
+                pipe.sadd(TAG_PREFIX + tag, key)
+            try:
+                await pipe.execute()
+            except WatchError:
+                self._local_invalidate(entry[2])
+
+    async def invalidate(self, *tags: str) -> None:
+        """Drop every entry carrying one of ``tags``, in all workers"""
+        if not self.enabled or not tags:
+            return
+        self._local_invalidate(tags)
+        if not self.shared:
+            return
+        try:
+            client = self._redis_client()
+            for tag in tags:
+                await client.incr(GENERATION_PREFIX + tag)
+                keys = await client.smembers(TAG_PREFIX + tag)
+                await client.delete(TAG_PREFIX + tag, *(KEY_PREFIX + key.decode() for key in keys))
+            await client.publish(INVALIDATION_CHANNEL, json.dumps(list(tags)))
+        except Exception as e:
+            logger.warning("Response cache invalidation of %s failed: %s", tags, e)
+
+    # ------------------------------------------------------------------
+    # Cross-worker invalidation
+    # ------------------------------------------------------------------
+
+    async def listen(self) -> None:
+        """Apply invalidations published by other workers"""
+        while True:
+            try:
+                pubsub = self._redis_client().pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._local_invalidate(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Whatever was missed while disconnected may be stale
+                logger.warning("Response cache invalidation feed lost: %s", e)
+                self._local.clear()
+                self._tag_keys.clear()
+                await asyncio.sleep(5)
+
+    def start(self) -> None:
+        if self.shared and self._listener_task is None:
+            self._listener_task = asyncio.create_task(self.listen())
+
+    async def stop(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            self._listener_task = None
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+
+    async def respond(
+        self,
+        request: Request,
+        key: str,
+        build: Callable[[], Awaitable[Tuple[Any, bool]]],
+        tags: Iterable[str] = (),
+    ) -> Response:
+        """
+        Serve ``key`` from cache, or build and (maybe) store it.
+
+        ``build`` returns (payload, cacheable); uncacheable payloads still
+        get an ETag so unchanged responses can be answered with 304.
+        """
+        entry = await self.get(key) if self.enabled else None
+        if entry is not None:
+            self.hits += 1
+            state = "hit"
+        else:
+            self.misses += 1
+            state = "miss"
+            generations = await self.generations(tags) if self.enabled else None
+            payload, cacheable = await build()
+            body = render(payload)
+            if cacheable and self.enabled:
+                entry = await self.put(key, body, tags, generations)
+            else:
+                entry = (make_etag(body), body, ())
+
+        etag, body, _ = entry
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "X-Cache": state}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,341 @@
+"""
+Incrementally maintained rollups behind the dashboard
+"""
+from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta, timezone
+import logging
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import (
+    Audit,
+    AuditDiff,
+    DailyFindingRollup,
+    Environment,
+    EnvironmentTypeEnum,
+    Finding,
+    OpenFindingRollup,
+    ScanStatusEnum,
+    ScoreRollup,
+    SeverityEnum,
+)
+from .scan_failures import failed_scanners
+
+logger = logging.getLogger(__name__)
+
+OVERALL_CODE = "_overall"
+OPEN_STATUS = "open"
+FIXED_STATUS = "fixed"
+
+# Severity of each fixed hash, looked up in the audit it disappeared from.
+# Findings already marked fixed there were counted by apply_status_change.
+FIXED_BY_SEVERITY_SQL = text("""
+    SELECT severity, count(DISTINCT finding_hash)
+    FROM findings
+    WHERE audit_id = :audit_id AND finding_hash = ANY(CAST(:hashes AS varchar[]))
+      AND coalesce(status, 'open') <> 'fixed'
+    GROUP BY severity
+""")
+
+# Open findings of an audit per severity, leaving out failure pseudo-findings
+# and the findings of the given (failed) scanners
+OPEN_BY_SEVERITY_SQL = text("""
+    SELECT severity, count(*)
+    FROM findings
+    WHERE audit_id = :audit_id AND status = 'open'
+      AND check_id NOT IN ('ERROR', 'TIMEOUT') AND scanner <> ALL(:failed_scanners)
+    GROUP BY severity
+""")
+
+# Open findings of one scanner in an audit per severity
+SCANNER_OPEN_BY_SEVERITY_SQL = text("""
+    SELECT severity, count(*)
+    FROM findings
+    WHERE audit_id = :audit_id AND status = 'open' AND scanner = :scanner
+      AND check_id NOT IN ('ERROR', 'TIMEOUT')
+    GROUP BY severity
+""")
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class RollupService:
+    """
+    Keeps the dashboard rollup tables current.
+
+    Rollups are written when an audit completes and adjusted by +/-1 when
+    a finding changes status, so dashboard reads touch a handful of rows
+    per environment instead of aggregating the findings table.
+    """
+
+    async def apply_audit(self, session: AsyncSession, audit_id: int) -> None:
+        """Fold a completed audit into the rollups"""
+        audit = await session.get(Audit, audit_id)
+        if audit is None or audit.status != ScanStatusEnum.COMPLETED:
+            return
+
+        environment_id = audit.environment_id
+        day = (audit.completed_at or datetime.now(timezone.utc)).date()
+
+        # Open findings: the latest audit replaces the previous snapshot. A
+        # scanner that failed keeps the open findings of its last good run
+        # rather than dropping out of the counts.
+        failed = await failed_scanners(session, [audit_id])
+        open_counts = await self._count_open(
+            session, OPEN_BY_SEVERITY_SQL, {"audit_id": audit_id, "failed_scanners": sorted(failed)}
+        )
+        for scanner in sorted(failed):
+            last_run_id = await self._last_successful_run(session, audit, scanner)
+            if last_run_id is None:
+                continue
+            carried = await self._count_open(
+                session, SCANNER_OPEN_BY_SEVERITY_SQL, {"audit_id": last_run_id, "scanner": scanner}
+            )
+            for severity, count in carried.items():
+                open_counts[severity] = open_counts.get(severity, 0) + count
+        await session.execute(
+            delete(OpenFindingRollup).where(OpenFindingRollup.environment_id == environment_id)
+        )
+        if open_counts:
+            await session.execute(
+                insert(OpenFindingRollup).values([
+                    {
+                        "environment_id": environment_id,
+                        "severity": severity,
+                        "audit_id": audit_id,
+                        "open_count": count,
+                    }
+                    for severity, count in open_counts.items()
+                ])
+            )
+
+        # New/fixed findings from the stored diff against the previous audit
+        diff = (
+            await session.execute(select(AuditDiff).where(AuditDiff.audit_id == audit_id))
+        ).scalars().first()
+        if diff is not None:
+            new_counts = await self._count_by_severity(session, audit_id, diff.new_hashes)
+            fixed_counts = await self._count_by_severity(session, diff.against_audit_id, diff.fixed_hashes)
+            for severity in set(new_counts) | set(fixed_counts):
+                await self._increment_daily(
+                    session, environment_id, day, severity,
+                    new=new_counts.get(severity, 0), fixed=fixed_counts.get(severity, 0),
+                )
+
+        # Scores
+        scores = dict(audit.conformity_scores or {})
+        if audit.overall_score is not None:
+            scores[OVERALL_CODE] = audit.overall_score
+        if scores:
+            statement = insert(ScoreRollup).values([
+                {
+                    "environment_id": environment_id,
+                    "day": day,
+                    "regulation_code": code,
+                    "score": score,
+                    "audit_id": audit_id,
+                }
+                for code, score in scores.items()
+            ])
+            await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[ScoreRollup.environment_id, ScoreRollup.day, ScoreRollup.regulation_code],
+                    set_={"score": statement.excluded.score, "audit_id": statement.excluded.audit_id},
+                )
+            )
+
+        await session.commit()
+
+    async def _count_open(self, session: AsyncSession, statement, params: Dict[str, Any]) -> Dict[SeverityEnum, int]:
+        rows = await session.execute(statement, params)
+        return {SeverityEnum[label]: count for label, count in rows.all()}
+
+    async def _last_successful_run(self, session: AsyncSession, audit: Audit, scanner: str) -> Optional[int]:
+        """Most recent earlier audit of the environment in which ``scanner`` ran without failing"""
+        rows = await session.execute(
+            select(Audit.id, Audit.scanner_versions)
+            .where(
+                Audit.environment_id == audit.environment_id,
+                Audit.status == ScanStatusEnum.COMPLETED,
+                Audit.id < audit.id,
+            )
+            .order_by(Audit.id.desc())
+        )
+        for previous_id, scanner_versions in rows.all():
+            # scanner_versions only lists scanners with a completed job
+            if scanner in (scanner_versions or {}) and scanner not in await failed_scanners(session, [previous_id]):
+                return previous_id
+        return None
+
+    async def _count_by_severity(
+        self, session: AsyncSession, audit_id: int, hashes: Optional[List[str]]
+    ) -> Dict[SeverityEnum, int]:
+        if not hashes:
+            return {}
+        rows = await session.execute(FIXED_BY_SEVERITY_SQL, {"audit_id": audit_id, "hashes": hashes})
+        return {SeverityEnum[label]: count for label, count in rows.all()}
+
+    async def _increment_daily(
+        self,
+        session: AsyncSession,
+        environment_id: int,
+        day: date,
+        severity: SeverityEnum,
+        new: int = 0,
+        fixed: int = 0,
+    ) -> None:
+        statement = insert(DailyFindingRollup).values(
+            environment_id=environment_id, day=day, severity=severity,
+            new_count=new, fixed_count=fixed,
+        )
+        await session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[DailyFindingRollup.environment_id, DailyFindingRollup.day, DailyFindingRollup.severity],
+                set_={
+                    "new_count": DailyFindingRollup.new_count + statement.excluded.new_count,
+                    "fixed_count": DailyFindingRollup.fixed_count + statement.excluded.fixed_count,
+                },
+            )
+        )
+
+    async def apply_status_change(
+        self, session: AsyncSession, finding: Finding, old_status: Optional[str]
+    ) -> None:
+        """Adjust rollups for one finding status transition (caller commits)"""
+        new_status = finding.status
+        if old_status == new_status:
+            return
+
+        audit = await session.get(Audit, finding.audit_id)
+        environment_id = audit.environment_id
+
+        # Rollups describe the environment's latest completed audit; fixes
+        # in older audits were already counted from the diffs
+        if finding.audit_id != await self._latest_audit_id(session, environment_id):
+            return
+
+        was_open = (old_status or OPEN_STATUS) == OPEN_STATUS
+        is_open = new_status == OPEN_STATUS
+        if was_open != is_open:
+            delta = 1 if is_open else -1
+            statement = insert(OpenFindingRollup).values(
+                environment_id=environment_id,
+                severity=finding.severity,
+                audit_id=finding.audit_id,
+                open_count=max(delta, 0),
+            )
+            await session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[OpenFindingRollup.environment_id, OpenFindingRollup.severity],
+                    set_={"open_count": func.greatest(OpenFindingRollup.open_count + delta, 0)},
+                    where=OpenFindingRollup.audit_id == finding.audit_id,
+                )
+            )
+
+        if new_status == FIXED_STATUS or old_status == FIXED_STATUS:
+            await self._increment_daily(
+                session, environment_id, _today(), finding.severity,
+                fixed=1 if new_status == FIXED_STATUS else -1,
+            )
+
+    async def _latest_audit_id(self, session: AsyncSession, environment_id: int) -> Optional[int]:
+        return (
+            await session.execute(
+                select(Audit.id)
+                .where(Audit.environment_id == environment_id, Audit.status == ScanStatusEnum.COMPLETED)
+                .order_by(Audit.completed_at.desc().nulls_last(), Audit.id.desc())
+                .limit(1)
+            )
+        ).scalar()
+
+    async def dashboard_stats(self, session: AsyncSession) -> Dict[str, Any]:
+        """Dashboard figures read from the rollup tables"""
+        today = _today()
+        week_ago = today - timedelta(days=7)
+
+        environments = (await session.execute(select(Environment.id, Environment.type))).all()
+
+        open_counts = dict(
+            (
+                await session.execute(
+                    select(OpenFindingRollup.severity, func.sum(OpenFindingRollup.open_count))
+                    .group_by(OpenFindingRollup.severity)
+                )
+            ).all()
+        )
+
+        fixed_last_7d = (
+            await session.execute(
+                select(func.coalesce(func.sum(DailyFindingRollup.fixed_count), 0))
+                .where(DailyFindingRollup.day > week_ago)
+            )
+        ).scalar_one()
+
+        latest_scores = await self._scores_as_of(session, today)
+        week_ago_scores = await self._scores_as_of(session, week_ago)
+
+        def overall(scores: Dict[tuple, float]) -> Optional[float]:
+            values = [score for (_, code), score in scores.items() if code == OVERALL_CODE]
+            return sum(values) / len(values) if values else None
+
+        overall_now = overall(latest_scores)
+        overall_before = overall(week_ago_scores)
+
+        by_regulation: Dict[str, List[float]] = {}
+        for (_, code), score in latest_scores.items():
+            if code != OVERALL_CODE:
+                by_regulation.setdefault(code, []).append(score)
+        regulation_scores = sorted(
+            ({"code": code, "score": round(sum(v) / len(v), 4)} for code, v in by_regulation.items()),
+            key=lambda item: item["score"],
+        )
+
+        month_ago = datetime.now(timezone.utc) - timedelta(days=30)
+        scanned = dict(
+            (
+                await session.execute(
+                    select(Audit.environment_id, func.count())
+                    .where(Audit.created_at >= month_ago)
+                    .group_by(Audit.environment_id)
+                )
+            ).all()
+        )
+
+        coverage: Dict[str, List[int]] = {member.value: [0, 0] for member in EnvironmentTypeEnum}
+        for environment_id, environment_type in environments:
+            totals = coverage[environment_type.value]
+            totals[0] += 1 if environment_id in scanned else 0
+            totals[1] += 1
+
+        return {
+            "overall_compliance": round(overall_now, 4) if overall_now is not None else None,
+            "trend_7d": round(overall_now - overall_before, 4)
+            if overall_now is not None and overall_before is not None else None,
+            "total_environments": len(environments),
+            "total_scans_last_30d": sum(scanned.values()),
+            "active_critical_findings": open_counts.get(SeverityEnum.CRITICAL, 0),
+            "active_high_findings": open_counts.get(SeverityEnum.HIGH, 0),
+            "findings_fixed_last_7d": fixed_last_7d,
+            "top_failing_regulations": regulation_scores[:3],
+            "scan_coverage": {
+                environment_type: round(done / total, 2) if total else 0.0
+                for environment_type, (done, total) in coverage.items()
+            },
+        }
+
+    async def _scores_as_of(self, session: AsyncSession, day: date) -> Dict[tuple, float]:
+        """Latest score per (environment, regulation) on or before ``day``"""
+        rows = await session.execute(
+            select(ScoreRollup.environment_id, ScoreRollup.regulation_code, ScoreRollup.score)
+            .where(ScoreRollup.day <= day)
+            .distinct(ScoreRollup.environment_id, ScoreRollup.regulation_code)
+            .order_by(ScoreRollup.environment_id, ScoreRollup.regulation_code, ScoreRollup.day.desc())
+        )
+        return {(environment_id, code): score for environment_id, code, score in rows.all()}
+
+
+rollup_service = RollupService()
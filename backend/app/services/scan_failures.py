@@ -0,0 +1,39 @@
+"""
+Scanner failures recorded among an audit's findings
+"""
+from typing import Iterable, Set
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.models import Finding
+
+# A scanner run that errors or times out is stored as one pseudo-finding
+# with one of these check ids, next to whatever it found before failing.
+# Counts and comparisons leave these rows out, and the failed scanner's
+# checks count as not assessed rather than passed.
+FAILURE_CHECK_IDS = ("ERROR", "TIMEOUT")
+
+FAILED_SCANNERS_SQL = text("""
+    SELECT DISTINCT scanner
+    FROM findings
+    WHERE audit_id = :audit_id AND check_id IN ('ERROR', 'TIMEOUT')
+""")
+
+
+def is_failure(check_id: str) -> bool:
+    return check_id in FAILURE_CHECK_IDS
+
+
+def real_findings():
+    """Where clause excluding the failure pseudo-findings"""
+    return Finding.check_id.notin_(FAILURE_CHECK_IDS)
+
+
+async def failed_scanners(session: AsyncSession, audit_ids: Iterable[int]) -> Set[str]:
+    """Scanners with a failed or timed-out run in any of the audits"""
+    failed: Set[str] = set()
+    for audit_id in audit_ids:
+        rows = await session.execute(FAILED_SCANNERS_SQL, {"audit_id": audit_id})
+        failed.update(rows.scalars().all())
+    return failed
@@ -0,0 +1,183 @@
+"""
+Vectorized conformity scoring across all loaded regulations
+"""
+from typing import Dict, Iterable, Optional, Set, Tuple
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.lazy import lazy_import
+from ..models.models import Audit
+from .mapping_engine import RegulationIndex, mapping_engine
+from .scan_failures import failed_scanners
+
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
+# Penalty of the worst failing finding of a check (0 = pass)
+SEVERITY_WEIGHTS = {
+    "critical": 1.0,
+    "high": 0.75,
+    "medium": 0.5,
+    "low": 0.25,
+    "info": 0.0,
+}
+
+# Weight of a control within its regulation
+PRIORITY_WEIGHTS = {
+    "critical": 4.0,
+    "high": 3.0,
+    "medium": 2.0,
+    "low": 1.0,
+}
+
+# Distinct failing (scanner, check_id, severity) triples of an audit
+FAILING_CHECKS_SQL = text("""
+    SELECT scanner, check_id, severity
+    FROM findings
+    WHERE audit_id = :audit_id
+      AND coalesce(status, 'open') NOT IN ('accepted', 'false_positive')
+    GROUP BY scanner, check_id, severity
+""")
+
+
+class ScoringModel:
+    """
+    Sparse incidence structure of one RegulationIndex.
+
+    Controls x checks is kept in COO form (``control_rows``,
+    ``check_cols``); sparse mat-vec products are computed with
+    ``np.bincount``. Every regulation is scored in the same pass, so the
+    cost grows with the number of mapped checks, not with the number of
+    frameworks.
+    """
+
+    def __init__(self, index: RegulationIndex):
+        self.index = index
+        self.regulation_codes = list(index.regulations)
+        self.control_keys = list(index.controls)
+
+        regulation_pos = {code: i for i, code in enumerate(self.regulation_codes)}
+        control_pos = {key: i for i, key in enumerate(self.control_keys)}
+
+        rows, cols = [], []
+        for check_key, controls in index.check_controls.items():
+            col = index.check_index[check_key]
+            for control_key in controls:
+                rows.append(control_pos[control_key])
+                cols.append(col)
+
+        self.control_rows = np.asarray(rows, dtype=np.int64)
+        self.check_cols = np.asarray(cols, dtype=np.int64)
+        self.n_checks = len(index.checks)
+        self.n_controls = len(self.control_keys)
+        self.n_regulations = len(self.regulation_codes)
+
+        self.control_regulation = np.asarray(
+            [regulation_pos[code] for code, _ in self.control_keys], dtype=np.int64
+        )
+        self.control_weight = np.asarray(
+            [
+                PRIORITY_WEIGHTS.get(index.controls[key].get("priority"), 1.0)
+                for key in self.control_keys
+            ],
+            dtype=np.float64,
+        )
+        self.check_scanner = np.asarray([scanner for scanner, _ in index.checks], dtype=object)
+
+    def penalty_vector(self, failing: Iterable[Tuple[str, str, str]]) -> "np.ndarray":
+        """Worst severity weight per check column from failing findings"""
+        cols, weights = [], []
+        for scanner, check_id, severity in failing:
+            weight = SEVERITY_WEIGHTS.get(severity, 0.5)
+            for check_key in self.index.matching_checks(scanner, check_id):
+                cols.append(self.index.check_index[check_key])
+                weights.append(weight)
+
+        penalty = np.zeros(self.n_checks, dtype=np.float64)
+        if cols:
+            np.maximum.at(penalty, np.asarray(cols, dtype=np.int64), np.asarray(weights))
+        return penalty
+
+    def score(
+        self,
+        failing: Iterable[Tuple[str, str, str]],
+        scanners_run: Set[str],
+    ) -> Tuple[Optional[float], Dict[str, float]]:
+        """
+        Args:
+            failing: (scanner, check_id, severity) of failing findings
+            scanners_run: scanners executed by the audit; checks of other
+                scanners were not assessed and are left out
+
+        Returns:
+            (overall score, {regulation code: score}) with scores in [0, 1]
+        """
+        if not self.n_checks:
+            return None, {}
+
+        assessed = np.isin(self.check_scanner, list(scanners_run)).astype(np.float64)
+        check_score = (1.0 - self.penalty_vector(failing)) * assessed
+
+        # Control score: mean score of its assessed checks (A @ s / A @ m)
+        edge_assessed = assessed[self.check_cols]
+        control_total = np.bincount(self.control_rows, weights=check_score[self.check_cols], minlength=self.n_controls)
+        control_count = np.bincount(self.control_rows, weights=edge_assessed, minlength=self.n_controls)
+        control_mask = control_count > 0
+        control_score = np.divide(
+            control_total, control_count, out=np.zeros(self.n_controls), where=control_mask
+        )
+
+        # Regulation score: priority-weighted mean of its assessed controls
+        weight = self.control_weight * control_mask
+        regulation_total = np.bincount(self.control_regulation, weights=weight * control_score, minlength=self.n_regulations)
+        regulation_weight = np.bincount(self.control_regulation, weights=weight, minlength=self.n_regulations)
+        regulation_mask = regulation_weight > 0
+        regulation_score = np.divide(
+            regulation_total, regulation_weight, out=np.zeros(self.n_regulations), where=regulation_mask
+        )
+
+        scores = {
+            code: round(float(regulation_score[i]), 4)
+            for i, code in enumerate(self.regulation_codes)
+            if regulation_mask[i]
+        }
+        overall = round(float(regulation_score[regulation_mask].mean()), 4) if scores else None
+        return overall, scores
+
+
+class ConformityScorer:
+    """Scores audits against the current regulation index"""
+
+    def __init__(self):
+        self._model: Optional[ScoringModel] = None
+
+    def model(self) -> ScoringModel:
+        # Rebuilt only when the mapping engine swaps in a new index
+        index = mapping_engine.index
+        if self._model is None or self._model.index is not index:
+            self._model = ScoringModel(index)
+        return self._model
+
+    async def score_audit(self, session: AsyncSession, audit_id: int) -> Tuple[Optional[float], Dict[str, float]]:
+        """Compute and store overall_score and conformity_scores of an audit"""
+        audit = await session.get(Audit, audit_id)
+        rows = (await session.execute(FAILING_CHECKS_SQL, {"audit_id": audit_id})).all()
+
+        # Raw SQL returns the enum label (member name, e.g. "CRITICAL")
+        failing = [(scanner, check_id, severity.lower()) for scanner, check_id, severity in rows]
+
+        # A scanner that crashed or timed out on any target reports no
+        # failing findings for it: its checks were not assessed, not passed
+        scanners_run = set(audit.scanner_versions or {}) - await failed_scanners(session, [audit_id])
+        overall, scores = self.model().score(failing, scanners_run)
+
+        audit.overall_score = overall
+        audit.conformity_scores = scores
+        await session.commit()
+        return overall, scores
+
+
+conformity_scorer = ConformityScorer()
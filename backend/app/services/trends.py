@@ -0,0 +1,134 @@
+"""
+Per-environment trends computed from the Parquet findings archive
+"""
+from typing import Any, Dict, Optional, Set
+from datetime import datetime, timezone
+import asyncio
+import json
+
+from ..core.lazy import lazy_import
+from .archive import AUDIT_METADATA_KEY, FindingsArchive, findings_archive
+from .scan_failures import FAILURE_CHECK_IDS
+
+pa = lazy_import("pyarrow")
+ds = lazy_import("pyarrow.dataset")
+pafs = lazy_import("pyarrow.fs")
+
+
+def _partitioning() -> "ds.Partitioning":
+    return ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive")
+
+
+def _cutoff_month(months: int) -> str:
+    now = datetime.now(timezone.utc)
+    index = now.year * 12 + now.month - 1 - (months - 1)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class TrendAnalyzer:
+    """
+    Reads the archive with column projection and partition pruning only;
+    Postgres is never queried. Audit scores come from Parquet footers,
+    finding counts and regressions from the dictionary-encoded columns.
+
+    Audits are archived as they complete, before anyone triages their
+    findings, so trends ignore triage: "open" counts every finding a
+    scanner reported, accepted or false positive alike.
+    """
+
+    def __init__(self, archive: FindingsArchive = findings_archive):
+        self.archive = archive
+
+    def _dataset(self, environment_id: int) -> Optional["ds.Dataset"]:
+        filesystem, _ = self.archive.filesystem()
+        path = self.archive.environment_path(environment_id)
+        if filesystem.get_file_info(path).type == pafs.FileType.NotFound:
+            return None
+        return ds.dataset(path, filesystem=filesystem, format="parquet", partitioning=_partitioning())
+
+    def environment_trends(self, environment_id: int, months: int = 12) -> Dict[str, Any]:
+        """Scores, open findings by severity and regressions per archived audit"""
+        result: Dict[str, Any] = {"environment_id": environment_id, "months": months, "audits": []}
+        dataset = self._dataset(environment_id)
+        if dataset is None:
+            return result
+
+        month_filter = ds.field("month") >= _cutoff_month(months)
+
+        # Audit summaries from the footers, oldest first
+        audits: Dict[int, Dict[str, Any]] = {}
+        for fragment in dataset.get_fragments(filter=month_filter):
+            metadata = fragment.physical_schema.metadata or {}
+            if AUDIT_METADATA_KEY in metadata:
+                summary = json.loads(metadata[AUDIT_METADATA_KEY])
+                audits[summary["audit_id"]] = summary
+        if not audits:
+            return result
+
+        table = dataset.to_table(
+            columns=["audit_id", "scanner", "check_id", "severity", "finding_hash"],
+            filter=month_filter,
+        ).unify_dictionaries()  # each file carries its own dictionaries
+
+        # Failed scanner runs are stored as ERROR/TIMEOUT pseudo-findings
+        is_failure = ds.field("check_id").isin(list(FAILURE_CHECK_IDS))
+        failed: Dict[int, Set[str]] = {}
+        for row in table.filter(is_failure).select(["audit_id", "scanner"]).to_pylist():
+            failed.setdefault(row["audit_id"], set()).add(row["scanner"])
+
+        found = table.filter(~is_failure)
+        counts: Dict[int, Dict[str, Dict[str, int]]] = {}
+        for row in found.group_by(["audit_id", "scanner", "severity"]).aggregate([([], "count_all")]).to_pylist():
+            by_scanner = counts.setdefault(row["audit_id"], {})
+            by_scanner.setdefault(row["scanner"], {})[row["severity"]] = row["count_all"]
+        hashes: Dict[int, Dict[str, Set[str]]] = {}
+        for row in found.group_by(["audit_id", "scanner"]).aggregate([("finding_hash", "distinct")]).to_pylist():
+            hashes.setdefault(row["audit_id"], {})[row["scanner"]] = set(row["finding_hash_distinct"])
+
+        # Compared per scanner against its last successful run: a failed
+        # scanner keeps its previous findings instead of having them all
+        # fixed, and reports nothing new. A regression is a finding that
+        # was fixed in an earlier audit and came back.
+        last_counts: Dict[str, Dict[str, int]] = {}
+        last_hashes: Dict[str, Set[str]] = {}
+        seen: Dict[str, Set[str]] = {}
+        for audit_id in sorted(audits, key=lambda audit_id: audits[audit_id]["completed_at"]):
+            current_hashes = hashes.get(audit_id, {})
+            new = fixed = regressions = 0
+            for scanner in (set(current_hashes) | set(last_hashes)) - failed.get(audit_id, set()):
+                current = current_hashes.get(scanner, set())
+                previous = last_hashes.get(scanner, set())
+                earlier = seen.setdefault(scanner, set())
+                new += len(current - earlier)
+                fixed += len(previous - current)
+                regressions += len((current - previous) & earlier)
+                earlier |= current
+                last_hashes[scanner] = current
+                last_counts[scanner] = counts.get(audit_id, {}).get(scanner, {})
+
+            open_by_severity: Dict[str, int] = {}
+            for by_severity in last_counts.values():
+                for severity, count in by_severity.items():
+                    open_by_severity[severity] = open_by_severity.get(severity, 0) + count
+
+            summary = audits[audit_id]
+            result["audits"].append({
+                "audit_id": audit_id,
+                "completed_at": summary["completed_at"],
+                "overall_score": summary.get("overall_score"),
+                "conformity_scores": summary.get("conformity_scores", {}),
+                "open_by_severity": {severity: count for severity, count in open_by_severity.items() if count},
+                "new": new,
+                "fixed": fixed,
+                "regressions": regressions,
+            })
+
+        scores = [audit["overall_score"] for audit in result["audits"] if audit["overall_score"] is not None]
+        result["score_change"] = round(scores[-1] - scores[0], 4) if len(scores) > 1 else None
+        return result
+
+    async def environment_trends_async(self, environment_id: int, months: int = 12) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.environment_trends, environment_id, months)
+
+
+trend_analyzer = TrendAnalyzer()
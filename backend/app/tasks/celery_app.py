@@ -0,0 +1,54 @@
+"""
+Celery application for distributed scanning
+"""
+from typing import Any, Coroutine, TypeVar
+import asyncio
+
+from celery import Celery
+from celery.signals import worker_process_shutdown, worker_shutdown
+
+from ..core import metrics
+from ..core.config import settings
+from ..core.resources import resources
+
+T = TypeVar("T")
+
+celery_app = Celery(
+    "compliance_radar",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.prowler"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    timezone="UTC",
+    # Scanner shards are long and retried on failure: hand out one at a
+    # time and acknowledge only once done, so a lost worker's shard is redelivered
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    result_expires=24 * 3600,
+)
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine from a task, releasing pooled connections afterwards"""
+    async def runner() -> T:
+        try:
+            return await coro
+        finally:
+            # Pooled connections are bound to the event loop that opened them
+            await resources.close()
+
+    return asyncio.run(runner())
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _release_metrics(**kwargs: Any) -> None:
+    # Pool processes come and go, and so does the main worker process on
+    # restarts; their in-flight gauges must not linger
+    metrics.mark_process_dead()
@@ -0,0 +1,157 @@
+"""
+Prowler fan-out: one AWS target split into region x service shards
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import logging
+import time
+
+from celery import chord
+from sqlalchemy import text
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..core.metrics import SCAN_QUEUE_WAIT_SECONDS
+from ..scanners.registry import scanner_registry
+from ..services.ingestion import FindingIngestor
+from .celery_app import celery_app, run_async
+
+logger = logging.getLogger(__name__)
+
+# Account-wide services: scanning them per region would only repeat findings
+PROWLER_GLOBAL_SERVICES = {
+    "iam",
+    "organizations",
+    "account",
+    "cloudfront",
+    "route53",
+    "trustedadvisor",
+}
+
+# Shard retries can ingest the same findings twice; keep the first copy
+DEDUPE_SQL = text("""
+    DELETE FROM findings f
+    USING findings d
+    WHERE f.audit_id = :audit_id
+      AND d.audit_id = :audit_id
+      AND f.scanner = 'prowler'
+      AND d.scanner = 'prowler'
+      AND f.finding_hash = d.finding_hash
+      AND f.id > d.id
+""")
+
+
+class ShardFailed(Exception):
+    """A shard's prowler run failed and may be retried"""
+
+
+def _chunks(items: Sequence[str], size: int) -> List[List[str]]:
+    size = max(1, size)
+    return [list(items[start:start + size]) for start in range(0, len(items), size)]
+
+
+def shard_target(target: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Split a prowler target into region x service shards.
+
+    Shard sizes come from the target ("regions_per_shard",
+    "services_per_shard") or from settings. Global services get shards
+    of their own with a single region.
+    """
+    regions = target.get("regions") or settings.PROWLER_SHARD_REGIONS
+    services = target.get("services") or settings.PROWLER_SHARD_SERVICES
+    regions_per_shard = target.get("regions_per_shard", settings.PROWLER_REGIONS_PER_SHARD)
+    services_per_shard = target.get("services_per_shard", settings.PROWLER_SERVICES_PER_SHARD)
+
+    regional = [service for service in services if service not in PROWLER_GLOBAL_SERVICES]
+    global_services = [service for service in services if service in PROWLER_GLOBAL_SERVICES]
+
+    shards = []
+    for region_chunk in _chunks(regions, regions_per_shard):
+        for service_chunk in _chunks(regional, services_per_shard):
+            shards.append({**target, "regions": region_chunk, "services": service_chunk})
+    for service_chunk in _chunks(global_services, services_per_shard):
+        shards.append({**target, "regions": list(regions[:1]), "services": service_chunk})
+    return shards
+
+
+async def _scan_shard(audit_id: int, shard: Dict[str, Any], final_attempt: bool) -> Dict[str, Any]:
+    started = time.monotonic()
+    results = await scanner_registry.get("prowler").scan(shard)
+    errors = [result.description for result in results if result.check_id == "ERROR"]
+    if errors and not final_attempt:
+        raise ShardFailed(errors[0])
+
+    # Last attempt: the error is recorded as a finding, like unsharded runs
+    ingestor = FindingIngestor(audit_id)
+    for result in results:
+        await ingestor.add(result)
+    stats = await ingestor.close()
+    return {
+        "regions": shard["regions"],
+        "services": shard["services"],
+        "rows": stats.rows,
+        "copy_seconds": stats.copy_seconds,
+        "duration_seconds": round(time.monotonic() - started, 3),
+        "error": errors[0] if errors else None,
+    }
+
+
+@celery_app.task(bind=True, name="prowler.scan_shard", max_retries=settings.PROWLER_SHARD_MAX_RETRIES)
+def scan_prowler_shard(
+    self, audit_id: int, shard: Dict[str, Any], enqueued_at: Optional[float] = None
+) -> Dict[str, Any]:
+    """Run prowler for one shard and COPY its findings into the audit"""
+    if enqueued_at is not None and self.request.retries == 0:
+        # Wall clock: the shard was queued by another host
+        SCAN_QUEUE_WAIT_SECONDS.labels("prowler", "celery").observe(max(0.0, time.time() - enqueued_at))
+    final_attempt = self.request.retries >= self.max_retries
+    try:
+        return run_async(_scan_shard(audit_id, shard, final_attempt))
+    except ShardFailed as e:
+        countdown = settings.PROWLER_SHARD_RETRY_BACKOFF_SECONDS * 2 ** self.request.retries
+        logger.warning(
+            "Prowler shard %s/%s of audit %s failed (attempt %d), retrying in %ss: %s",
+            shard["regions"], shard["services"], audit_id, self.request.retries + 1, countdown, e,
+        )
+        raise self.retry(exc=e, countdown=countdown)
+
+
+async def _dedupe(audit_id: int) -> int:
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(DEDUPE_SQL, {"audit_id": audit_id})
+        await session.commit()
+        return result.rowcount
+
+
+@celery_app.task(name="prowler.merge_shards")
+def merge_prowler_shards(shard_results: List[Dict[str, Any]], audit_id: int) -> Dict[str, Any]:
+    """Chord callback: deduplicate the shards' findings and summarize"""
+    removed = run_async(_dedupe(audit_id))
+    return {
+        "shards": len(shard_results),
+        "rows": sum(result["rows"] for result in shard_results) - removed,
+        "duplicates_removed": removed,
+        "copy_seconds": sum(result["copy_seconds"] for result in shard_results),
+        "slowest_shard_seconds": max((result["duration_seconds"] for result in shard_results), default=0),
+        "errors": [result["error"] for result in shard_results if result["error"]],
+    }
+
+
+async def run_prowler_fanout(audit_id: int, target: Dict[str, Any]) -> Dict[str, Any]:
+    """Dispatch a target's shards to the workers and wait for the merged result"""
+    shards = shard_target(target)
+    logger.info("Audit %s: prowler target split into %d shards", audit_id, len(shards))
+    enqueued_at = time.time()
+    header = chord(scan_prowler_shard.s(audit_id, shard, enqueued_at) for shard in shards)
+    result = await asyncio.to_thread(header, merge_prowler_shards.s(audit_id))
+    try:
+        while not await asyncio.to_thread(result.ready):
+            await asyncio.sleep(settings.PROWLER_FANOUT_POLL_SECONDS)
+    except asyncio.CancelledError:
+        # Timed out or cancelled: stop shards that have not finished
+        if result.parent is not None:
+            result.parent.revoke(terminate=True)
+        result.revoke()
+        raise
+    return await asyncio.to_thread(result.get, propagate=True)
@@ -0,0 +1,48 @@
+"""
+Stand-in scanner binary replaying a pre-generated report
+
+    fake_scanner.py <trivy|prowler|kube-bench> [the real scanner's arguments]
+
+The report comes from $BENCH_REPLAY_FILE. trivy and kube-bench write it
+to stdout, prowler copies it to <--output-directory>/<--output-filename>.json,
+like the real tools. Version probes are answered with a fixed version.
+"""
+import os
+import shutil
+import sys
+
+VERSIONS = {
+    "trivy": "Version: 0.50.0",
+    "prowler": "Prowler 4.0.0",
+    "kube-bench": "0.7.0",
+}
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _option(args, name: str, default: str = "") -> str:
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def main(argv) -> int:
+    scanner, args = argv[0], argv[1:]
+    if "--version" in args or args[:1] == ["version"]:
+        print(VERSIONS[scanner])
+        return 0
+
+    report = os.environ["BENCH_REPLAY_FILE"]
+    if scanner == "prowler":
+        directory = _option(args, "--output-directory", ".")
+        filename = _option(args, "--output-filename", "prowler-output")
+        shutil.copyfile(report, os.path.join(directory, f"{filename}.json"))
+        return 0
+
+    with open(report, "rb") as source:
+        shutil.copyfileobj(source, sys.stdout.buffer, CHUNK_SIZE)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,333 @@
+"""
+Synthetic Trivy, Prowler and kube-bench reports for benchmarks
+
+    python -m benchmarks.generate --sizes 1k,100k,1m
+
+Reports follow the scanners' real JSON layouts, with realistic field
+sizes and value distributions: CVE ids and packages repeat across
+targets, most Prowler checks come from the regulation mappings, and
+Prowler/kube-bench reports also contain passing checks the scanners
+skip. ``size`` is the number of findings the scanner will report.
+Output is deterministic for a given seed and written incrementally, so
+1M-finding reports do not need to fit in memory.
+"""
+from typing import Callable, Dict, IO, Iterator, List
+import argparse
+import json
+import os
+import random
+
+DATA_DIR = os.getenv("BENCH_DATA_DIR", "/tmp/compliance-radar/bench")
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+
+SEVERITIES = ["CRITICAL", "HIGH", "MEDIUM", "LOW", "UNKNOWN"]
+SEVERITY_WEIGHTS = [5, 20, 45, 25, 5]
+
+PACKAGES = [
+    "openssl", "libssl3", "zlib1g", "curl", "libcurl4", "glibc", "libc6", "bash", "busybox",
+    "ncurses", "libxml2", "expat", "sqlite3", "python3.11", "perl", "git", "tar", "gzip",
+    "requests", "urllib3", "django", "flask", "jinja2", "lodash", "express", "axios",
+    "log4j-core", "jackson-databind", "spring-core", "netty-codec", "golang.org/x/net",
+    "golang.org/x/crypto", "github.com/gin-gonic/gin", "nghttp2", "krb5", "pcre2",
+]
+
+PROWLER_CHECKS = [
+    # Mapped to regulation controls
+    ("cloudtrail_enabled", "cloudtrail", "AwsCloudTrailTrail"),
+    ("config_enabled", "config", "AwsConfigRecorder"),
+    ("guardduty_enabled", "guardduty", "AwsGuardDutyDetector"),
+    ("securityhub_enabled", "securityhub", "AwsSecurityHubHub"),
+    ("iam_mfa_enabled", "iam", "AwsIamUser"),
+    ("iam_root_mfa_enabled", "iam", "AwsIamUser"),
+    ("iam_password_policy", "iam", "AwsIamPasswordPolicy"),
+    ("iam_policy_unused", "iam", "AwsIamPolicy"),
+    ("s3_bucket_encryption", "s3", "AwsS3Bucket"),
+    ("s3_versioning_enabled", "s3", "AwsS3Bucket"),
+    ("ebs_encryption", "ec2", "AwsEc2Volume"),
+    ("rds_encryption", "rds", "AwsRdsDbInstance"),
+    ("rds_backup_enabled", "rds", "AwsRdsDbInstance"),
+    ("kms_key_rotation", "kms", "AwsKmsKey"),
+    ("alb_https_listener", "elbv2", "AwsElbv2LoadBalancer"),
+    ("elb_ssl_policy", "elb", "AwsElbLoadBalancer"),
+    ("backup_enabled", "backup", "AwsBackupBackupPlan"),
+    # Unmapped
+    ("ec2_instance_public_ip", "ec2", "AwsEc2Instance"),
+    ("ec2_securitygroup_allow_ingress_from_internet_to_any_port", "ec2", "AwsEc2SecurityGroup"),
+    ("lambda_function_url_public", "lambda", "AwsLambdaFunction"),
+    ("eks_cluster_endpoint_public_access", "eks", "AwsEksCluster"),
+    ("cloudwatch_log_group_retention_policy_specific_days_enabled", "cloudwatch", "AwsLogsLogGroup"),
+    ("dynamodb_tables_pitr_enabled", "dynamodb", "AwsDynamoDbTable"),
+    ("sns_topics_not_publicly_accessible", "sns", "AwsSnsTopic"),
+]
+
+REGIONS = ["eu-west-1", "eu-west-3", "eu-central-1", "us-east-1", "us-west-2", "ap-southeast-1"]
+
+KUBE_BENCH_SECTIONS = [
+    ("1", "Control Plane Security Configuration"),
+    ("2", "Etcd Node Configuration"),
+    ("3", "Control Plane Configuration"),
+    ("4", "Worker Node Security Configuration"),
+    ("5", "Kubernetes Policies"),
+]
+
+LOREM = (
+    "A flaw was found in the handling of crafted input which may allow a remote attacker to "
+    "cause a denial of service or execute arbitrary code under certain configurations. The "
+    "issue affects deployments exposing the component to untrusted networks and is fixed "
+    "in later releases by validating lengths before copying data into fixed-size buffers."
+).split()
+
+
+def _text(rng: random.Random, low: int, high: int) -> str:
+    start = rng.randrange(len(LOREM))
+    words = [LOREM[(start + offset) % len(LOREM)] for offset in range(rng.randint(low, high))]
+    return " ".join(words).capitalize() + "."
+
+
+def _version(rng: random.Random) -> str:
+    return f"{rng.randint(0, 4)}.{rng.randint(0, 30)}.{rng.randint(0, 20)}"
+
+
+def _write_array(out: IO[str], items: Iterator[Dict]) -> None:
+    out.write("[")
+    for index, item in enumerate(items):
+        if index:
+            out.write(",\n")
+        out.write(json.dumps(item))
+    out.write("]")
+
+
+# ----------------------------------------------------------------------
+# Trivy: {"Results": [{"Target", "Vulnerabilities": [...]}, ...]}
+# ----------------------------------------------------------------------
+
+def _trivy_vulnerability(rng: random.Random) -> Dict:
+    year = rng.randint(2014, 2025)
+    cve = f"CVE-{year}-{rng.randint(1000, 1000 + 40_000)}"
+    package = rng.choice(PACKAGES)
+    fixed = _version(rng) if rng.random() < 0.7 else ""
+    severity = rng.choices(SEVERITIES, SEVERITY_WEIGHTS)[0]
+    return {
+        "VulnerabilityID": cve,
+        "PkgID": f"{package}@{_version(rng)}",
+        "PkgName": package,
+        "InstalledVersion": _version(rng),
+        "FixedVersion": fixed,
+        "Status": "fixed" if fixed else "affected",
+        "Layer": {"DiffID": "sha256:" + "%064x" % rng.getrandbits(256)},
+        "SeveritySource": "nvd",
+        "PrimaryURL": f"https://avd.aquasec.com/nvd/{cve.lower()}",
+        "DataSource": {"ID": "debian", "Name": "Debian Security Tracker", "URL": "https://salsa.debian.org/security-tracker-team/security-tracker"},
+        "Title": f"{package}: {_text(rng, 4, 10)}",
+        "Description": _text(rng, 30, 90),
+        "Severity": severity,
+        "CweIDs": [f"CWE-{rng.randint(20, 900)}"],
+        "CVSS": {"nvd": {"V3Vector": "CVSS:3.1/AV:N/AC:L/PR:N/UI:N/S:U/C:H/I:H/A:H", "V3Score": round(rng.uniform(2, 10), 1)}},
+        "References": [f"https://security-tracker.debian.org/tracker/{cve}"] + [
+            f"https://github.com/advisories/GHSA-{rng.getrandbits(40):010x}" for _ in range(rng.randint(1, 5))
+        ],
+        "PublishedDate": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T15:15:00Z",
+        "LastModifiedDate": "2025-01-14T10:00:00Z",
+    }
+
+
+def _trivy_misconfiguration(rng: random.Random) -> Dict:
+    number = rng.randint(1, 150)
+    return {
+        "Type": "Kubernetes Security Check",
+        "ID": f"KSV{number:03d}",
+        "AVDID": f"AVD-KSV-{number:04d}",
+        "Title": _text(rng, 4, 8),
+        "Description": _text(rng, 15, 40),
+        "Message": _text(rng, 6, 12),
+        "Namespace": f"builtin.kubernetes.KSV{number:03d}",
+        "Resolution": _text(rng, 5, 15),
+        "Severity": rng.choices(SEVERITIES[:4], SEVERITY_WEIGHTS[:4])[0],
+        "Status": "FAIL",
+        "CauseMetadata": {"Provider": "Kubernetes", "Service": "general", "StartLine": rng.randint(1, 200)},
+    }
+
+
+def write_trivy(out: IO[str], size: int, rng: random.Random) -> None:
+    out.write('{"SchemaVersion": 2, "ArtifactName": "registry.example.com/app:1.0", "ArtifactType": "container_image", "Results": [')
+    remaining = size
+    target_index = 0
+    while remaining > 0:
+        count = min(remaining, rng.randint(50, 2000))
+        misconfig = rng.random() < 0.05
+        if target_index:
+            out.write(",\n")
+        if misconfig:
+            out.write(json.dumps({"Target": f"deploy/manifest-{target_index}.yaml", "Class": "config", "Type": "kubernetes"})[:-1])
+            out.write(', "Misconfigurations": ')
+            _write_array(out, (_trivy_misconfiguration(rng) for _ in range(count)))
+        else:
+            out.write(json.dumps({"Target": f"layer-{target_index} (debian 12.5)", "Class": "os-pkgs", "Type": "debian"})[:-1])
+            out.write(', "Vulnerabilities": ')
+            _write_array(out, (_trivy_vulnerability(rng) for _ in range(count)))
+        out.write("}")
+        remaining -= count
+        target_index += 1
+    out.write("]}")
+
+
+# ----------------------------------------------------------------------
+# Prowler: [check result, ...] (json output mode)
+# ----------------------------------------------------------------------
+
+def _prowler_check(rng: random.Random, status: str) -> Dict:
+    check_id, service, resource_type = rng.choice(PROWLER_CHECKS)
+    region = rng.choice(REGIONS)
+    resource = f"{service}-{rng.getrandbits(32):08x}"
+    return {
+        "AssessmentStartTime": "2025-01-15T08:00:00Z",
+        "FindingUniqueId": f"prowler-aws-{check_id}-123456789012-{region}-{resource}",
+        "Provider": "aws",
+        "CheckID": check_id,
+        "CheckTitle": check_id.replace("_", " ").capitalize(),
+        "CheckType": ["Software and Configuration Checks"],
+        "ServiceName": service,
+        "SubServiceName": "",
+        "Status": status,
+        "StatusExtended": _text(rng, 6, 14),
+        "Severity": rng.choices(["critical", "high", "medium", "low"], [5, 25, 50, 20])[0],
+        "ResourceType": resource_type,
+        "ResourceDetails": "",
+        "Description": _text(rng, 15, 40),
+        "Risk": _text(rng, 15, 30),
+        "RelatedUrl": f"https://docs.aws.amazon.com/{service}/latest/userguide/",
+        "Remediation": {
+            "Code": {"NativeIaC": "", "Terraform": "", "CLI": f"aws {service} update --id {resource}", "Other": ""},
+            "Recommendation": {"Text": _text(rng, 8, 20), "Url": f"https://docs.aws.amazon.com/{service}/"},
+        },
+        "Compliance": {"CIS-2.0": [f"{rng.randint(1, 5)}.{rng.randint(1, 20)}"]},
+        "Categories": [],
+        "Notes": "",
+        "Profile": "default",
+        "AccountId": "123456789012",
+        "OrganizationsInfo": None,
+        "Region": region,
+        "ResourceId": resource,
+        "ResourceArn": f"arn:aws:{service}:{region}:123456789012:{resource}",
+        "ResourceTags": {"env": rng.choice(["prod", "staging", "dev"])},
+    }
+
+
+def write_prowler(out: IO[str], size: int, rng: random.Random) -> None:
+    # Roughly one passing check for every two failing ones
+    def items() -> Iterator[Dict]:
+        failing = 0
+        while failing < size:
+            if rng.random() < 0.33:
+                yield _prowler_check(rng, "PASS")
+            else:
+                failing += 1
+                yield _prowler_check(rng, "FAIL")
+
+    _write_array(out, items())
+
+
+# ----------------------------------------------------------------------
+# kube-bench: {"Controls": [{"tests": [{"results": [...]}]}], "Totals": {...}}
+# ----------------------------------------------------------------------
+
+def _kube_bench_result(rng: random.Random, number: str, status: str) -> Dict:
+    return {
+        "test_number": number,
+        "test_desc": f"Ensure that the {_text(rng, 4, 9).rstrip('.')} (Automated)",
+        "audit": f"/bin/ps -ef | grep kube-apiserver | grep -v grep # {number}",
+        "AuditEnv": "",
+        "AuditConfig": "",
+        "type": "",
+        "remediation": _text(rng, 12, 30),
+        "test_info": [_text(rng, 8, 16)],
+        "status": status,
+        "actual_value": "",
+        "scored": rng.random() < 0.8,
+        "IsMultiple": False,
+        "expected_result": "'--anonymous-auth' is equal to 'false'",
+        "reason": _text(rng, 4, 10) if status == "FAIL" else "",
+    }
+
+
+def write_kube_bench(out: IO[str], size: int, rng: random.Random) -> None:
+    out.write('{"Controls": [')
+    failing = passing = 0
+    control = 0
+    while failing < size:
+        section_id, section_text = KUBE_BENCH_SECTIONS[control % len(KUBE_BENCH_SECTIONS)]
+        if control:
+            out.write(",\n")
+        out.write(json.dumps({"id": section_id, "version": "cis-1.8", "detected_version": "1.28", "text": section_text, "node_type": "master"})[:-1])
+        out.write(', "tests": [')
+        for group in range(1, rng.randint(3, 8) + 1):
+            if failing >= size:
+                break
+            if group > 1:
+                out.write(",\n")
+            results: List[Dict] = []
+            for test in range(1, rng.randint(5, 40) + 1):
+                if failing >= size:
+                    break
+                status = "FAIL" if rng.random() < 0.5 else rng.choice(["PASS", "WARN"])
+                failing += status == "FAIL"
+                passing += status != "FAIL"
+                results.append(_kube_bench_result(rng, f"{section_id}.{group}.{test}", status))
+            out.write(json.dumps({
+                "section": f"{section_id}.{group}",
+                "type": "",
+                "pass": 0,
+                "fail": 0,
+                "warn": 0,
+                "info": 0,
+                "desc": section_text,
+                "results": results,
+            }))
+        out.write("]}")
+        control += 1
+    out.write("], ")
+    out.write(json.dumps({"Totals": {"total_pass": passing, "total_fail": failing, "total_warn": 0, "total_info": 0}})[1:])
+
+
+GENERATORS: Dict[str, Callable[[IO[str], int, random.Random], None]] = {
+    "trivy": write_trivy,
+    "prowler": write_prowler,
+    "kube-bench": write_kube_bench,
+}
+
+
+def report_path(scanner: str, size_label: str, data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, f"{scanner}-{size_label}.json")
+
+
+def generate(scanner: str, size_label: str, data_dir: str = DATA_DIR, seed: int = 42, force: bool = False) -> str:
+    """Write (or reuse) one report and return its path"""
+    path = report_path(scanner, size_label, data_dir)
+    if os.path.exists(path) and not force:
+        return path
+    os.makedirs(data_dir, exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8", buffering=1024 * 1024) as out:
+        GENERATORS[scanner](out, SIZES[size_label], random.Random(f"{scanner}:{size_label}:{seed}"))
+    os.replace(temporary, path)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic scanner reports")
+    parser.add_argument("--scanners", default=",".join(GENERATORS))
+    parser.add_argument("--sizes", default="1k,100k")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="regenerate existing reports")
+    args = parser.parse_args()
+
+    for scanner in args.scanners.split(","):
+        for size_label in args.sizes.split(","):
+            path = generate(scanner, size_label, args.data_dir, args.seed, args.force)
+            print(f"{path}: {os.path.getsize(path) / 1024 ** 2:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
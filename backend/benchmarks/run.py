@@ -0,0 +1,286 @@
+"""
+Ingestion pipeline benchmarks on synthetic scanner output
+
+    cd backend
+    python -m benchmarks.run                        # 1k and 100k, compared with baselines
+    python -m benchmarks.run --scanners trivy --sizes 1m
+    python -m benchmarks.run --update-baselines     # record this machine's numbers
+
+Reports come from benchmarks.generate and are replayed by fake scanner
+binaries (benchmarks/fake_scanner.py), so no cloud account or cluster is
+needed. Each case (scanner x size) runs in a fresh interpreter, so its
+peak RSS is its own. Stages, in seconds:
+
+    read       fake scanner output read to EOF, without parsing
+    scan       the scanner class end to end: subprocess, JSON parsing,
+               ScanResult construction (which includes hashing)
+    parse      scan - read
+    normalize  FindingBatch columns, as the ingestor builds them
+    mapping    regulation lookup of each batch's distinct checks
+    persist    raw blob compression and COPY records (CPU side only)
+    copy       FindingIngestor into a real database, with --copy AUDIT_ID
+
+A case regresses when a stage or the peak RSS exceeds its baseline by
+more than --tolerance (and by more than a small absolute margin, so
+millisecond noise in the 1k cases does not count). Baselines are
+machine dependent: refresh them with --update-baselines on the machine
+that runs the comparison.
+"""
+from typing import Any, Dict, List, Optional
+from time import perf_counter
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+
+from .generate import DATA_DIR, GENERATORS, SIZES, generate
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+FAKE_SCANNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_scanner.py")
+
+STAGES = ["read", "scan", "parse", "normalize", "mapping", "persist", "copy"]
+
+# Below these differences a slower run is noise, not a regression
+MIN_REGRESSION_SECONDS = 0.05
+MIN_REGRESSION_MB = 16.0
+
+TARGETS: Dict[str, Dict[str, Any]] = {
+    "trivy": {"type": "trivy", "scan_type": "image", "target": "registry.example.com/app:1.0", "cache": False},
+    "prowler": {"type": "aws", "profile": "default", "regions": ["eu-west-1"]},
+    "kube-bench": {"type": "kubernetes", "context": "bench"},
+}
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def fake_binary(scanner: str, data_dir: str) -> str:
+    """Executable wrapper invoking fake_scanner.py as ``scanner``"""
+    directory = os.path.join(data_dir, "bin")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, scanner)
+    with open(path, "w") as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_SCANNER}" {scanner} "$@"\n')
+    os.chmod(path, 0o755)
+    return path
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(who).ru_maxrss / 1024, 1)
+
+
+# ----------------------------------------------------------------------
+# One case, in its own process
+# ----------------------------------------------------------------------
+
+async def _time_read(scanner: str, binary: str, data_dir: str) -> tuple:
+    """Raw output of the fake scanner read to EOF: (seconds, bytes)"""
+    started = perf_counter()
+    if scanner == "prowler":
+        output_dir = os.path.join(data_dir, "prowler-read")
+        os.makedirs(output_dir, exist_ok=True)
+        process = await asyncio.create_subprocess_exec(
+            binary, "aws", "--output-directory", output_dir, "--output-filename", "out"
+        )
+        await process.wait()
+        path = os.path.join(output_dir, "out.json")
+        size = 0
+        with open(path, "rb") as f:
+            while chunk := f.read(READ_CHUNK_SIZE):
+                size += len(chunk)
+        os.unlink(path)
+        return perf_counter() - started, size
+
+    process = await asyncio.create_subprocess_exec(binary, stdout=asyncio.subprocess.PIPE)
+    size = 0
+    while chunk := await process.stdout.read(READ_CHUNK_SIZE):
+        size += len(chunk)
+    await process.wait()
+    return perf_counter() - started, size
+
+
+async def run_case(scanner_name: str, size_label: str, data_dir: str, copy_audit_id: Optional[int] = None) -> Dict[str, Any]:
+    # Imported here so the parent process stays small
+    from app.core.config import settings
+    from app.scanners.batch import FindingBatch
+    from app.scanners.registry import SCANNER_CLASSES
+    from app.services.ingestion import FindingIngestor, to_copy_records
+    from app.services.mapping_engine import mapping_engine
+    from app.services.raw_store import RawBlobStore
+
+    os.environ["BENCH_REPLAY_FILE"] = generate(scanner_name, size_label, data_dir)
+    binary = fake_binary(scanner_name, data_dir)
+    mapping_engine.load()
+    store = RawBlobStore()
+    stages = dict.fromkeys(STAGES, 0.0)
+
+    stages["read"], output_bytes = await _time_read(scanner_name, binary, data_dir)
+
+    def process(results: List[Any]) -> None:
+        started = perf_counter()
+        batch = FindingBatch.from_results(results)
+        stages["normalize"] += perf_counter() - started
+
+        started = perf_counter()
+        mapping_engine.map_checks(set(zip(batch.scanner, batch.check_id)))
+        stages["mapping"] += perf_counter() - started
+
+        started = perf_counter()
+        hashes, _ = store.prepare(batch.raw_json)
+        to_copy_records(0, batch, hashes)
+        stages["persist"] += perf_counter() - started
+
+    scanner = SCANNER_CLASSES[scanner_name]({"binary": binary})
+    ingestor = FindingIngestor(copy_audit_id) if copy_audit_id else None
+    findings = 0
+    pending: List[Any] = []
+    outside_scan = 0.0
+
+    started = perf_counter()
+    async for result in scanner.scan_stream(TARGETS[scanner_name]):
+        if result.check_id == "ERROR":
+            raise RuntimeError(result.description)
+        findings += 1
+        pending.append(result)
+        if ingestor is not None:
+            copy_started = perf_counter()
+            await ingestor.add(result)
+            stages["copy"] += perf_counter() - copy_started
+            outside_scan += perf_counter() - copy_started
+        if len(pending) >= settings.FINDINGS_COPY_BATCH_SIZE:
+            batch_started = perf_counter()
+            process(pending)
+            pending = []
+            outside_scan += perf_counter() - batch_started
+    if pending:
+        batch_started = perf_counter()
+        process(pending)
+        outside_scan += perf_counter() - batch_started
+    stages["scan"] = perf_counter() - started - outside_scan
+
+    if ingestor is not None:
+        copy_started = perf_counter()
+        await ingestor.close()
+        stages["copy"] += perf_counter() - copy_started
+    stages["parse"] = max(0.0, stages["scan"] - stages["read"])
+
+    total = sum(stages[stage] for stage in ("scan", "normalize", "mapping", "persist", "copy"))
+    return {
+        "findings": findings,
+        "output_mb": round(output_bytes / 1024 ** 2, 1),
+        "stages": {stage: round(seconds, 4) for stage, seconds in stages.items()},
+        "findings_per_second": round(findings / total, 1) if total else 0.0,
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "scanner_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+
+def run_isolated(case: str, data_dir: str, copy_audit_id: Optional[int]) -> Dict[str, Any]:
+    command = [sys.executable, "-m", "benchmarks.run", "--case", case, "--data-dir", data_dir]
+    if copy_audit_id:
+        command += ["--copy", str(copy_audit_id)]
+    completed = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{case} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def load_baselines() -> Dict[str, Any]:
+    if not os.path.exists(BASELINES_PATH):
+        return {"cases": {}}
+    with open(BASELINES_PATH) as f:
+        return json.load(f)
+
+
+def regressions(case: str, result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    found = []
+    for stage, seconds in result["stages"].items():
+        previous = baseline["stages"].get(stage)
+        if previous is None:
+            continue
+        if seconds > previous * (1 + tolerance) and seconds - previous > MIN_REGRESSION_SECONDS:
+            found.append(f"{case} {stage}: {seconds:.3f}s vs {previous:.3f}s")
+    previous = baseline.get("peak_rss_mb")
+    current = result["peak_rss_mb"]
+    if previous and current > previous * (1 + tolerance) and current - previous > MIN_REGRESSION_MB:
+        found.append(f"{case} peak RSS: {current:.0f} MB vs {previous:.0f} MB")
+    return found
+
+
+def print_table(results: Dict[str, Dict[str, Any]]) -> None:
+    header = f"{'case':<18} {'findings':>9} {'MiB':>7}" + "".join(f" {stage:>9}" for stage in STAGES)
+    print(header + f" {'find/s':>10} {'rss MB':>8}")
+    for case, result in results.items():
+        print(
+            f"{case:<18} {result['findings']:>9} {result['output_mb']:>7}"
+            + "".join(f" {result['stages'][stage]:>9.3f}" for stage in STAGES)
+            + f" {result['findings_per_second']:>10.0f} {result['peak_rss_mb']:>8.0f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion pipeline")
+    parser.add_argument("--scanners", default=",".join(GENERATORS))
+    parser.add_argument("--sizes", default="1k,100k", help=f"of {', '.join(SIZES)}")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--copy", type=int, metavar="AUDIT_ID", help="also COPY findings into this audit")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown vs baseline")
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        scanner, size_label = args.case.split(":")
+        print(json.dumps(asyncio.run(run_case(scanner, size_label, args.data_dir, args.copy))))
+        return 0
+
+    cases = [
+        (scanner, size_label)
+        for size_label in args.sizes.split(",")
+        for scanner in args.scanners.split(",")
+    ]
+    # Generate up front so report generation does not count against any case
+    for scanner, size_label in cases:
+        generate(scanner, size_label, args.data_dir)
+
+    results = {
+        f"{scanner}/{size_label}": run_isolated(f"{scanner}:{size_label}", args.data_dir, args.copy)
+        for scanner, size_label in cases
+    }
+    print_table(results)
+
+    baselines = load_baselines()
+    if args.update_baselines:
+        baselines["machine"] = f"{platform.machine()} {platform.processor() or platform.system()}, {os.cpu_count()} CPUs"
+        baselines["python"] = platform.python_version()
+        baselines["cases"].update(results)
+        with open(BASELINES_PATH, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaselines written to {BASELINES_PATH}")
+        return 0
+
+    found = []
+    for case, result in results.items():
+        baseline = baselines["cases"].get(case)
+        if baseline is not None:
+            found += regressions(case, result, baseline, args.tolerance)
+    if found:
+        print("\nRegressions:")
+        for line in found:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
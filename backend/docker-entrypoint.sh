@@ -0,0 +1,14 @@
+#!/bin/sh
+# Prometheus multiprocess files are named <type>_<hostname>-<pid>.db. The
+# ones a previous run of this container left behind would keep adding
+# their stale samples to /metrics, so remove them before any process
+# starts. Files of other containers sharing the directory are left alone.
+set -e
+
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+    host=$(hostname | tr '_' '-')
+    rm -f "$PROMETHEUS_MULTIPROC_DIR"/*_"$host"-*.db
+fi
+
+exec "$@"
@@ -0,0 +1,96 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import diff, scan_failures
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def one(self):
+        return self._rows[0]
+
+    def scalars(self):
+        return _Result([row[0] for row in self._rows])
+
+    def all(self):
+        return self._rows
+
+    def scalar_one_or_none(self):
+        return self._rows[0] if self._rows else None
+
+    def scalar_one(self):
+        return self._rows[0]
+
+
+class FakeSession:
+    """Answers the diff queries from in-memory (audit_id, scanner, check_id, finding_hash) rows"""
+
+    def __init__(self, findings):
+        self.findings = findings
+        self.stored = None
+
+    def _hashes(self, audit_id, failed):
+        return {
+            finding_hash
+            for audit, scanner, check_id, finding_hash in self.findings
+            if audit == audit_id and not scan_failures.is_failure(check_id) and scanner not in failed
+        }
+
+    async def execute(self, statement, params=None):
+        if statement is scan_failures.FAILED_SCANNERS_SQL:
+            return _Result(sorted({
+                (scanner,) for audit, scanner, check_id, _ in self.findings
+                if audit == params["audit_id"] and scan_failures.is_failure(check_id)
+            }))
+        if statement is diff.DIFF_SQL:
+            # What the SQL computes, given the parameters get_or_compute binds
+            cur = self._hashes(params["audit_id"], params["failed_scanners"])
+            prev = self._hashes(params["against_audit_id"], params["failed_scanners"])
+            return _Result([SimpleNamespace(new=sorted(cur - prev), fixed=sorted(prev - cur), persisting=len(cur & prev))])
+        if getattr(statement, "is_insert", False):
+            values = statement.compile(dialect=postgresql.dialect()).params
+            self.stored = SimpleNamespace(**values, created_at=None)
+            return _Result([])
+        return _Result([self.stored] if self.stored else [])
+
+    async def commit(self):
+        pass
+
+
+def _diff(findings):
+    stored = asyncio.run(diff.audit_diff_engine.get_or_compute(FakeSession(findings), 2, 1))
+    return diff.diff_to_dict(stored, include_hashes=True)
+
+
+def test_diff_between_successful_audits():
+    result = _diff([
+        (1, "prowler", "s3_encryption", "a"),
+        (1, "trivy", "CVE-1", "b"),
+        (2, "trivy", "CVE-1", "b"),
+        (2, "trivy", "CVE-2", "c"),
+    ])
+    assert (result["new_hashes"], result["fixed_hashes"], result["persisting"]) == (["c"], ["a"], 1)
+
+
+def test_failed_scanner_findings_are_neither_fixed_nor_new():
+    result = _diff([
+        (1, "prowler", "s3_encryption", "a"),
+        (1, "trivy", "CVE-1", "b"),
+        # prowler timed out in the current audit after reporting nothing
+        (2, "prowler", "TIMEOUT", "t"),
+        (2, "trivy", "CVE-1", "b"),
+        (2, "trivy", "CVE-2", "c"),
+    ])
+    assert (result["new_hashes"], result["fixed_hashes"], result["persisting"]) == (["c"], [], 1)
+
+
+def test_scanner_failed_in_previous_audit_reports_nothing_new():
+    result = _diff([
+        (1, "prowler", "ERROR", "e"),
+        (2, "prowler", "s3_encryption", "a"),
+    ])
+    assert (result["new"], result["fixed"], result["persisting"]) == (0, 0, 0)
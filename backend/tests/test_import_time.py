@@ -0,0 +1,17 @@
+import pytest
+
+from app.core.import_profile import DEFAULT_BUDGET_SECONDS, profile
+
+# Process entry points: the API and the Celery workers
+TARGETS = ["app.main", "app.tasks.celery_app"]
+RUNS = 3
+
+
+@pytest.mark.parametrize("target", TARGETS)
+def test_startup_imports_within_budget(target):
+    # Best of a few fresh interpreters, as the CLI reports it
+    best = min((profile(target) for _ in range(RUNS)), key=lambda run: run.seconds)
+    assert best.heavy == [], f"heavy modules imported eagerly by {target}"
+    assert best.seconds <= DEFAULT_BUDGET_SECONDS, (
+        f"import {target} took {best.seconds:.3f}s, over the {DEFAULT_BUDGET_SECONDS:.3f}s budget"
+    )
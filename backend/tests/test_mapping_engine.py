@@ -0,0 +1,38 @@
+import json
+import logging
+
+from app.services.mapping_engine import RegulationMappingEngine
+
+VALID = {
+    "regulation": {"code": "TEST", "name": "Test regulation"},
+    "controls": [
+        {
+            "control_id": "C1",
+            "mapped_scanner_checks": [{"scanner": "prowler", "check_id": "iam_root_mfa_enabled"}],
+        }
+    ],
+}
+
+
+def test_malformed_documents_are_skipped(tmp_path, caplog):
+    documents = {
+        "valid.json": VALID,
+        "no-code.json": {"regulation": {"name": "No code"}, "controls": []},
+        "no-control-id.json": {"regulation": {"code": "BAD"}, "controls": [{"title": "Untitled"}]},
+        "no-check-id.json": {
+            "regulation": {"code": "BAD"},
+            "controls": [{"control_id": "C1", "mapped_scanner_checks": [{"scanner": "trivy"}]}],
+        },
+        "list.json": [VALID],
+    }
+    for name, document in documents.items():
+        (tmp_path / name).write_text(json.dumps(document))
+    (tmp_path / "truncated.json").write_text('{"regulation": ')
+
+    with caplog.at_level(logging.ERROR):
+        index = RegulationMappingEngine(str(tmp_path)).load()
+
+    assert list(index.regulations) == ["TEST"]
+    assert index.lookup("prowler", "iam_root_mfa_enabled") == {("TEST", "C1")}
+    skipped = sorted(record.args[0].rsplit("/", 1)[1] for record in caplog.records)
+    assert skipped == ["list.json", "no-check-id.json", "no-code.json", "no-control-id.json", "truncated.json"]
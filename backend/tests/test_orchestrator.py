@@ -0,0 +1,33 @@
+from app.models.models import ScanStatusEnum
+from app.services.orchestrator import ScanJob, audit_outcome
+
+
+def _job(scanner: str, state: str, error: str = None) -> ScanJob:
+    job = ScanJob(scanner, {"type": "aws"})
+    job.state = state
+    job.error = error
+    return job
+
+
+def test_all_jobs_failing_fails_the_audit():
+    status, failed = audit_outcome([
+        _job("prowler", "timed_out", "Timed out after 3600s"),
+        _job("trivy", "failed", "trivy: not found"),
+    ])
+    assert status == ScanStatusEnum.FAILED
+    assert failed == {"prowler": "Timed out after 3600s", "trivy": "trivy: not found"}
+
+
+def test_partial_failure_completes_with_failed_scanners():
+    status, failed = audit_outcome([
+        _job("kube-bench", "completed"),
+        _job("prowler", "failed", "3 of 12 shards failed: throttled"),
+    ])
+    assert status == ScanStatusEnum.COMPLETED
+    assert failed == {"prowler": "3 of 12 shards failed: throttled"}
+
+
+def test_successful_jobs_complete_without_failures():
+    status, failed = audit_outcome([_job("kube-bench", "completed"), _job("prowler", "completed")])
+    assert status == ScanStatusEnum.COMPLETED
+    assert failed == {}
@@ -0,0 +1,61 @@
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.database import get_db
+from app.main import app
+from app.services.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def _cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+@pytest.fixture
+def client():
+    async def no_database():
+        # Malformed cursors are rejected before any query
+        yield None
+
+    app.dependency_overrides[get_db] = no_database
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor(["2025-01-15T08:00:00+00:00", 42]), [str, int]) == [
+        "2025-01-15T08:00:00+00:00", 42,
+    ]
+
+
+@pytest.mark.parametrize("values", [
+    ["2025-01-15T08:00:00+00:00"],
+    ["2025-01-15T08:00:00+00:00", 42, 1],
+    [42, "2025-01-15T08:00:00+00:00"],
+    ["2025-01-15T08:00:00+00:00", "42"],
+    ["2025-01-15T08:00:00+00:00", True],
+    ["2025-01-15T08:00:00+00:00", 2 ** 40],
+    {"created_at": "2025-01-15T08:00:00+00:00", "id": 42},
+])
+def test_wrong_shapes_are_rejected(values):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(_cursor(values), [str, int])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    _cursor(["yesterday", 42]),
+    _cursor(["2025-01-15T08:00:00+00:00", "42"]),
+    _cursor([["2025-01-15T08:00:00+00:00"], 42]),
+    _cursor(["2025-01-15T08:00:00+00:00", 1.5]),
+])
+def test_tampered_scan_cursor_is_a_bad_request(client, cursor):
+    response = client.get("/api/v1/scans", params={"cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_tampered_finding_cursor_is_a_bad_request(client):
+    response = client.get("/api/v1/findings", params={"cursor": _cursor([["CRITICAL"], 1])})
+    assert response.status_code == 400
@@ -0,0 +1,34 @@
+import asyncio
+from types import SimpleNamespace
+
+from urllib3 import PoolManager
+
+from app.core.resources import ResourceManager
+
+
+def test_minio_pool_stats_read_the_urllib3_pool():
+    manager = PoolManager(maxsize=4)
+    host_pool = manager.connection_from_url("http://minio:9000")
+    returned = host_pool._get_conn()
+    host_pool._get_conn()
+    host_pool._put_conn(returned)
+
+    resources = ResourceManager()
+    resources._s3 = SimpleNamespace(_endpoint=SimpleNamespace(http_session=SimpleNamespace(_manager=manager)))
+    stats = resources.pool_stats()["minio"]
+    assert (stats["open"], stats["in_use"], stats["idle"]) == (2, 1, 1)
+
+
+def test_close_disconnects_redis_pools(monkeypatch):
+    resources = ResourceManager()
+    pools = [resources.redis().connection_pool, resources.redis(decode_responses=True).connection_pool]
+    disconnected = []
+
+    for pool in pools:
+        async def disconnect(*args, pool=pool, **kwargs):
+            disconnected.append(pool)
+
+        monkeypatch.setattr(pool, "disconnect", disconnect)
+
+    asyncio.run(resources.close())
+    assert disconnected == pools
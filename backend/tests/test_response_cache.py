@@ -0,0 +1,35 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services.response_cache import ResponseCache
+
+REQUEST = SimpleNamespace(headers={})
+
+
+def _serve(cache: ResponseCache, build) -> str:
+    response = asyncio.run(cache.respond(REQUEST, "scan:1:details", build, tags=["scan:1"]))
+    return response.headers["X-Cache"]
+
+
+def test_completed_responses_are_cached():
+    cache = ResponseCache(backend="memory")
+
+    async def build():
+        return {"status": "completed"}, True
+
+    assert [_serve(cache, build), _serve(cache, build)] == ["miss", "hit"]
+
+
+def test_response_built_across_an_invalidation_is_not_stored():
+    cache = ResponseCache(backend="memory")
+
+    async def stale_build():
+        # The audit changes while its details are being read
+        await cache.invalidate("scan:1")
+        return {"status": "running"}, True
+
+    async def build():
+        return {"status": "completed"}, True
+
+    assert _serve(cache, stale_build) == "miss"
+    assert [_serve(cache, build), _serve(cache, build)] == ["miss", "hit"]
@@ -0,0 +1,95 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import scan_failures, scoring
+from app.services.mapping_engine import RegulationIndex, mapping_engine
+
+REGULATION = {
+    "regulation": {"code": "TEST", "name": "Test regulation"},
+    "controls": [
+        {
+            "control_id": "C1",
+            "priority": "high",
+            "mapped_scanner_checks": [
+                {"scanner": "kube-bench", "check_id": "1.1.1"},
+                {"scanner": "kube-bench", "check_id": "1.1.2"},
+            ],
+        },
+        {
+            "control_id": "C2",
+            "priority": "high",
+            "mapped_scanner_checks": [
+                {"scanner": "prowler", "check_id": "iam_root_mfa_enabled"},
+                {"scanner": "prowler", "check_id": "s3_bucket_default_encryption"},
+            ],
+        },
+    ],
+}
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return self._rows
+
+    def scalars(self):
+        return _Result([row[0] for row in self._rows])
+
+
+class FakeSession:
+    """The queries score_audit runs, answered from in-memory findings"""
+
+    def __init__(self, audit, findings):
+        self.audit = audit
+        self.findings = findings
+
+    async def get(self, model, audit_id):
+        return self.audit
+
+    async def execute(self, statement, params):
+        if statement is scan_failures.FAILED_SCANNERS_SQL:
+            failed = {scanner for scanner, check_id, _ in self.findings if check_id in ("ERROR", "TIMEOUT")}
+            return _Result([(scanner,) for scanner in sorted(failed)])
+        if statement is scoring.FAILING_CHECKS_SQL:
+            return _Result(sorted(set(self.findings)))
+        raise AssertionError(f"Unexpected query {statement}")
+
+    async def commit(self):
+        pass
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    monkeypatch.setattr(mapping_engine, "index", RegulationIndex([REGULATION]))
+    return scoring.ConformityScorer()
+
+
+def _score(scorer, scanner_versions, findings):
+    audit = SimpleNamespace(scanner_versions=scanner_versions, overall_score=None, conformity_scores=None)
+    return asyncio.run(scorer.score_audit(FakeSession(audit, findings), 1))
+
+
+def test_timed_out_scanner_does_not_raise_score(scorer):
+    kube_bench_failure = ("kube-bench", "1.1.1", "HIGH")
+    only_kube_bench = _score(scorer, {"kube-bench": "0.7.0"}, [kube_bench_failure])
+
+    timed_out = _score(
+        scorer,
+        {"kube-bench": "0.7.0", "prowler": "4.0.0"},
+        [kube_bench_failure, ("prowler", "TIMEOUT", "HIGH")],
+    )
+    assert timed_out == only_kube_bench
+
+    # Counting prowler's unassessed checks as passing would have raised it
+    overall, _ = scorer.model().score([("kube-bench", "1.1.1", "high")], {"kube-bench", "prowler"})
+    assert overall > timed_out[0]
+
+
+def test_errored_scanner_checks_are_not_assessed(scorer):
+    overall, scores = _score(scorer, {"prowler": "4.0.0"}, [("prowler", "ERROR", "HIGH")])
+    assert overall is None
+    assert scores == {}
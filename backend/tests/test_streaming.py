@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+from app.scanners import streaming
+from app.scanners.streaming import ROOT, JSONArrayStreamer, iter_json_file
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), "rb") as f:
+        return f.read()
+
+
+def _stream(data: bytes, size: int, array_keys, context_keys=None) -> list:
+    streamer = JSONArrayStreamer(array_keys, context_keys)
+    elements = []
+    for offset in range(0, len(data), size):
+        elements += streamer.feed(data[offset:offset + size])
+    elements += streamer.close()
+    return elements
+
+
+def _trivy_elements(report: dict) -> list:
+    return [
+        (key, item, {"Target": result["Target"]})
+        for result in report["Results"]
+        for key in ("Vulnerabilities", "Misconfigurations")
+        for item in result.get(key) or []
+    ]
+
+
+@pytest.mark.parametrize("size", range(1, 8))
+def test_trivy_report_at_every_split(size):
+    data = _fixture("trivy-image.json")
+    expected = _trivy_elements(json.loads(data))
+    assert _stream(data, size, {"Vulnerabilities", "Misconfigurations"}, {"Target"}) == expected
+
+
+@pytest.mark.parametrize("size", range(1, 8))
+def test_prowler_report_at_every_split(size):
+    data = _fixture("prowler-aws.json")
+    expected = [(ROOT, check, {}) for check in json.loads(data)]
+    assert _stream(data, size, {ROOT}) == expected
+
+
+@pytest.mark.parametrize("size", range(1, 8))
+def test_scalar_elements_at_every_split(size):
+    data = b'{"Vulnerabilities": [1.5e3, -2, true , null,3E-2, "x"], "n": 1.25e-3}'
+    elements = [element for _, element, _ in _stream(data, size, {"Vulnerabilities"})]
+    assert elements == [1500.0, -2, True, None, 0.03, "x"]
+
+
+def test_malformed_scalar_element():
+    with pytest.raises(ValueError):
+        _stream(b'{"Vulnerabilities": [1.x]}', 4, {"Vulnerabilities"})
+
+
+def test_truncated_document():
+    with pytest.raises(ValueError):
+        _stream(b'{"Vulnerabilities": [1, 2', 4, {"Vulnerabilities"})
+
+
+def _spool(data: bytes):
+    spool = tempfile.TemporaryFile()
+    spool.write(data)
+    spool.flush()
+    return spool
+
+
+def test_file_number_across_slice_boundary():
+    # "1." ends the first mapped slice, "5e3" starts the second
+    head = b'{"results": ["'
+    padding = streaming.FILE_CHUNK_SIZE - len(head) - len(b'", 1.')
+    data = head + b"a" * padding + b'", 1.5e3]}'
+    assert data.index(b"5e3") == streaming.FILE_CHUNK_SIZE
+    with _spool(data) as spool:
+        elements = [element for _, element, _ in iter_json_file(spool, {"results"})]
+    assert elements == ["a" * padding, 1500.0]
+
+
+@pytest.mark.parametrize("size", range(1, 8))
+def test_file_slices_of_prowler_report(monkeypatch, size):
+    monkeypatch.setattr(streaming, "FILE_CHUNK_SIZE", size)
+    data = _fixture("prowler-aws.json")
+    with _spool(data) as spool:
+        assert [check for _, check, _ in iter_json_file(spool, {ROOT})] == json.loads(data)
+
+
+def test_empty_file():
+    with _spool(b"") as spool, pytest.raises(ValueError):
+        list(iter_json_file(spool, {ROOT}))
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+import json
+
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from app.models.models import SeverityEnum
+from app.services.archive import AUDIT_METADATA_KEY, FindingsArchive, _to_batch, archive_schema
+from app.services.trends import TrendAnalyzer
+
+ENVIRONMENT_ID = 1
+
+
+def _write_audit(archive: FindingsArchive, audit_id: int, completed_at: datetime, findings) -> None:
+    summary = {"audit_id": audit_id, "completed_at": completed_at.isoformat(), "overall_score": 0.5}
+    filesystem, _ = archive.filesystem()
+    path = archive.audit_path(ENVIRONMENT_ID, completed_at, audit_id)
+    filesystem.create_dir(path.rsplit("/", 1)[0], recursive=True)
+    rows = [
+        (audit_id, finding_hash, scanner, check_id, severity, "open", "AwsS3Bucket", "eu-west-1", "bucket", "title")
+        for finding_hash, scanner, check_id, severity in findings
+    ]
+    schema = archive_schema().with_metadata({AUDIT_METADATA_KEY: json.dumps(summary)})
+    with pq.ParquetWriter(path, schema, filesystem=filesystem) as writer:
+        writer.write_batch(_to_batch(rows))
+
+
+def _trends(tmp_path, audits):
+    """Trends of ``audits`` (lists of findings), archived an hour apart"""
+    archive = FindingsArchive("local")
+    archive._filesystem = (pafs.LocalFileSystem(), str(tmp_path))
+    now = datetime.now(timezone.utc)
+    for audit_id, findings in enumerate(audits, start=1):
+        _write_audit(archive, audit_id, now - timedelta(hours=len(audits) - audit_id), findings)
+    return TrendAnalyzer(archive).environment_trends(ENVIRONMENT_ID)["audits"]
+
+
+def test_fixed_findings_that_come_back_are_regressions(tmp_path):
+    audits = _trends(tmp_path, [
+        [("h1", "prowler", "s3_encryption", SeverityEnum.HIGH), ("h2", "prowler", "iam_mfa", SeverityEnum.LOW)],
+        [("h1", "prowler", "s3_encryption", SeverityEnum.HIGH)],
+        [("h1", "prowler", "s3_encryption", SeverityEnum.HIGH), ("h2", "prowler", "iam_mfa", SeverityEnum.LOW)],
+    ])
+
+    assert [audit["audit_id"] for audit in audits] == [1, 2, 3]
+    assert [audit["new"] for audit in audits] == [2, 0, 0]
+    assert [audit["fixed"] for audit in audits] == [0, 1, 0]
+    assert [audit["regressions"] for audit in audits] == [0, 0, 1]
+    assert [audit["open_by_severity"] for audit in audits] == [
+        {"high": 1, "low": 1},
+        {"high": 1},
+        {"high": 1, "low": 1},
+    ]
+
+
+def test_failed_scanner_is_neither_fixed_nor_new(tmp_path):
+    audits = _trends(tmp_path, [
+        [("h1", "prowler", "s3_encryption", SeverityEnum.HIGH), ("c1", "trivy", "CVE-1", SeverityEnum.LOW)],
+        # prowler timed out after reporting one finding
+        [
+            ("t", "prowler", "TIMEOUT", SeverityEnum.HIGH),
+            ("h2", "prowler", "iam_mfa", SeverityEnum.CRITICAL),
+            ("c1", "trivy", "CVE-1", SeverityEnum.LOW),
+        ],
+        [("h1", "prowler", "s3_encryption", SeverityEnum.HIGH), ("c2", "trivy", "CVE-2", SeverityEnum.LOW)],
+    ])
+
+    assert [audit["new"] for audit in audits] == [2, 0, 1]
+    assert [audit["fixed"] for audit in audits] == [0, 0, 1]
+    assert [audit["regressions"] for audit in audits] == [0, 0, 0]
+    # prowler's counts carry over from its last successful run
+    assert [audit["open_by_severity"] for audit in audits] == [
+        {"high": 1, "low": 1},
+        {"high": 1, "low": 1},
+        {"high": 1, "low": 1},
+    ]
@@ -0,0 +1,35 @@
+import asyncio
+
+from app.scanners.cache import TrivyResultCache
+
+
+class UnreachableRedis:
+    async def getex(self, key, ex):
+        raise ConnectionError("Error 111 connecting to redis:6379. Connection refused.")
+
+
+def test_redis_errors_are_a_miss(monkeypatch):
+    cache = TrivyResultCache(backend="redis")
+    monkeypatch.setattr(cache, "_redis_client", lambda: UnreachableRedis())
+
+    assert asyncio.run(cache.load("key")) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_unreadable_disk_entry_is_a_miss(tmp_path):
+    cache = TrivyResultCache(backend="disk", directory=str(tmp_path))
+    # A directory where the entry should be: open() raises IsADirectoryError
+    (tmp_path / "key.ndjson.z").mkdir()
+
+    assert asyncio.run(cache.load("key")) is None
+    assert (cache.hits, cache.misses) == (0, 1)
+
+
+def test_key_derivation_errors_disable_caching(monkeypatch):
+    cache = TrivyResultCache(backend="disk")
+
+    async def broken(*args):
+        raise PermissionError("docker.sock")
+
+    monkeypatch.setattr(cache, "_resolve_image_digest", broken)
+    assert asyncio.run(cache.key_for("trivy", "0.50.0", "image", "nginx:1.25", ["HIGH"])) is None